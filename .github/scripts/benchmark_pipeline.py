@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+狀態管線效能基準測試腳本
+產生指定規模的合成 PRD/src/tests 樹，量測各階段耗時與記憶體峰值並與基準比較
+
+耗時取多次執行（不啟用 tracemalloc）的最小值，記憶體峰值另以一次 tracemalloc 執行量測。
+耗時與機器速度有關：每次執行都會量測固定的校正工作量，比較時依「本次校正耗時 / 基準校正耗時」
+換算基準耗時（只放寬、不收緊）後再套用容許比例；記憶體峰值與機器無關，直接套用容許比例。
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Any, Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = SCRIPTS_DIR / "benchmark_baseline.json"
+
+# 與 ModuleStatusChecker 相同的模組代碼
+MODULES = [
+    ('DSH', 'Dashboard'),
+    ('CRM', 'Customer_Relationship_Management'),
+    ('BDM', 'Basic_Data_Maintenance'),
+    ('IM', 'Item_Management'),
+    ('OP', 'Operations_Planning'),
+    ('OM', 'Order_Management'),
+    ('MES', 'Manufacturing_Execution_System'),
+    ('WMS', 'Warehouse_Management_System'),
+    ('PM', 'Purchasing_Management'),
+    ('LM', 'Logistics_Management'),
+    ('FA', 'Finance_Accounting'),
+    ('BI', 'Business_Intelligence'),
+    ('SA', 'System_Administration'),
+    ('UP', 'User_Profile')
+]
+
+STATUSES = ['🔴 未開始', '🟡 開發中', '✅ 完成', '⚪ 規劃中']
+
+
+class CorpusGenerator:
+    """合成語料產生器，沿用現有 PRD 的欄位版面"""
+
+    def __init__(self, root: Path, fr_count: int, frs_per_prd: int = 5, seed: int = 42):
+        self.root = root
+        self.fr_count = fr_count
+        self.frs_per_prd = frs_per_prd
+        self.random = random.Random(seed)
+        self.fr_ids: List[str] = []
+
+    def submodule_code(self, index: int) -> str:
+        """產生不重複的子模組代碼：依序為 AA..ZZ、AAA..ZZZ…（至少兩個字母，符合 FR-ID 文法）"""
+        letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        length = 2
+        while index >= 26 ** length:
+            index -= 26 ** length
+            length += 1
+        code = ""
+        for _ in range(length):
+            index, digit = divmod(index, 26)
+            code = letters[digit] + code
+        return code
+
+    def render_fr(self, fr_id: str, number: int) -> str:
+        """產生單一 FR 區塊"""
+        status = self.random.choice(STATUSES)
+        return f"""### {fr_id}: 合成功能 {number}
+**狀態**: {status}
+
+**功能描述**:
+合成功能需求 {number}，用於效能基準測試。
+
+**功能需求細節**:
+- **條件/觸發**: 當使用者送出表單時
+- **行為**: 系統驗證資料並儲存
+- **資料輸入**: 表單欄位、使用者資訊
+- **資料輸出**: 儲存結果、通知訊息
+- **UI反應**: 顯示成功或錯誤訊息
+- **例外處理**: 驗證失敗時提示錯誤
+- **優先級**: P1
+
+**驗收標準**:
+```yaml
+- 條件: 輸入完整資料
+  預期結果: 系統儲存成功
+- 條件: 缺少必填欄位
+  預期結果: 系統提示錯誤
+- 條件: 重複送出
+  預期結果: 系統忽略重複請求
+```
+
+**技術需求**:
+- **API 端點**: `POST /api/v1/synthetic/{number}`
+- **請求/回應**: 詳見API規格章節
+- **數據模型**: synthetic_{number}表
+- **權限要求**: synthetic:write
+- **認證方式**: JWT Token
+
+---
+"""
+
+    def render_prd(self, module_code: str, sub_code: str, fr_ids: List[str]) -> str:
+        """產生單一 PRD 文件"""
+        frs = "\n".join(self.render_fr(fr_id, i + 1) for i, fr_id in enumerate(fr_ids))
+        return f"""# [{module_code}-{sub_code}] 合成子模組 PRD 文件
+
+## 模組資訊
+- **模組代碼**: {module_code}-{sub_code}
+- **模組名稱**: Synthetic {sub_code}
+- **負責人**: 產品團隊
+- **最後更新**: 2025-08-21
+- **版本**: v1.0.0
+
+## 功能需求
+
+{frs}
+
+## API 設計
+
+```
+POST /api/v1/synthetic
+```
+
+## 資料模型
+
+```typescript
+interface Synthetic{sub_code} {{
+  id: string;
+}}
+```
+
+```sql
+CREATE TABLE synthetic_{sub_code.lower()} (id VARCHAR(36) PRIMARY KEY);
+```
+"""
+
+    def generate(self) -> Dict[str, Any]:
+        """產生 PRD/、src/、tests/ 三個目錄"""
+        prd_count = max(1, (self.fr_count + self.frs_per_prd - 1) // self.frs_per_prd)
+        remaining = self.fr_count
+
+        for prd_index in range(prd_count):
+            module_index = prd_index % len(MODULES)
+            module_code, module_name = MODULES[module_index]
+            sub_index = prd_index // len(MODULES)
+            sub_code = self.submodule_code(sub_index)
+
+            module_dir = self.root / "PRD" / f"{module_index + 1:02d}-{module_code}-{module_name}"
+            sub_dir = module_dir / f"{module_index + 1:02d}.{sub_index + 1}-{module_code}-{sub_code}-Synthetic"
+            sub_dir.mkdir(parents=True, exist_ok=True)
+
+            count = min(self.frs_per_prd, remaining)
+            remaining -= count
+            fr_ids = [f"FR-{module_code}-{sub_code}-{i + 1:03d}" for i in range(count)]
+            self.fr_ids.extend(fr_ids)
+            (sub_dir / "prd.md").write_text(self.render_prd(module_code, sub_code, fr_ids), encoding='utf-8')
+
+            # PRD 內的測試目錄（約半數子模組具備）
+            if prd_index % 2 == 0:
+                for test_type in ['unit', 'integration', 'e2e']:
+                    test_dir = sub_dir / "tests" / test_type
+                    test_dir.mkdir(parents=True, exist_ok=True)
+                    (test_dir / f"{fr_ids[0]}.test.ts").write_text(
+                        f"describe('{fr_ids[0]}', () => {{ it('works', () => {{}}); }});\n", encoding='utf-8')
+
+            # 程式碼
+            src_dir = self.root / "src" / "modules" / f"{module_code.lower()}_{sub_code.lower()}"
+            src_dir.mkdir(parents=True, exist_ok=True)
+            (src_dir / "service.ts").write_text(f"// {fr_ids[0]}\nexport class Service {{}}\n", encoding='utf-8')
+
+            # 根目錄測試（約三分之二的 FR 有測試）
+            unit_dir = self.root / "tests" / "unit" / module_code.lower()
+            unit_dir.mkdir(parents=True, exist_ok=True)
+            tested = [fr_id for i, fr_id in enumerate(fr_ids) if i % 3 != 2]
+            body = "\n".join(f"def test_{fr_id.replace('-', '_').lower()}():\n    \"\"\"{fr_id}\"\"\"\n"
+                             for fr_id in tested)
+            (unit_dir / f"test_{module_code.lower()}_{sub_code.lower()}.py").write_text(body, encoding='utf-8')
+
+        return {"fr_count": len(self.fr_ids), "prd_files": prd_count}
+
+
+@contextmanager
+def working_directory(path: Path):
+    """暫時切換工作目錄（各腳本以相對路徑讀取 PRD/、src/、tests/）"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def calibrate(repeat: int = 20) -> float:
+    """量測固定的純 Python 工作量（正規表示式、字典），取多次的最小值作為機器速度的參考"""
+    import re
+    pattern = re.compile(r'FR-[A-Z]{2,5}-\d{3}')
+    text = " ".join(f"FR-ABC-{i % 1000:03d} 功能 {i}" for i in range(2000))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts: Dict[str, int] = {}
+        for _ in range(5):
+            for match in pattern.finditer(text):
+                counts[match.group()] = counts.get(match.group(), 0) + 1
+        best = min(best, time.perf_counter() - start)
+    return round(best, 6)
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, Any]:
+    """量測單一階段：耗時取 repeat 次執行的最小值（不受 tracemalloc 額外成本影響），
+    記憶體峰值另以一次 tracemalloc 執行量測"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            value = func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    with redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"value": value, "seconds": round(best, 4), "peak_kb": round(peak / 1024, 1)}
+
+
+def run_stages(fr_ids: List[str], repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """依管線順序執行各階段"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    from parse_prd_status import PRDParser
+    from validate_prd import PRDValidator
+    from check_code_status import CodeStatusChecker
+    from validate_consistency import ConsistencyValidator
+    from update_mpm import MPMUpdater
+
+    stages = {}
+
+    prd = measure(lambda: PRDParser().parse_prd_files(), repeat)
+    stages["prd_parser"] = prd
+
+    stages["prd_validator"] = measure(lambda: PRDValidator("PRD").validate_all_prds(), repeat)
+
+    code = measure(lambda: CodeStatusChecker().check_code_status(), repeat)
+    stages["code_status"] = code
+
+    stages["consistency"] = measure(lambda: ConsistencyValidator().validate_consistency(fr_ids, {}), repeat)
+
+    data = {"prd": prd["value"], "code": code["value"], "test": {}, "issue": {}}
+    stages["mpm_updater"] = measure(lambda: MPMUpdater().update_mpm(data), repeat)
+
+    return {name: {"seconds": r["seconds"], "peak_kb": r["peak_kb"]} for name, r in stages.items()}
+
+
+def run_benchmark(size: int, keep: bool = False, repeat: int = 3) -> Dict[str, Any]:
+    """產生單一規模的語料並執行所有階段"""
+    workdir = Path(tempfile.mkdtemp(prefix=f"prd-bench-{size}-"))
+    try:
+        generator = CorpusGenerator(workdir, size)
+        start = time.perf_counter()
+        corpus = generator.generate()
+        corpus["generate_seconds"] = round(time.perf_counter() - start, 4)
+
+        # 校正在各階段前後各量測一次，取較小值以降低瞬間負載的影響
+        calibration = calibrate()
+        with working_directory(workdir):
+            stages = run_stages(generator.fr_ids, repeat)
+        calibration = min(calibration, calibrate())
+
+        return {"corpus": corpus, "calibration_seconds": calibration, "stages": stages}
+    finally:
+        if keep:
+            print(f"保留語料目錄: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+# 低於此值的量測不比較（計時與配置雜訊的量級）；預設規模下除了 mpm_updater 以外的階段耗時都高於此值
+MIN_SECONDS = 0.05
+MIN_PEAK_KB = 256
+
+
+def speed_factor(size_result: Dict[str, Any], base_result: Dict[str, Any]) -> float:
+    """本次與基準機器的速度比（>1 表示本次較慢）；任一方缺少校正值時視為相同
+
+    只在本次較慢時放寬上限，不因校正顯示較快而收緊（共用主機的校正值會在快慢兩種狀態間跳動）。
+    """
+    current = size_result.get("calibration_seconds")
+    base = base_result.get("calibration_seconds")
+    if not current or not base:
+        return 1.0
+    return max(1.0, current / base)
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                          tolerance: float) -> List[str]:
+    """與基準比較，回傳退化項目說明
+
+    耗時上限 = 基準耗時 × 機器速度比 × (1 + tolerance)；記憶體上限 = 基準峰值 × (1 + tolerance)。
+    """
+    regressions = []
+    for size, size_result in results.items():
+        base_result = baseline.get(size, {})
+        base_stages = base_result.get("stages", {})
+        factor = speed_factor(size_result, base_result)
+        for stage, metrics in size_result["stages"].items():
+            base = base_stages.get(stage)
+            if not base:
+                continue
+            for key, scale, floor in (("seconds", factor, MIN_SECONDS), ("peak_kb", 1.0, MIN_PEAK_KB)):
+                limit = base[key] * scale * (1 + tolerance)
+                if metrics[key] > max(limit, floor):
+                    note = f"，機器速度比 {scale:.2f}" if key == "seconds" and scale != 1.0 else ""
+                    regressions.append(
+                        f"{size} FR / {stage} / {key}: {metrics[key]} > 基準 {base[key]} (+{tolerance:.0%}{note})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PRD 狀態管線效能基準測試")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="FR 數量，以逗號分隔（例如 1000,10000,100000）；過小的規模耗時低於比較下限")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基準檔案路徑")
+    parser.add_argument("--save-baseline", action="store_true", help="將本次結果存為基準")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="允許的退化比例（耗時先依機器速度校正；預設 0.5 即 +50%%）")
+    parser.add_argument("--repeat", type=int, default=3, help="每個階段計時的執行次數（取最小值）")
+    parser.add_argument("--output", default="temp/benchmark_results.json", help="結果輸出檔案")
+    parser.add_argument("--keep", action="store_true", help="保留產生的語料目錄")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {}
+    for size in sizes:
+        print(f"執行基準測試：{size} 個 FR...")
+        results[str(size)] = run_benchmark(size, args.keep, args.repeat)
+        for stage, metrics in results[str(size)]["stages"].items():
+            print(f"  {stage:<15} {metrics['seconds']:>9.4f}s  峰值 {metrics['peak_kb']:>10.1f} KB")
+
+    output_file = Path(args.output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"結果已保存到: {output_file}")
+
+    baseline_file = Path(args.baseline)
+    if args.save_baseline:
+        baseline = {}
+        if baseline_file.exists():
+            baseline = json.loads(baseline_file.read_text(encoding='utf-8'))
+        baseline.update(results)
+        baseline_file.write_text(json.dumps(baseline, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"基準已更新: {baseline_file}")
+        return 0
+
+    if not baseline_file.exists():
+        print("找不到基準檔案，跳過比較")
+        return 0
+
+    baseline = json.loads(baseline_file.read_text(encoding='utf-8'))
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\n⚠️  發現效能退化:")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+
+    print("\n✅ 未發現效能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,14 +9,73 @@ import re
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from snapshot import add_snapshot_arguments, export_stage
+from file_scan import search_first_bytes
+from fr_grammar import FR_ID_BYTES_PATTERN, iter_fr_ids
+from stage_cache import add_cache_arguments, cache_from_args, run_stage
+from record_stream import RecordStreamWriter
+
+class SourceIndex:
+    """src/ 目錄索引：只走訪一次，記錄各子目錄中的程式碼檔案與檔名含 FR-ID 的檔案，
+    之後每個子模組只在記憶體中查詢（依模組縮寫比對目錄名稱、依 FR-ID 查檔名）"""
+    
+    def __init__(self, src_dir: Path, code_extensions: Set[str]):
+        # 目錄順序與 src_dir.rglob("*") 相同：(目錄名稱小寫, [(檔案路徑, 是否為程式碼檔案, 檔名中的 FR-ID)])
+        self.dirs: List[Tuple[str, List[Tuple[str, bool, Tuple[str, ...]]]]] = []
+        self.dirs_by_fr: Dict[str, List[int]] = {}
+        self._dirs_by_abbr: Dict[str, List[int]] = {}
+        
+        if not src_dir.exists():
+            return
+        metrics.count("src_walks")
+        with metrics.timer("walk"):
+            # rglob 在列出每個目錄的子項目時產生子目錄，因此依父目錄的走訪順序排列子目錄
+            children: List[str] = []
+            files_by_dir: Dict[str, List[str]] = {}
+            for dirpath, dirnames, filenames in os.walk(src_dir):
+                children.extend(os.path.join(dirpath, name) for name in dirnames)
+                files_by_dir[dirpath] = filenames
+            
+            for code_dir in children:
+                position = len(self.dirs)
+                files = []
+                for filename in files_by_dir.get(code_dir, []):
+                    fr_ids = tuple(iter_fr_ids(filename))
+                    is_code = os.path.splitext(filename)[1] in code_extensions
+                    if is_code or fr_ids:
+                        files.append((os.path.join(code_dir, filename), is_code, fr_ids))
+                    for fr_id in fr_ids:
+                        positions = self.dirs_by_fr.setdefault(fr_id, [])
+                        if not positions or positions[-1] != position:
+                            positions.append(position)
+                self.dirs.append((os.path.basename(code_dir).lower(), files))
+    
+    def dirs_for_abbr(self, module_abbr: str) -> List[int]:
+        """目錄名稱包含模組縮寫（CRM-CM → crm_cm）的目錄位置"""
+        token = module_abbr.replace("-", "_").lower()
+        if token not in self._dirs_by_abbr:
+            self._dirs_by_abbr[token] = [i for i, (name, _) in enumerate(self.dirs) if token in name]
+        return self._dirs_by_abbr[token]
+
 
 class CodeStatusChecker:
-    def __init__(self):
-        self.prd_dir = Path("PRD")
-        self.src_dir = Path("src")
+    def __init__(self, root: str = "."):
+        self.prd_dir = Path(root) / "PRD"
+        self.src_dir = Path(root) / "src"
+        self.abbr_pattern = re.compile(rb'\[([A-Z]{2,3}-[A-Z]{2,3})\]')
         self.code_extensions = {'.js', '.ts', '.jsx', '.tsx', '.py', '.java', '.cs', '.php', '.rb', '.go'}
+        self._source_index: Optional[SourceIndex] = None
         
+    @property
+    def source_index(self) -> SourceIndex:
+        """src/ 索引（每次執行只建立一次）"""
+        if self._source_index is None:
+            self._source_index = SourceIndex(self.src_dir, self.code_extensions)
+        return self._source_index
+    
     def check_code_status(self) -> Dict[str, Any]:
         """檢查程式碼狀態"""
         results = {
@@ -26,23 +85,43 @@ class CodeStatusChecker:
             "modules_without_code": 0
         }
         
+        for module_name, module_results in self.iter_module_code():
+            results["modules"][module_name] = module_results
+            self.add_module_counts(results, module_results)
+        
+        return results
+    
+    def iter_module_code(self):
+        """依模組名稱順序逐一產生 (模組名稱, 模組程式碼狀態)"""
         if not self.prd_dir.exists():
             print(f"PRD 目錄不存在: {self.prd_dir}")
-            return results
+            return
             
         for module_dir in sorted(self.prd_dir.iterdir()):
             if module_dir.is_dir():
-                module_name = module_dir.name
-                module_results = self.check_module_code(module_dir)
-                results["modules"][module_name] = module_results
-                results["total_modules"] += 1
-                
-                if module_results["has_code"]:
-                    results["modules_with_code"] += 1
-                else:
-                    results["modules_without_code"] += 1
-        
-        return results
+                yield module_dir.name, self.check_module_code(module_dir)
+    
+    def add_module_counts(self, summary: Dict[str, Any], module_results: Dict[str, Any]):
+        """累計模組數量統計"""
+        summary["total_modules"] += 1
+        if module_results["has_code"]:
+            summary["modules_with_code"] += 1
+        else:
+            summary["modules_without_code"] += 1
+    
+    def write_code_status_stream(self, path: Path) -> Dict[str, Any]:
+        """以記錄串流輸出：每個模組檢查完立即寫出，只保留彙總數字，回傳彙總"""
+        summary = {
+            "total_modules": 0,
+            "modules_with_code": 0,
+            "modules_without_code": 0
+        }
+        with RecordStreamWriter(path, "code_status") as writer:
+            for module_name, module_results in self.iter_module_code():
+                writer.write(module_name, module_results)
+                self.add_module_counts(summary, module_results)
+            writer.close(summary)
+        return summary
     
     def check_module_code(self, module_dir: Path) -> Dict[str, Any]:
         """檢查單一模組的程式碼狀態"""
@@ -63,7 +142,9 @@ class CodeStatusChecker:
             module_info["last_commit"] = self.get_last_commit(module_code_dir)
         
         # 檢查子模組
-        prd_files = list(module_dir.glob("**/*.md"))
+        with metrics.timer("walk"):
+            prd_files = list(module_dir.glob("**/*.md"))
+        metrics.count("files_scanned", len(prd_files))
         for prd_file in prd_files:
             if "README" in prd_file.name or "template" in prd_file.name.lower():
                 continue
@@ -77,15 +158,13 @@ class CodeStatusChecker:
     def check_submodule_code(self, prd_file: Path) -> Dict[str, Any]:
         """檢查子模組的程式碼狀態"""
         try:
-            content = prd_file.read_text(encoding='utf-8')
-            
-            # 提取 FR-ID
-            fr_match = re.search(r'FR-\d{3}', content)
-            fr_id = fr_match.group() if fr_match else None
-            
-            # 提取模組縮寫
-            abbr_match = re.search(r'\[([A-Z]{2,3}-[A-Z]{2,3})\]', content)
-            module_abbr = abbr_match.group(1) if abbr_match else ""
+            # 直接在映射的位元組上比對 FR-ID 與模組縮寫
+            matches = search_first_bytes(prd_file, {
+                "fr_id": FR_ID_BYTES_PATTERN,
+                "module_abbr": self.abbr_pattern
+            })
+            fr_id = matches["fr_id"].decode('ascii') if matches["fr_id"] else None
+            module_abbr = matches["module_abbr"].decode('ascii') if matches["module_abbr"] else ""
             
             # 檢查是否有對應的程式碼
             has_code = self.check_submodule_has_code(module_abbr, fr_id)
@@ -107,19 +186,9 @@ class CodeStatusChecker:
         if not module_abbr or not fr_id:
             return False
         
-        # 檢查 src 目錄中是否有對應的程式碼
-        for code_dir in self.src_dir.rglob("*"):
-            if code_dir.is_dir():
-                # 檢查目錄名稱是否包含模組縮寫
-                if module_abbr.replace("-", "_").lower() in code_dir.name.lower():
-                    return True
-                
-                # 檢查是否有包含 FR-ID 的檔案
-                for code_file in code_dir.iterdir():
-                    if code_file.is_file() and fr_id in code_file.name:
-                        return True
-        
-        return False
+        # 目錄名稱包含模組縮寫，或有檔名包含 FR-ID 的檔案
+        index = self.source_index
+        return bool(index.dirs_for_abbr(module_abbr)) or fr_id in index.dirs_by_fr
     
     def find_code_files_for_submodule(self, module_abbr: str, fr_id: str) -> List[str]:
         """尋找子模組對應的程式碼檔案"""
@@ -128,18 +197,16 @@ class CodeStatusChecker:
         if not module_abbr or not fr_id:
             return code_files
         
-        for code_dir in self.src_dir.rglob("*"):
-            if code_dir.is_dir():
-                # 檢查目錄名稱是否包含模組縮寫
-                if module_abbr.replace("-", "_").lower() in code_dir.name.lower():
-                    for code_file in code_dir.iterdir():
-                        if code_file.is_file() and code_file.suffix in self.code_extensions:
-                            code_files.append(str(code_file))
-                
-                # 檢查是否有包含 FR-ID 的檔案
-                for code_file in code_dir.iterdir():
-                    if code_file.is_file() and fr_id in code_file.name:
-                        code_files.append(str(code_file))
+        index = self.source_index
+        abbr_dirs = set(index.dirs_for_abbr(module_abbr))
+        for position in sorted(abbr_dirs.union(index.dirs_by_fr.get(fr_id, []))):
+            files = index.dirs[position][1]
+            # 目錄名稱包含模組縮寫：目錄中的程式碼檔案
+            if position in abbr_dirs:
+                code_files.extend(path for path, is_code, _ in files if is_code)
+            
+            # 檔名包含 FR-ID 的檔案
+            code_files.extend(path for path, _, fr_ids in files if fr_id in fr_ids)
         
         return code_files
     
@@ -147,17 +214,26 @@ class CodeStatusChecker:
         """尋找目錄中的程式碼檔案"""
         code_files = []
         
-        for file_path in directory.rglob("*"):
-            if file_path.is_file() and file_path.suffix in self.code_extensions:
-                code_files.append(str(file_path))
+        with metrics.timer("walk"):
+            for file_path in directory.rglob("*"):
+                if file_path.is_file() and file_path.suffix in self.code_extensions:
+                    code_files.append(str(file_path))
+        metrics.count("files_scanned", len(code_files))
         
         return code_files
     
+    def get_head(self) -> str:
+        """目前的 git HEAD（非 git 儲存庫時回傳 None）"""
+        try:
+            result = metrics.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True)
+            return result.stdout.strip() if result.returncode == 0 else None
+        except Exception:
+            return None
+    
     def get_last_commit(self, directory: Path) -> str:
         """獲取目錄的最後提交時間"""
         try:
-            import subprocess
-            result = subprocess.run(
+            result = metrics.run(
                 ["git", "log", "-1", "--format=%cd", "--", str(directory)],
                 capture_output=True,
                 text=True,
@@ -170,7 +246,16 @@ class CodeStatusChecker:
 def main():
     parser = argparse.ArgumentParser(description="檢查程式碼狀態")
     parser.add_argument("--output", default="temp", help="輸出目錄")
+    parser.add_argument("--stream", action="store_true",
+                        help="以記錄串流（JSON Lines + 索引頁尾）輸出 code_status.jsonl，取代 code_status.json")
+    add_snapshot_arguments(parser)
+    add_cache_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    if args.stream and (args.cache_dir or args.snapshot):
+        # 快取與快照都需要完整結果，無法邊檢查邊寫出
+        parser.error("--stream 不能與 --cache-dir（或 PRD_CACHE_DIR）、--snapshot 同時使用")
+    start_from_args("check_code_status", args)
     
     # 建立輸出目錄
     output_dir = Path(args.output)
@@ -178,16 +263,24 @@ def main():
     
     # 檢查程式碼狀態
     checker = CodeStatusChecker()
-    results = checker.check_code_status()
-    
-    # 寫入結果
-    with open(output_dir / "code_status.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    if args.stream:
+        # 邊檢查邊寫出，記憶體中不保留完整結果
+        results = checker.write_code_status_stream(output_dir / "code_status.jsonl")
+    else:
+        # 結果包含 git 最後提交時間，快取鍵同時納入 HEAD
+        results = run_stage(cache_from_args(args), "code_status", "check_code_status",
+                            [checker.prd_dir, checker.src_dir], checker.check_code_status,
+                            {"head": checker.get_head()})
+        
+        # 寫入結果
+        export_stage({"code_status": results}, {"code_status": output_dir / "code_status.json"},
+                     args.snapshot, not args.no_json)
     
     print(f"程式碼狀態檢查完成！")
     print(f"總模組數: {results['total_modules']}")
     print(f"有程式碼的模組: {results['modules_with_code']}")
     print(f"無程式碼的模組: {results['modules_without_code']}")
+    print(f"量測結果: {metrics.save(output_dir)}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -6,20 +6,93 @@
 
 import os
 import re
+import sys
 import json
 import argparse
-import requests
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from snapshot import add_snapshot_arguments, export_stage
+from fr_grammar import FR_ID_GRAMMAR
+from github_client import DEFAULT_API_URL, GitHubAPIError, GitHubClient
+from issue_store import IssueStore, extra_fr_ids
+
+# 單次掃描同時找出 FR-ID 與類型關鍵字（關鍵字不分大小寫，FR-ID 區分大小寫）
+ISSUE_TOKEN_PATTERN = re.compile(f'(?P<fr>{FR_ID_GRAMMAR})|(?P<keyword>(?i:bug|feature|docs))')
+
+# 類型判斷順序：標籤名稱或標題關鍵字
+ISSUE_TYPE_RULES = [
+    ("bug", "bug", "bug"),
+    ("enhancement", "enhancement", "feature"),
+    ("documentation", "documentation", "docs")
+]
+
+# Issue 文字欄位：(標題, 內容, 標籤名稱)
+IssueText = Tuple[str, str, Tuple[str, ...]]
+
+
+def issue_text(issue: Dict[str, Any]) -> IssueText:
+    """取出分類所需的欄位（傳給工作程序時只序列化這些欄位）"""
+    return (issue.get("title") or "", issue.get("body") or "",
+            tuple(label["name"] for label in issue.get("labels", [])))
+
+
+def classify_issue_text(text: IssueText) -> Tuple[str, List[str]]:
+    """單次掃描標題、內容與標籤，回傳 (Issue 類型, FR-ID 列表)
+
+    FR-ID 依標題 → 內容 → 標籤的出現順序去重；類型規則與原本相同：
+    標籤名稱完全相符，或標題包含關鍵字（內容不參與類型判斷）。
+    """
+    title, body, labels = text
+    fr_ids: Dict[str, None] = {}
+    keywords = set()
+    
+    for match in ISSUE_TOKEN_PATTERN.finditer(title):
+        if match.lastgroup == "fr":
+            fr_ids.setdefault(match.group(), None)
+        else:
+            keywords.add(match.group().lower())
+    for field in (body,) + labels:
+        for match in ISSUE_TOKEN_PATTERN.finditer(field):
+            if match.lastgroup == "fr":
+                fr_ids.setdefault(match.group(), None)
+    
+    label_names = {label.lower() for label in labels}
+    for issue_type, label, keyword in ISSUE_TYPE_RULES:
+        if label in label_names or keyword in keywords:
+            return issue_type, list(fr_ids)
+    return "other", list(fr_ids)
+
+
+def classify_issue_batch(texts: List[IssueText]) -> List[Tuple[str, List[str]]]:
+    """分類一批 Issue（可在工作程序中執行）"""
+    return [classify_issue_text(text) for text in texts]
 
 class IssuesChecker:
-    def __init__(self):
+    def __init__(self, workers: int = 0, batch_size: int = 500, api_url: str = DEFAULT_API_URL,
+                 max_connections: int = 8, max_pages: Optional[int] = None,
+                 store_dir: Optional[str] = None):
         self.github_token = os.getenv('GITHUB_TOKEN')
         self.repo_owner = os.getenv('GITHUB_REPOSITORY_OWNER', 'Tsaitung')
         self.repo_name = os.getenv('GITHUB_REPOSITORY', 'Tsaitung/PRD-and-Development-Roadmap')
         self.output_dir = Path("temp")
         self.output_dir.mkdir(exist_ok=True)
         
+        # GitHub API 位址、連線池大小與分頁上限
+        self.api_url = api_url
+        self.max_connections = max_connections
+        self.max_pages = max_pages
+        
+        # 本機 Issue 儲存（設定時以增量同步取代每次抓取全部 Issues）
+        self.store_dir = store_dir
+        
+        # Issue 分類：超過一批時才使用工作程序池
+        self.workers = workers
+        self.batch_size = batch_size
+        
     def check_github_issues(self) -> Dict[str, Any]:
         """檢查 GitHub Issues 狀態"""
         results = {
@@ -40,116 +113,110 @@ class IssuesChecker:
             print("GitHub Token 未設定，使用模擬數據")
             return self.get_mock_issues_data()
         
-        try:
-            # 獲取所有 Issues
+        # 獲取所有 Issues（API 錯誤直接拋出 GitHubAPIError，不以模擬數據取代）
+        if self.store_dir:
+            issues = self.sync_issue_store()
+        else:
             issues = self.fetch_github_issues()
+        
+        # 一次分類所有 Issue（類型與 FR-ID 關聯）
+        classifications = self.classify_issues(issues)
+        
+        for issue, (issue_type, fr_ids) in zip(issues, classifications):
+            # 加上留言與交叉引用（關聯的 PR）中的 FR-ID
+            fr_ids = fr_ids + [fr_id for fr_id in extra_fr_ids(issue) if fr_id not in fr_ids]
+            results["total_issues"] += 1
+            
+            if issue["state"] == "open":
+                results["open_issues"] += 1
+            else:
+                results["closed_issues"] += 1
+            
+            # Issue 類型
+            results["issues_by_status"][issue_type] += 1
             
-            for issue in issues:
-                results["total_issues"] += 1
+            # 與 FR-ID 的關聯
+            for fr_id in fr_ids:
+                if fr_id not in results["issues_by_fr"]:
+                    results["issues_by_fr"][fr_id] = {
+                        "open": 0,
+                        "closed": 0,
+                        "issues": []
+                    }
                 
                 if issue["state"] == "open":
-                    results["open_issues"] += 1
+                    results["issues_by_fr"][fr_id]["open"] += 1
                 else:
-                    results["closed_issues"] += 1
-                
-                # 分析 Issue 類型
-                issue_type = self.analyze_issue_type(issue)
-                results["issues_by_status"][issue_type] += 1
-                
-                # 分析與 FR-ID 的關聯
-                fr_ids = self.extract_fr_ids(issue)
-                for fr_id in fr_ids:
-                    if fr_id not in results["issues_by_fr"]:
-                        results["issues_by_fr"][fr_id] = {
-                            "open": 0,
-                            "closed": 0,
-                            "issues": []
-                        }
-                    
-                    if issue["state"] == "open":
-                        results["issues_by_fr"][fr_id]["open"] += 1
-                    else:
-                        results["issues_by_fr"][fr_id]["closed"] += 1
-                    
-                    results["issues_by_fr"][fr_id]["issues"].append({
-                        "number": issue["number"],
-                        "title": issue["title"],
-                        "state": issue["state"],
-                        "created_at": issue["created_at"]
-                    })
+                    results["issues_by_fr"][fr_id]["closed"] += 1
                 
-                # 記錄最近的 Issues
-                if len(results["recent_issues"]) < 10:
-                    results["recent_issues"].append({
-                        "number": issue["number"],
-                        "title": issue["title"],
-                        "state": issue["state"],
-                        "created_at": issue["created_at"],
-                        "fr_ids": fr_ids
-                    })
+                results["issues_by_fr"][fr_id]["issues"].append({
+                    "number": issue["number"],
+                    "title": issue["title"],
+                    "state": issue["state"],
+                    "type": issue_type,
+                    "created_at": issue["created_at"]
+                })
             
-        except Exception as e:
-            print(f"檢查 GitHub Issues 時發生錯誤: {e}")
-            return self.get_mock_issues_data()
+            # 記錄最近的 Issues
+            if len(results["recent_issues"]) < 10:
+                results["recent_issues"].append({
+                    "number": issue["number"],
+                    "title": issue["title"],
+                    "state": issue["state"],
+                    "created_at": issue["created_at"],
+                    "fr_ids": fr_ids
+                })
         
         return results
     
     def fetch_github_issues(self) -> List[Dict[str, Any]]:
-        """從 GitHub API 獲取 Issues"""
-        headers = {
-            'Authorization': f'token {self.github_token}',
-            'Accept': 'application/vnd.github.v3+json'
-        }
+        """從 GitHub API 獲取所有 Issues（分頁同時抓取，依速率限制排程）"""
+        async def fetch():
+            async with self.create_client() as client:
+                return await client.fetch_issues(self.repo_name, max_pages=self.max_pages)
         
-        url = f"https://api.github.com/repos/{self.repo_name}/issues"
-        params = {
-            'state': 'all',  # 包含開啟和關閉的 Issues
-            'per_page': 100,
-            'sort': 'created',
-            'direction': 'desc'
-        }
+        return asyncio.run(fetch())
+    
+    def sync_issue_store(self) -> List[Dict[str, Any]]:
+        """增量同步本機 Issue 儲存（只抓取上次同步後更新的 Issue 及其留言、時間軸），回傳全部 Issues"""
+        store = IssueStore(self.store_dir)
         
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
+        async def sync():
+            async with self.create_client() as client:
+                return await store.sync(client, self.repo_name, max_pages=self.max_pages)
         
-        return response.json()
+        updated = asyncio.run(sync())
+        print(f"Issue 儲存已同步: {len(updated)} 個更新，共 {len(store.data['issues'])} 個")
+        return store.issues()
+    
+    def create_client(self) -> GitHubClient:
+        """建立 GitHub API 客戶端"""
+        return GitHubClient(self.github_token, self.api_url, self.max_connections)
+    
+    def classify_issues(self, issues: List[Dict[str, Any]]) -> List[Tuple[str, List[str]]]:
+        """批次分類 Issue，回傳與輸入順序相同的 (類型, FR-ID 列表)"""
+        texts = [issue_text(issue) for issue in issues]
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        metrics.count("issues_classified", len(texts))
+        
+        classifications = []
+        with metrics.timer("classify"):
+            if self.workers > 1 and len(batches) > 1:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    for batch_result in executor.map(classify_issue_batch, batches):
+                        classifications.extend(batch_result)
+            else:
+                for batch in batches:
+                    classifications.extend(classify_issue_batch(batch))
+        return classifications
     
     def analyze_issue_type(self, issue: Dict[str, Any]) -> str:
         """分析 Issue 類型"""
-        labels = [label["name"].lower() for label in issue.get("labels", [])]
-        title = issue["title"].lower()
-        body = issue.get("body", "").lower()
-        
-        # 檢查標籤
-        if "bug" in labels or "bug" in title:
-            return "bug"
-        elif "enhancement" in labels or "feature" in title:
-            return "enhancement"
-        elif "documentation" in labels or "docs" in title:
-            return "documentation"
-        else:
-            return "other"
+        return classify_issue_text(issue_text(issue))[0]
     
     def extract_fr_ids(self, issue: Dict[str, Any]) -> List[str]:
         """從 Issue 中提取 FR-ID"""
-        fr_ids = []
-        
-        # 從標題中提取
-        title_fr_ids = re.findall(r'FR-\d{3}', issue["title"])
-        fr_ids.extend(title_fr_ids)
-        
-        # 從內容中提取
-        if issue.get("body"):
-            body_fr_ids = re.findall(r'FR-\d{3}', issue["body"])
-            fr_ids.extend(body_fr_ids)
-        
-        # 從標籤中提取
-        for label in issue.get("labels", []):
-            label_fr_ids = re.findall(r'FR-\d{3}', label["name"])
-            fr_ids.extend(label_fr_ids)
-        
-        # 去重
-        return list(set(fr_ids))
+        return classify_issue_text(issue_text(issue))[1]
     
     def get_mock_issues_data(self) -> Dict[str, Any]:
         """獲取模擬 Issues 數據"""
@@ -166,6 +233,7 @@ class IssuesChecker:
                             "number": 1,
                             "title": "FR-001: 客戶管理功能問題",
                             "state": "open",
+                            "type": "bug",
                             "created_at": "2024-01-01T10:00:00Z"
                         }
                     ]
@@ -178,6 +246,7 @@ class IssuesChecker:
                             "number": 2,
                             "title": "FR-002: 測試覆蓋率不足",
                             "state": "closed",
+                            "type": "other",
                             "created_at": "2024-01-02T10:00:00Z"
                         }
                     ]
@@ -210,25 +279,41 @@ class IssuesChecker:
 def main():
     parser = argparse.ArgumentParser(description="檢查 GitHub Issues 狀態")
     parser.add_argument("--output", default="temp", help="輸出目錄")
+    parser.add_argument("--workers", type=int, default=0, help="分類 Issue 的工作程序數量（0 表示不使用）")
+    parser.add_argument("--batch-size", type=int, default=500, help="每批分類的 Issue 數量")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="GitHub API 位址（可指向本機假伺服器）")
+    parser.add_argument("--connections", type=int, default=8, help="GitHub API 連線池大小")
+    parser.add_argument("--max-pages", type=int, help="最多抓取的 Issue 分頁數（每頁 100 筆）")
+    parser.add_argument("--store", help="本機 Issue 儲存目錄（例如 temp/issue_store），啟用增量同步與留言 / 交叉引用 FR-ID")
+    add_snapshot_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_from_args("check_issues", args)
     
     # 建立輸出目錄
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # 檢查 Issues
-    checker = IssuesChecker()
-    results = checker.check_github_issues()
+    checker = IssuesChecker(args.workers, args.batch_size, args.api_url, args.connections, args.max_pages,
+                            args.store)
+    try:
+        results = checker.check_github_issues()
+    except GitHubAPIError as e:
+        print(f"檢查 GitHub Issues 時發生錯誤: {e}")
+        return 1
     
     # 寫入結果
-    with open(output_dir / "issue_status.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    export_stage({"issue_status": results}, {"issue_status": output_dir / "issue_status.json"},
+                 args.snapshot, not args.no_json)
     
     print("GitHub Issues 檢查完成！")
     print(f"總 Issues: {results['total_issues']}")
     print(f"開啟 Issues: {results['open_issues']}")
     print(f"關閉 Issues: {results['closed_issues']}")
     print(f"相關 FR-ID: {len(results['issues_by_fr'])}")
+    print(f"量測結果: {metrics.save(output_dir)}")
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
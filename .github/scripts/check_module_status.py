@@ -7,10 +7,15 @@
 import os
 import re
 import json
+import argparse
+import fnmatch
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
 
 class ModuleStatusChecker:
     def __init__(self):
@@ -40,36 +45,128 @@ class ModuleStatusChecker:
         
         self.module_status = {}
         
+        # 路徑索引：一次走訪後依模組代碼分桶，避免每個模組重複 rglob
+        self._path_index: Optional[Dict[str, Dict]] = None
+        self._prd_status_cache: Dict[str, str] = {}
+        self._toc_content: Optional[str] = None
+    
+    def _walk_files(self, root: Path):
+        """走訪目錄下所有檔案，回傳 (相對頂層目錄名, 檔案路徑)"""
+        if not root.exists():
+            return
+        for dirpath, _, filenames in os.walk(root):
+            rel_parts = Path(dirpath).relative_to(root).parts
+            top = rel_parts[0] if rel_parts else ""
+            metrics.count("files_scanned", len(filenames))
+            for filename in filenames:
+                yield top, Path(dirpath) / filename
+    
+    def build_path_index(self) -> Dict[str, Dict]:
+        """走訪 PRD/、src/、tests/ 各一次，將路徑依模組代碼分桶"""
+        with metrics.timer("walk"):
+            return self._build_path_index()
+    
+    def _build_path_index(self) -> Dict[str, Dict]:
+        """建立路徑索引"""
+        index = {
+            code: {
+                'prd_dir': None,
+                'prd_files': [],
+                'readme_files': [],
+                'src_files': [],
+                'unit_tests': [],
+                'integration_tests': []
+            }
+            for code in self.module_codes
+        }
+        
+        # PRD：與原本相同，取第一個名稱包含模組代碼的頂層資料夾
+        prd_top_dirs = []
+        if self.prd_dir.exists():
+            prd_top_dirs = [item.name for item in self.prd_dir.iterdir() if item.is_dir()]
+        
+        prd_by_top: Dict[str, Dict[str, List[Path]]] = {}
+        for top, file_path in self._walk_files(self.prd_dir):
+            if not top or file_path.name not in ("prd.md", "README.md"):
+                continue
+            bucket = prd_by_top.setdefault(top, {'prd_files': [], 'readme_files': []})
+            key = 'prd_files' if file_path.name == "prd.md" else 'readme_files'
+            bucket[key].append(file_path)
+        
+        for code in self.module_codes:
+            module_top = next((name for name in prd_top_dirs if code in name), None)
+            if module_top is None:
+                continue
+            index[code]['prd_dir'] = self.prd_dir / module_top
+            index[code].update(prd_by_top.get(module_top, {'prd_files': [], 'readme_files': []}))
+        
+        # src：等同 glob("**/*{code}*.ts") 與 glob("**/*{code}*.tsx")
+        src_patterns = {
+            code: [f"*{code.lower()}*{ext}" for ext in ['.tsx', '.ts']]
+            for code in self.module_codes
+        }
+        for _, file_path in self._walk_files(self.src_dir):
+            for code, patterns in src_patterns.items():
+                if any(fnmatch.fnmatchcase(file_path.name, pattern) for pattern in patterns):
+                    index[code]['src_files'].append(file_path)
+        
+        # tests：等同 tests/unit、tests/integration 下的 rglob("*{code}*.py")
+        test_buckets = {'unit': 'unit_tests', 'integration': 'integration_tests'}
+        test_patterns = {code: f"*{code.lower()}*.py" for code in self.module_codes}
+        for top, file_path in self._walk_files(self.tests_dir):
+            bucket_key = test_buckets.get(top)
+            if not bucket_key:
+                continue
+            for code, pattern in test_patterns.items():
+                if fnmatch.fnmatchcase(file_path.name, pattern):
+                    index[code][bucket_key].append(file_path)
+        
+        self._path_index = index
+        self._prd_status_cache = {}
+        return index
+    
+    def get_module_paths(self, module_code: str) -> Dict:
+        """取得模組的路徑分桶（必要時建立索引）"""
+        if self._path_index is None:
+            self.build_path_index()
+        return self._path_index[module_code]
+    
+    def get_toc_content(self) -> str:
+        """讀取並快取 TOC Modules.md 內容"""
+        if self._toc_content is None:
+            self._toc_content = metrics.read_text(self.toc_file)
+        return self._toc_content
+        
     def check_prd_status(self, module_code: str) -> str:
         """檢查 PRD 文件完成狀態"""
-        module_prd_path = None
-        
-        # 尋找對應的 PRD 資料夾
-        for item in self.prd_dir.iterdir():
-            if item.is_dir() and module_code in item.name:
-                module_prd_path = item
-                break
+        if module_code not in self._prd_status_cache:
+            self._prd_status_cache[module_code] = self._evaluate_prd_status(module_code)
+        return self._prd_status_cache[module_code]
+    
+    def _evaluate_prd_status(self, module_code: str) -> str:
+        """依路徑分桶判斷 PRD 狀態"""
+        paths = self.get_module_paths(module_code)
         
-        if not module_prd_path or not module_prd_path.exists():
+        if not paths.get('prd_dir'):
             return "⚪"  # 規劃中
         
         # 檢查是否有 prd.md 文件（新標準）
-        prd_files = list(module_prd_path.rglob("prd.md"))
+        prd_files = paths['prd_files']
         if prd_files:
             # 檢查 prd.md 內容
             for prd_file in prd_files:
-                content = prd_file.read_text(encoding='utf-8')
+                content = metrics.read_text(prd_file)
                 if len(content) > 500:  # 簡單判斷內容是否充實
                     return "✅"  # 完成
                 else:
                     return "🟡"  # 開發中
         
         # 檢查是否有 README.md（舊標準）
-        readme_files = list(module_prd_path.rglob("README.md"))
+        readme_files = paths['readme_files']
         if readme_files:
             # 檢查 README.md 內容完整性
             for readme in readme_files:
-                content = readme.read_text(encoding='utf-8')
+                content = metrics.read_text(readme)
                 if len(content) > 500:  # 簡單判斷內容是否充實
                     return "🟡"  # 開發中
         
@@ -84,21 +181,13 @@ class ModuleStatusChecker:
         if prd_status == "⚪":  # 規劃中
             return "🔴", "🔴"  # 未開始
         
-        # 搜尋相關的 tsx/ts 檔案
-        module_files = []
-        
-        # 檢查 src 目錄
-        if self.src_dir.exists():
-            # 分別搜尋 .tsx 和 .ts 檔案
-            for ext in ['.tsx', '.ts']:
-                # 使用正確的 glob 模式
-                pattern = f"**/*{module_code.lower()}*{ext}"
-                module_files.extend(self.src_dir.glob(pattern))
+        # 相關的 tsx/ts 檔案（來自路徑分桶）
+        module_files = self.get_module_paths(module_code)['src_files']
         
         # 檢查是否有實作檔案
         if not module_files:
             # 檢查是否在 TOC Modules.md 中有提到檔案路徑
-            toc_content = self.toc_file.read_text(encoding='utf-8')
+            toc_content = self.get_toc_content()
             if f"/{module_code.lower()}" in toc_content.lower() or ".tsx" in toc_content:
                 # 只有在有 PRD 的情況下才能標記為開發中
                 if prd_status in ["✅", "🟡"]:
@@ -113,19 +202,9 @@ class ModuleStatusChecker:
     
     def check_test_status(self, module_code: str) -> Tuple[str, str]:
         """檢查測試狀態"""
-        unit_tests = []
-        integration_tests = []
-        
-        if self.tests_dir.exists():
-            # 檢查單元測試
-            unit_test_dir = self.tests_dir / "unit"
-            if unit_test_dir.exists():
-                unit_tests = list(unit_test_dir.rglob(f"*{module_code.lower()}*.py"))
-            
-            # 檢查整合測試
-            integration_test_dir = self.tests_dir / "integration"
-            if integration_test_dir.exists():
-                integration_tests = list(integration_test_dir.rglob(f"*{module_code.lower()}*.py"))
+        paths = self.get_module_paths(module_code)
+        unit_tests = paths['unit_tests']
+        integration_tests = paths['integration_tests']
         
         unit_status = "✅" if unit_tests else "🔴"
         integration_status = "✅" if integration_tests else "🔴"
@@ -165,38 +244,58 @@ class ModuleStatusChecker:
         
         return min(progress, 100)
     
-    def scan_module_status(self):
-        """掃描所有模組的狀態"""
-        for code, name in self.module_codes.items():
-            print(f"正在檢查模組 {code} - {name}...")
-            
-            # 檢查 PRD 狀態
-            prd_status = self.check_prd_status(code)
-            
-            # 檢查實作狀態
-            new_system_status, integration_status = self.check_implementation_status(code)
-            
-            # 檢查測試狀態
-            unit_test_status, integration_test_status = self.check_test_status(code)
-            
-            # 檢查 GitHub Issues
-            issues_link = self.check_github_issues(code)
-            
-            # 整合所有狀態
-            statuses = {
-                'old_system': "✅" if code in ['CRM', 'IM', 'OM', 'MES', 'WMS', 'PM', 'LM', 'FA', 'SA', 'UP'] else "🔴",
-                'new_system': new_system_status,
-                'prd': prd_status,
-                'integration': integration_status,
-                'unit_test': unit_test_status,
-                'integration_test': integration_test_status,
-                'issues': issues_link
-            }
-            
-            # 計算上線進度
-            progress = self.calculate_online_progress(code, statuses)
-            statuses['progress'] = progress
-            
+    def evaluate_module(self, code: str) -> Dict:
+        """評估單一模組的所有狀態（僅查詢路徑分桶）"""
+        # 檢查 PRD 狀態
+        prd_status = self.check_prd_status(code)
+        
+        # 檢查實作狀態
+        new_system_status, integration_status = self.check_implementation_status(code)
+        
+        # 檢查測試狀態
+        unit_test_status, integration_test_status = self.check_test_status(code)
+        
+        # 檢查 GitHub Issues
+        issues_link = self.check_github_issues(code)
+        
+        # 整合所有狀態
+        statuses = {
+            'old_system': "✅" if code in ['CRM', 'IM', 'OM', 'MES', 'WMS', 'PM', 'LM', 'FA', 'SA', 'UP'] else "🔴",
+            'new_system': new_system_status,
+            'prd': prd_status,
+            'integration': integration_status,
+            'unit_test': unit_test_status,
+            'integration_test': integration_test_status,
+            'issues': issues_link
+        }
+        
+        # 計算上線進度
+        statuses['progress'] = self.calculate_online_progress(code, statuses)
+        return statuses
+    
+    def scan_module_status(self, workers: int = 1):
+        """掃描所有模組的狀態
+        
+        先以單次走訪建立路徑索引，再逐模組（或以 workers 個執行緒平行）查詢。
+        """
+        self.build_path_index()
+        if self.toc_file.exists():
+            self.get_toc_content()
+        
+        codes = list(self.module_codes)
+        for code in codes:
+            print(f"正在檢查模組 {code} - {self.module_codes[code]}...")
+        
+        if workers > 1:
+            # 預先計算 PRD 狀態，避免執行緒間重複讀取同一檔案
+            for code in codes:
+                self.check_prd_status(code)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.evaluate_module, codes))
+        else:
+            results = [self.evaluate_module(code) for code in codes]
+        
+        for code, statuses in zip(codes, results):
             self.module_status[code] = statuses
     
     def update_toc_file(self):
@@ -298,10 +397,10 @@ class ModuleStatusChecker:
         report_file.write_text(report, encoding='utf-8')
         print(f"已生成報告：{report_file}")
     
-    def run(self):
+    def run(self, workers: int = 1):
         """執行檢測"""
         print("開始掃描模組狀態...")
-        self.scan_module_status()
+        self.scan_module_status(workers=workers)
         
         print("\n更新 TOC Modules.md...")
         self.update_toc_file()
@@ -312,5 +411,12 @@ class ModuleStatusChecker:
         print("\n✅ 模組狀態檢測完成！")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模組狀態自動檢測")
+    parser.add_argument("--workers", type=int, default=1, help="平行評估模組的執行緒數")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    start_from_args("check_module_status", args)
+    
     checker = ModuleStatusChecker()
-    checker.run()
\ No newline at end of file
+    checker.run(workers=args.workers)
+    metrics.save(checker.project_root / "temp")
\ No newline at end of file
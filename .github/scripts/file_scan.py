@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+檔案掃描工具
+以逐塊串流或 mmap 方式讀取檔案，找到所需內容即提早結束，並提供單檔大小上限
+"""
+
+import os
+import re
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern
+
+from instrumentation import metrics
+from fr_grammar import FR_ID_BYTES_PATTERN
+
+# 單檔大小上限（位元組），可由環境變數 PRD_MAX_FILE_BYTES 調整
+DEFAULT_MAX_FILE_BYTES = int(os.getenv("PRD_MAX_FILE_BYTES", str(5 * 1024 * 1024)))
+
+# 超過此大小的檔案改用 mmap 搜尋
+MMAP_THRESHOLD = 1024 * 1024
+
+# 逐塊讀取時每次讀取的位元組數
+BLOCK_BYTES = 64 * 1024
+
+
+class FileTooLargeError(ValueError):
+    """檔案超過設定的大小上限"""
+
+    def __init__(self, path: Path, size: int, max_bytes: int):
+        super().__init__(f"檔案過大 ({size} > {max_bytes} bytes): {path}")
+        self.path = path
+        self.size = size
+        self.max_bytes = max_bytes
+
+
+def check_size(path: Path, max_bytes: Optional[int] = None) -> int:
+    """檢查檔案大小，超過上限時拋出 FileTooLargeError"""
+    limit = DEFAULT_MAX_FILE_BYTES if max_bytes is None else max_bytes
+    size = os.path.getsize(path)
+    if limit and size > limit:
+        metrics.count("files_skipped_too_large")
+        raise FileTooLargeError(Path(path), size, limit)
+    return size
+
+
+def read_text_limited(path: Path, max_bytes: Optional[int] = None, encoding: str = 'utf-8') -> str:
+    """在大小上限內讀取整個檔案（需要完整內容的檢查使用）"""
+    check_size(path, max_bytes)
+    return metrics.read_text(path, encoding)
+
+
+def iter_line_blocks(path: Path, max_bytes: Optional[int] = None, encoding: str = 'utf-8',
+                     block_bytes: int = BLOCK_BYTES) -> Iterator[str]:
+    """逐塊讀取檔案，每塊只包含完整的行（在最後一個換行處切開），記憶體用量與檔案大小無關
+
+    一般大小的 PRD 只需讀取一塊，比逐行處理少了每行的 Python 迴圈成本。
+    """
+    check_size(path, max_bytes)
+    metrics.count("files_read")
+    bytes_read = 0
+    try:
+        with open(path, 'rb') as f:
+            rest = b""
+            while True:
+                chunk = f.read(block_bytes)
+                bytes_read += len(chunk)
+                if not chunk:
+                    if rest:
+                        yield rest.decode(encoding)
+                    return
+                rest += chunk
+                cut = rest.rfind(b"\n") + 1
+                # 單行超過一塊時繼續累積到換行為止
+                if cut:
+                    block, rest = rest[:cut], rest[cut:]
+                    yield block.decode(encoding)
+    finally:
+        metrics.count("bytes_read", bytes_read)
+
+
+def search_first(path: Path, patterns: Dict[str, Pattern],
+                 max_bytes: Optional[int] = None) -> Dict[str, Optional[re.Match]]:
+    """逐塊搜尋每個樣式的第一個符合結果，全部找到後即停止讀取
+
+    樣式必須能在單行內比對（不可跨行，比對空白時只用空格與 tab）。
+    """
+    found: Dict[str, Optional[re.Match]] = {name: None for name in patterns}
+    pending = dict(patterns)
+    for block in iter_line_blocks(path, max_bytes):
+        for name, pattern in list(pending.items()):
+            match = pattern.search(block)
+            if match:
+                found[name] = match
+                del pending[name]
+        if not pending:
+            metrics.count("early_exits")
+            break
+    return found
+
+
+def contains_token(path: Path, token: str, max_bytes: Optional[int] = None,
+                   encoding: str = 'utf-8') -> bool:
+    """檢查檔案是否包含指定字串，大檔案以 mmap 搜尋"""
+    size = check_size(path, max_bytes)
+    needle = token.encode(encoding)
+    metrics.count("files_read")
+    if size == 0:
+        return False
+    with metrics.timer("read"):
+        with open(path, 'rb') as f:
+            if size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    position = mapped.find(needle)
+                    metrics.count("bytes_read", size if position < 0 else position + len(needle))
+                    return position >= 0
+            data = f.read()
+    metrics.count("bytes_read", len(data))
+    return needle in data
+
+
+class FRHit(NamedTuple):
+    """單一 FR-ID 出現位置"""
+    fr_id: str
+    path: str
+    offset: int
+    line: int
+
+
+@contextmanager
+def mapped_file(path: Path, max_bytes: Optional[int] = None) -> Iterator[bytes]:
+    """以 mmap 唯讀映射檔案，空檔案回傳 b''"""
+    size = check_size(path, max_bytes)
+    metrics.count("files_read")
+    metrics.count("bytes_read", size)
+    if size == 0:
+        yield b""
+        return
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def scan_fr_ids(path: Path, pattern: Pattern = FR_ID_BYTES_PATTERN,
+                max_bytes: Optional[int] = None) -> List[FRHit]:
+    """在位元組層級掃描檔案中的所有 FR-ID，回傳位元組位移與行號（從 1 起算）"""
+    hits = []
+    with metrics.timer("scan"):
+        with mapped_file(path, max_bytes) as data:
+            line = 1
+            last = 0
+            for match in pattern.finditer(data):
+                offset = match.start()
+                line += data[last:offset].count(b"\n")
+                last = offset
+                hits.append(FRHit(match.group().decode('ascii'), str(path), offset, line))
+    metrics.count("fr_hits", len(hits))
+    return hits
+
+
+def scan_fr_ids_in_files(paths: Iterable[Path], pattern: Pattern = FR_ID_BYTES_PATTERN,
+                         max_bytes: Optional[int] = None) -> Iterator[FRHit]:
+    """逐檔掃描多個檔案的 FR-ID 並依序產生結果（不累積所有檔案的結果），過大或無法讀取的檔案略過並顯示訊息"""
+    for path in paths:
+        try:
+            hits = scan_fr_ids(path, pattern, max_bytes)
+        except FileTooLargeError as e:
+            print(f"略過檔案: {e}")
+            continue
+        except OSError as e:
+            print(f"讀取檔案時出錯: {path}, 錯誤: {e}")
+            continue
+        yield from hits
+
+
+def search_first_bytes(path: Path, patterns: Dict[str, Pattern],
+                       max_bytes: Optional[int] = None) -> Dict[str, Optional[bytes]]:
+    """在映射的位元組上搜尋各樣式的第一個符合結果（回傳第一個群組或整體比對）"""
+    found: Dict[str, Optional[bytes]] = {}
+    with metrics.timer("scan"):
+        with mapped_file(path, max_bytes) as data:
+            for name, pattern in patterns.items():
+                match = pattern.search(data)
+                found[name] = (match.group(1) if match.groups() else match.group()) if match else None
+    return found
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+FR-ID 文法
+所有腳本共用的 FR-ID 比對規則：同一個編譯好的樣式同時辨識短格式（FR-001）
+與含模組代碼的格式（FR-CRM-CM-001），並提供字串與位元組兩種版本及正規化
+"""
+
+import re
+from typing import Iterator, List, Optional, Union
+
+# FR-ID 文法：FR-[模組代碼-]*三位數編號，前後不可緊接英數字（避免 XFR-001、FR-0012）
+FR_ID_GRAMMAR = r'(?<![A-Za-z0-9])FR-(?:[A-Z]{2,5}-)*\d{3}(?!\d)'
+
+FR_ID_PATTERN = re.compile(FR_ID_GRAMMAR)
+FR_ID_BYTES_PATTERN = re.compile(FR_ID_GRAMMAR.encode('ascii'))
+
+# PRD 規範要求的完整格式：FR-[模組]-[子模組...]-[編號]
+QUALIFIED_FR_ID_PATTERN = re.compile(r'FR-[A-Z]{2,4}(?:-[A-Z]{2,5})*-\d{3}')
+
+# FR 定義標題（### FR-XXX: 名稱）；ID 部分刻意寬鬆，讓格式錯誤的 ID 也能被驗證規則找到
+FR_HEADING_PATTERN = re.compile(r'^###?\s*(FR-[A-Z0-9-]+)[:：]?[ \t]*(.*)$', re.MULTILINE)
+
+# 正規化時視為連字號的字元（底線、全形與各種破折號）
+_SEPARATORS = re.compile(r'[\s_\-‐-―－]+')
+_SHORT_NUMBER = re.compile(r'-(\d{1,2})$')
+
+
+def iter_fr_ids(text: Union[str, bytes]) -> Iterator[str]:
+    """依出現順序逐一產生文字（或位元組）中的 FR-ID"""
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        for match in FR_ID_BYTES_PATTERN.finditer(text):
+            yield match.group().decode('ascii')
+    else:
+        for match in FR_ID_PATTERN.finditer(text):
+            yield match.group()
+
+
+def find_fr_ids(*texts: Union[str, bytes, None]) -> List[str]:
+    """提取多段文字中的 FR-ID，去重並保留第一次出現的順序"""
+    seen = {}
+    for text in texts:
+        if text:
+            for fr_id in iter_fr_ids(text):
+                seen.setdefault(fr_id, None)
+    return list(seen)
+
+
+def is_fr_id(text: str) -> bool:
+    """是否為單一 FR-ID（短格式或含模組代碼）"""
+    return FR_ID_PATTERN.fullmatch(text) is not None
+
+
+def normalize_fr_id(text: str) -> Optional[str]:
+    """將使用者輸入（例如 fr_crm_cm_1、FR－001）正規化為標準 FR-ID，無法辨識時回傳 None"""
+    candidate = _SEPARATORS.sub('-', text.strip().upper()).strip('-')
+    candidate = _SHORT_NUMBER.sub(lambda m: '-' + m.group(1).zfill(3), candidate)
+    return candidate if is_fr_id(candidate) else None
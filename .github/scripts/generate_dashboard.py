@@ -5,25 +5,48 @@
 """
 
 import os
+import re
 import json
 import argparse
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import seaborn as sns
-from matplotlib.patches import Circle, Rectangle
-import numpy as np
 
-class DashboardGenerator:
-    def __init__(self):
-        self.output_dir = Path("docs/dashboard")
-        self.output_dir.mkdir(exist_ok=True)
+from snapshot import SnapshotReader, SnapshotError
+from status_history import StatusHistory
+from incremental_write import write_if_changed
+from record_stream import RecordStreamError, load_json_or_stream
+
+# matplotlib 只在需要產生圖片時才載入，純文字輸出（Mermaid、統計報告）不受影響
+_pyplot = None
+
+# 比較輸出是否變更時忽略的生成時間
+GENERATED_AT_MD = re.compile(r'^\*\*生成時間\*\*: .*$', re.MULTILINE)
+GENERATED_AT_JSON = re.compile(r'^\s*"生成時間": ".*",?$', re.MULTILINE)
+
+
+def load_pyplot():
+    """載入 matplotlib.pyplot 並設定中文字體（僅第一次呼叫時執行）"""
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib.pyplot as plt
         
         # 設定中文字體
         plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
         plt.rcParams['axes.unicode_minus'] = False
+        _pyplot = plt
+    return _pyplot
+
+class DashboardGenerator:
+    def __init__(self):
+        self.output_dir = Path("docs/dashboard")
+        
+        # 狀態歷史（未設定時時間軸使用模擬數據）
+        self.history = None
+        self.history_days = 365
+        
+        # 僅輸出文字格式（不產生圖片、不載入 matplotlib）
+        self.text_only = False
         
         # 設定顏色主題
         self.colors = {
@@ -37,12 +60,14 @@ class DashboardGenerator:
     def generate_dashboard(self, mpm_data: Dict[str, Any]):
         """生成完整的儀表板"""
         print("開始生成儀表板...")
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # 生成各種圖表
-        self.generate_progress_overview(mpm_data)
-        self.generate_module_status_chart(mpm_data)
-        self.generate_timeline_chart(mpm_data)
-        self.generate_heatmap(mpm_data)
+        if not self.text_only:
+            self.generate_progress_overview(mpm_data)
+            self.generate_module_status_chart(mpm_data)
+            self.generate_timeline_chart(mpm_data)
+            self.generate_heatmap(mpm_data)
         
         # 生成 Mermaid 圖表
         self.generate_mermaid_charts(mpm_data)
@@ -54,6 +79,7 @@ class DashboardGenerator:
     
     def generate_progress_overview(self, data: Dict[str, Any]):
         """生成進度概覽圖"""
+        plt = load_pyplot()
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
         
         # 圓餅圖 - 進度分布
@@ -119,6 +145,7 @@ class DashboardGenerator:
                 status_colors.append(self.colors['not_started'])
         
         # 建立圖表
+        plt = load_pyplot()
         fig, ax = plt.subplots(figsize=(12, 8))
         
         bars = ax.barh(module_names, progress_values, color=status_colors, height=0.6)
@@ -137,6 +164,16 @@ class DashboardGenerator:
     
     def generate_timeline_chart(self, data: Dict[str, Any]):
         """生成時間軸圖表"""
+        if self.history is not None:
+            end = date.today()
+            records = self.history.query(end - timedelta(days=self.history_days), end)
+            if records:
+                self.generate_history_timeline(self.history.module_series(records))
+                return
+            print("沒有歷史紀錄，時間軸使用模擬數據")
+        
+        plt = load_pyplot()
+        from matplotlib import dates as mdates
         fig, ax = plt.subplots(figsize=(14, 8))
         
         # 模擬時間軸數據
@@ -167,8 +204,36 @@ class DashboardGenerator:
         ax.grid(True, alpha=0.3)
         
         # 格式化日期軸
-        ax.xaxis.set_major_locator(plt.MonthLocator(interval=2))
-        ax.xaxis.set_major_formatter(plt.DateFormatter('%Y-%m'))
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=2))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+        plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
+        
+        plt.tight_layout()
+        plt.savefig(self.output_dir / 'timeline.png', dpi=300, bbox_inches='tight')
+        plt.close()
+    
+    def generate_history_timeline(self, series: Dict[str, List[tuple]]):
+        """依狀態歷史繪製各模組進度趨勢"""
+        plt = load_pyplot()
+        from matplotlib import dates as mdates
+        fig, ax = plt.subplots(figsize=(14, 8))
+        
+        for module, points in sorted(series.items()):
+            module_name = module.split('-')[1] if '-' in module else module
+            dates = [point[0] for point in points]
+            progress = [point[1] for point in points]
+            ax.plot(dates, progress, marker='o', markersize=3, linewidth=1.5, label=module_name)
+        
+        ax.set_ylim(0, 100)
+        ax.set_xlabel('時間')
+        ax.set_ylabel('進度 (%)')
+        ax.set_title('模組進度趨勢', fontsize=16, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper left', ncol=2, fontsize=9)
+        
+        # 格式化日期軸
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
         plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
         
         plt.tight_layout()
@@ -210,6 +275,7 @@ class DashboardGenerator:
             heatmap_data.append([prd_rate, code_rate, test_rate, error_rate])
         
         # 建立熱力圖
+        plt = load_pyplot()
         fig, ax = plt.subplots(figsize=(10, 8))
         
         im = ax.imshow(heatmap_data, cmap='RdYlGn', aspect='auto')
@@ -255,25 +321,23 @@ graph TD
         
         # 模組關係圖
         modules = list(data.get('modules', {}).keys())[:6]  # 限制顯示數量
-        module_relations = "```mermaid\ngraph LR\n"
+        module_relations = ["```mermaid\ngraph LR\n"]
         
         for i, module in enumerate(modules):
             module_name = module.split('-')[1] if '-' in module else module
-            module_relations += f"    A{i}[{module_name}]\n"
+            module_relations.append(f"    A{i}[{module_name}]\n")
         
         # 添加連接關係
         for i in range(len(modules) - 1):
-            module_relations += f"    A{i} --> A{i+1}\n"
+            module_relations.append(f"    A{i} --> A{i+1}\n")
         
-        module_relations += "```"
-        mermaid_content.append(("模組關係圖", module_relations))
+        module_relations.append("```")
+        mermaid_content.append(("模組關係圖", "".join(module_relations)))
         
-        # 保存 Mermaid 圖表
-        mermaid_file = self.output_dir / 'mermaid_charts.md'
-        with open(mermaid_file, 'w', encoding='utf-8') as f:
-            f.write("# MPM 儀表板 - Mermaid 圖表\n\n")
-            for title, content in mermaid_content:
-                f.write(f"## {title}\n\n{content}\n\n")
+        # 保存 Mermaid 圖表（內容未變時不重寫）
+        parts = ["# MPM 儀表板 - Mermaid 圖表\n\n"]
+        parts.extend(f"## {title}\n\n{content}\n\n" for title, content in mermaid_content)
+        write_if_changed(self.output_dir / 'mermaid_charts.md', "".join(parts))
     
     def generate_statistics_report(self, data: Dict[str, Any]):
         """生成統計報告"""
@@ -303,46 +367,58 @@ graph TD
                 "進度": f"{(completed/total*100):.1f}%" if total > 0 else "0%"
             }
         
-        # 保存統計報告
-        stats_file = self.output_dir / 'statistics.json'
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        # 保存統計報告（只有生成時間不同時不重寫）
+        write_if_changed(self.output_dir / 'statistics.json',
+                         json.dumps(report, ensure_ascii=False, indent=2), GENERATED_AT_JSON)
         
-        # 生成 Markdown 報告
-        md_report = self.output_dir / 'statistics_report.md'
-        with open(md_report, 'w', encoding='utf-8') as f:
-            f.write("# MPM 統計報告\n\n")
-            f.write(f"**生成時間**: {report['生成時間']}\n\n")
-            
-            f.write("## 整體統計\n\n")
-            for key, value in report['整體統計'].items():
-                f.write(f"- **{key}**: {value}\n")
-            
-            f.write("\n## 模組詳細統計\n\n")
-            for module_name, stats in report['模組詳細統計'].items():
-                f.write(f"### {module_name}\n\n")
-                for key, value in stats.items():
-                    f.write(f"- **{key}**: {value}\n")
-                f.write("\n")
+        # 生成 Markdown 報告（只有生成時間不同時不重寫）
+        parts = [
+            "# MPM 統計報告\n\n",
+            f"**生成時間**: {report['生成時間']}\n\n",
+            "## 整體統計\n\n"
+        ]
+        parts.extend(f"- **{key}**: {value}\n" for key, value in report['整體統計'].items())
+        parts.append("\n## 模組詳細統計\n\n")
+        for module_name, stats in report['模組詳細統計'].items():
+            parts.append(f"### {module_name}\n\n")
+            parts.extend(f"- **{key}**: {value}\n" for key, value in stats.items())
+            parts.append("\n")
+        
+        if write_if_changed(self.output_dir / 'statistics_report.md', "".join(parts), GENERATED_AT_MD):
+            print("統計報告已更新")
+        else:
+            print("統計報告內容未變更，略過寫入")
 
 def main():
     parser = argparse.ArgumentParser(description="生成可視化儀表板")
-    parser.add_argument("--mpm-data", default="temp/mpm_data.json", help="MPM 數據檔案")
+    parser.add_argument("--mpm-data", default="temp/mpm_data.json", help="MPM 數據檔案（JSON 或記錄串流）")
     parser.add_argument("--output", default="docs/dashboard", help="輸出目錄")
+    parser.add_argument("--snapshot", help="從管線快照的 mpm_data 區段讀取數據（取代 --mpm-data）")
+    parser.add_argument("--history-dir", help="狀態歷史目錄（status_history.py 產生），用於時間軸圖表")
+    parser.add_argument("--history-days", type=int, default=365, help="時間軸顯示的天數")
+    parser.add_argument("--text-only", action="store_true", help="只輸出 Mermaid 圖表與統計報告（不產生圖片）")
     
     args = parser.parse_args()
     
     # 建立生成器
     generator = DashboardGenerator()
     generator.output_dir = Path(args.output)
-    generator.output_dir.mkdir(exist_ok=True)
+    generator.text_only = args.text_only
+    if args.history_dir:
+        generator.history = StatusHistory(args.history_dir)
+        generator.history_days = args.history_days
     
     # 載入數據
     try:
-        with open(args.mpm_data, 'r', encoding='utf-8') as f:
-            mpm_data = json.load(f)
-    except FileNotFoundError:
-        print(f"找不到數據檔案: {args.mpm_data}")
+        if args.snapshot:
+            mpm_data = SnapshotReader(args.snapshot).load("mpm_data")
+            if mpm_data is None:
+                raise FileNotFoundError(f"{args.snapshot} 沒有 mpm_data 區段")
+        else:
+            # 記錄串流的模組在生成圖表與報告時才逐筆讀取
+            mpm_data = load_json_or_stream(args.mpm_data)
+    except (FileNotFoundError, SnapshotError, RecordStreamError) as e:
+        print(f"找不到數據檔案: {args.snapshot or args.mpm_data} ({e})")
         print("使用模擬數據生成儀表板...")
         mpm_data = {
             "total_modules": 12,
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+非同步 GitHub API 客戶端
+以 asyncio 協調固定大小的 HTTP 連線池（http.client 在執行緒中執行），
+依 X-RateLimit-* 標頭調整的權杖桶排程請求，暫時性錯誤以指數退避重試；
+分頁與 Issue 留言可同時抓取。API 位址可設定，方便對本機假伺服器測試
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import http.client
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from instrumentation import metrics
+
+DEFAULT_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# 需要重試的狀態碼（403 只在觸發速率限制時重試）
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 每頁筆數（GitHub 上限）
+PER_PAGE = 100
+
+LINK_LAST_PAGE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+async def gather_all(coros: List[Awaitable[Any]]) -> List[Any]:
+    """同時執行多個請求，依輸入順序回傳結果；任一失敗時取消其餘請求（釋放連線），並拋出第一個錯誤"""
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(coro) for coro in coros]
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+class GitHubAPIError(RuntimeError):
+    """GitHub API 請求失敗（已用盡重試）"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class TokenBucket:
+    """權杖桶：額度充足時以固定速率補充；剩餘額度低於總額度的 low_water 比例時，
+    改為在重設前平均分配剩餘額度；降到保留量時暫停到重設"""
+
+    def __init__(self, rate: float = 10.0, capacity: float = 10.0, reserve: int = 10,
+                 low_water: float = 0.1):
+        self.base_rate = rate
+        self.low_water = low_water
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = reserve
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """取得一個權杖，不足或暫停中時等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                metrics.count("github_throttled")
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update(self, remaining: Optional[int], reset_at: Optional[float], limit: Optional[int] = None):
+        """依 X-RateLimit-Remaining / X-RateLimit-Reset / X-RateLimit-Limit 調整速率"""
+        if remaining is None or reset_at is None:
+            return
+        seconds_left = max(1.0, reset_at - time.time())
+        if remaining <= self.reserve:
+            # 保留少量額度給其他工具，其餘請求等到重設
+            self.pause(seconds_left)
+            return
+        available = remaining - self.reserve
+        threshold = limit * self.low_water if limit else self.base_rate * 60
+        if remaining >= threshold:
+            self.rate = self.base_rate
+        else:
+            self.rate = min(self.base_rate, max(0.1, available / seconds_left))
+        self.tokens = min(self.tokens, available)
+
+    def pause(self, seconds: float):
+        """暫停發送請求（速率限制或 Retry-After）"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class GitHubClient:
+    """非同步 GitHub REST 客戶端"""
+
+    def __init__(self, token: Optional[str], base_url: str = DEFAULT_API_URL, max_connections: int = 8,
+                 max_retries: int = 5, backoff: float = 1.0, timeout: float = 30.0,
+                 rate: float = 10.0, bucket: Optional[TokenBucket] = None):
+        url = urlsplit(base_url.rstrip("/"))
+        self.scheme = url.scheme or "https"
+        self.host = url.netloc
+        self.base_path = url.path
+        self.token = token
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = bucket or TokenBucket(rate, capacity=rate)
+        self._pool: Optional[asyncio.Queue] = None
+
+    async def __aenter__(self):
+        self._pool = asyncio.Queue()
+        for _ in range(self.max_connections):
+            self._pool.put_nowait(None)
+        return self
+
+    async def __aexit__(self, *exc):
+        while self._pool is not None and not self._pool.empty():
+            connection = self._pool.get_nowait()
+            if connection is not None:
+                connection.close()
+        self._pool = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return connection_class(self.host, timeout=self.timeout)
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": "prd-roadmap-scripts"
+        }
+        if self.token:
+            headers["Authorization"] = f"token {self.token}"
+        return headers
+
+    def _send(self, connection: Optional[http.client.HTTPConnection],
+              path: str) -> Tuple[http.client.HTTPConnection, int, Dict[str, str], bytes]:
+        """在執行緒中送出請求（連線失效時重新建立一次）"""
+        for attempt in range(2):
+            if connection is None:
+                connection = self._connect()
+            try:
+                connection.request("GET", path, headers=self._headers())
+                response = connection.getresponse()
+                body = response.read()
+                return connection, response.status, {k.lower(): v for k, v in response.getheaders()}, body
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                connection.close()
+                connection = None
+                if attempt:
+                    raise
+
+    async def request(self, path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, str]]:
+        """GET 請求，回傳 (JSON 內容, 標頭)；暫時性錯誤與速率限制會重試"""
+        full_path = self.base_path + path + (f"?{urlencode(params)}" if params else "")
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            connection = await self._pool.get()
+            try:
+                metrics.count("http_requests")
+                with metrics.timer("http"):
+                    connection, status, headers, body = await asyncio.to_thread(self._send, connection, full_path)
+            except asyncio.CancelledError:
+                # 執行緒中的請求仍在使用這個連線，不放回連線池（改放空位，之後重新建立）
+                connection = None
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                connection = None
+                last_error = GitHubAPIError(f"連線錯誤 {full_path}: {e}")
+                status, headers = None, {}
+            finally:
+                self._pool.put_nowait(connection)
+
+            self.bucket.update(self._int_header(headers, "x-ratelimit-remaining"),
+                               self._int_header(headers, "x-ratelimit-reset"),
+                               self._int_header(headers, "x-ratelimit-limit"))
+
+            if status is not None and status < 300:
+                return json.loads(body.decode("utf-8")) if body else None, headers
+
+            if status is not None:
+                rate_limited = status == 403 and (headers.get("x-ratelimit-remaining") == "0"
+                                                  or "retry-after" in headers)
+                last_error = GitHubAPIError(f"GitHub API 回應 {status} {full_path}: {body[:200]!r}", status)
+                if status not in RETRY_STATUSES and not rate_limited:
+                    raise last_error
+
+            if attempt == self.max_retries:
+                break
+            delay = self._retry_delay(attempt, headers)
+            metrics.count("github_retries")
+            print(f"GitHub API 請求失敗，{delay:.1f} 秒後重試 ({attempt + 1}/{self.max_retries}): {last_error}")
+            if status in (403, 429):
+                # 速率限制影響所有請求，暫停整個權杖桶
+                self.bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+        raise last_error
+
+    def _retry_delay(self, attempt: int, headers: Dict[str, str]) -> float:
+        """Retry-After 或速率限制重設時間優先，否則指數退避加隨機抖動"""
+        retry_after = self._int_header(headers, "retry-after")
+        if retry_after is not None:
+            return float(retry_after)
+        if headers.get("x-ratelimit-remaining") == "0":
+            reset_at = self._int_header(headers, "x-ratelimit-reset")
+            if reset_at is not None:
+                return max(1.0, reset_at - time.time())
+        return self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+
+    @staticmethod
+    def _int_header(headers: Dict[str, str], name: str) -> Optional[int]:
+        try:
+            return int(headers[name])
+        except (KeyError, ValueError):
+            return None
+
+    async def paginate(self, path: str, params: Optional[Dict[str, Any]] = None,
+                       max_pages: Optional[int] = None) -> List[Any]:
+        """抓取所有分頁：先取第一頁得知總頁數，其餘分頁同時抓取"""
+        params = dict(params or {})
+        params.setdefault("per_page", PER_PAGE)
+        first, headers = await self.request(path, {**params, "page": 1})
+        items = list(first or [])
+        match = LINK_LAST_PAGE.search(headers.get("link", ""))
+        last_page = int(match.group(1)) if match else 1
+        if max_pages:
+            last_page = min(last_page, max_pages)
+        if last_page > 1:
+            pages = await gather_all([self.request(path, {**params, "page": page})
+                                       for page in range(2, last_page + 1)])
+            for page_items, _ in pages:
+                items.extend(page_items or [])
+        return items
+
+    async def fetch_issues(self, repo: str, since: Optional[str] = None,
+                           max_pages: Optional[int] = None, sort: str = "created",
+                           direction: str = "desc") -> List[Dict[str, Any]]:
+        """抓取儲存庫所有 Issues（含 PR），可只抓取 since 之後更新的項目"""
+        params = {"state": "all", "sort": sort, "direction": direction}
+        if since:
+            params["since"] = since
+        return await self.paginate(f"/repos/{repo}/issues", params, max_pages)
+
+    async def fetch_issue_comments(self, repo: str, numbers: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """同時抓取多個 Issue 的留言"""
+        results = await gather_all([self.paginate(f"/repos/{repo}/issues/{number}/comments")
+                                     for number in numbers])
+        return dict(zip(numbers, results))
+
+    async def fetch_issue_timelines(self, repo: str, numbers: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """同時抓取多個 Issue 的時間軸事件（含 cross-referenced 等交叉引用）"""
+        results = await gather_all([self.paginate(f"/repos/{repo}/issues/{number}/timeline")
+                                     for number in numbers])
+        return dict(zip(numbers, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以非同步客戶端抓取 GitHub Issues（檢查連線與速率限制用）")
+    parser.add_argument("--repo", default=os.getenv("GITHUB_REPOSITORY", "Tsaitung/PRD-and-Development-Roadmap"),
+                        help="儲存庫（owner/name）")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="GitHub API 位址（可指向本機假伺服器）")
+    parser.add_argument("--connections", type=int, default=8, help="連線池大小")
+    parser.add_argument("--rate", type=float, default=10.0, help="額度充足時每秒最多請求數")
+    parser.add_argument("--max-pages", type=int, help="最多抓取的分頁數")
+    parser.add_argument("--comments", action="store_true", help="同時抓取每個 Issue 的留言")
+    args = parser.parse_args()
+
+    async def run():
+        async with GitHubClient(os.getenv("GITHUB_TOKEN"), args.api_url, args.connections,
+                                rate=args.rate) as client:
+            issues = await client.fetch_issues(args.repo, max_pages=args.max_pages)
+            print(f"{args.repo}: {len(issues)} 個 Issues")
+            if args.comments:
+                comments = await client.fetch_issue_comments(args.repo, [issue["number"] for issue in issues])
+                print(f"留言: {sum(len(items) for items in comments.values())} 則")
+
+    try:
+        asyncio.run(run())
+    except GitHubAPIError as e:
+        print(f"GitHub API 錯誤: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
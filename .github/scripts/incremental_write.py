@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+增量輸出工具
+報告檔案在忽略時間戳等易變內容後與現有檔案相同時不重寫
+"""
+
+import os
+from pathlib import Path
+from typing import Optional, Pattern
+
+from instrumentation import metrics
+
+
+def normalize(content: str, volatile: Optional[Pattern] = None) -> str:
+    """移除易變內容（例如生成時間）後用於比較"""
+    return volatile.sub("", content) if volatile else content
+
+
+def write_if_changed(path: Path, content: str, volatile: Optional[Pattern] = None) -> bool:
+    """內容（忽略易變部分）與現有檔案不同時才寫入，以暫存檔原子取代，回傳是否有寫入"""
+    path = Path(path)
+    try:
+        existing = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        existing = None
+
+    if existing is not None and normalize(existing, volatile) == normalize(content, volatile):
+        metrics.count("files_unchanged")
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with metrics.timer("write"):
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+    metrics.count("files_written")
+    metrics.count("bytes_written", len(content.encode("utf-8")))
+    return True
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+狀態腳本共用的量測工具
+記錄各階段耗時（檔案走訪、讀取、正規表示式檢查、子程序、JSON 寫入）與計數器，
+並可選擇啟用 cProfile / tracemalloc，結果寫入輸出目錄下的 metrics/<腳本>.json
+"""
+
+import io
+import os
+import json
+import time
+import threading
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any
+
+
+class PipelineMetrics:
+    """單一腳本執行期間的量測資料"""
+
+    def __init__(self, script: str = "pipeline"):
+        self.script = script
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.timers: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self._profiler = None
+        self._trace_memory = False
+
+    def configure(self, script: str):
+        """設定腳本名稱並重設開始時間"""
+        self.script = script
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def timer(self, stage: str):
+        """累計某階段的耗時與呼叫次數"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.timers.setdefault(stage, {"seconds": 0.0, "calls": 0})
+                entry["seconds"] += elapsed
+                entry["calls"] += 1
+
+    def count(self, counter: str, amount: int = 1):
+        """累加計數器"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def read_text(self, path: Path, encoding: str = 'utf-8') -> str:
+        """讀取文字檔並記錄讀取次數與位元組數"""
+        with self.timer("read"):
+            data = Path(path).read_bytes()
+        self.count("files_read")
+        self.count("bytes_read", len(data))
+        return data.decode(encoding)
+
+    def run(self, *args, **kwargs) -> subprocess.CompletedProcess:
+        """執行子程序並記錄耗時"""
+        self.count("subprocess_calls")
+        with self.timer("subprocess"):
+            return subprocess.run(*args, **kwargs)
+
+    def dump_json(self, obj: Any, path: Path, **kwargs):
+        """寫入 JSON 檔並記錄耗時與大小"""
+        kwargs.setdefault("ensure_ascii", False)
+        kwargs.setdefault("indent", 2)
+        with self.timer("json_write"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, **kwargs)
+        self.count("json_files_written")
+        self.count("bytes_written", os.path.getsize(path))
+
+    def start_profiling(self, cpu: bool = False, memory: bool = False):
+        """啟用 cProfile 與 / 或 tracemalloc"""
+        if cpu and self._profiler is None:
+            # cProfile / pstats 只在啟用分析時載入，避免拖慢一般執行的啟動時間
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._trace_memory = True
+
+    def _profile_summary(self, output_dir: Path) -> Dict[str, Any]:
+        """停止分析並整理結果"""
+        summary = {}
+        if self._profiler is not None:
+            import pstats
+            self._profiler.disable()
+            prof_file = output_dir / f"{self.script}.prof"
+            self._profiler.dump_stats(str(prof_file))
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+            summary["cprofile"] = {"stats_file": str(prof_file), "top": stream.getvalue().splitlines()}
+            self._profiler = None
+        if self._trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            summary["tracemalloc"] = {
+                "current_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "top": [str(stat) for stat in snapshot.statistics("lineno")[:10]]
+            }
+            self._trace_memory = False
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉為可序列化的字典"""
+        return {
+            "script": self.script,
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self._start, 6),
+            "timers": {
+                stage: {"seconds": round(entry["seconds"], 6), "calls": entry["calls"]}
+                for stage, entry in sorted(self.timers.items())
+            },
+            "counters": dict(sorted(self.counters.items()))
+        }
+
+    def save(self, output_dir) -> Path:
+        """寫入 <output_dir>/metrics/<腳本>.json"""
+        metrics_dir = Path(output_dir) / "metrics"
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        data = self.to_dict()
+        data.update(self._profile_summary(metrics_dir))
+        metrics_file = metrics_dir / f"{self.script}.json"
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return metrics_file
+
+
+def add_profiling_arguments(parser):
+    """加入共用的分析參數"""
+    parser.add_argument("--profile", action="store_true",
+                        help="啟用 cProfile（亦可設定環境變數 PIPELINE_PROFILE=1）")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="啟用 tracemalloc（亦可設定環境變數 PIPELINE_TRACE_MEMORY=1）")
+
+
+def start_from_args(script: str, args=None):
+    """依命令列參數或環境變數設定量測"""
+    metrics.configure(script)
+    cpu = bool(getattr(args, "profile", False)) or os.getenv("PIPELINE_PROFILE") == "1"
+    memory = bool(getattr(args, "trace_memory", False)) or os.getenv("PIPELINE_TRACE_MEMORY") == "1"
+    metrics.start_profiling(cpu=cpu, memory=memory)
+
+
+# 各腳本共用的量測實例
+metrics = PipelineMetrics()
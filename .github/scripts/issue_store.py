@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+本機 Issue 儲存
+保存上次同步後的 Issues，以及從留言與交叉引用（cross-referenced 時間軸事件，例如關聯的 PR）
+提取的 FR-ID；每次同步只抓取 since 之後更新的 Issue，並同時抓取其留言與時間軸
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from instrumentation import metrics
+from fr_grammar import find_fr_ids
+from github_client import DEFAULT_API_URL, PER_PAGE, GitHubAPIError, GitHubClient, gather_all
+
+# 儲存格式版本，格式改變時遞增（舊資料會整個重新同步）
+STORE_VERSION = 1
+
+# 同步起點往前保留的時間，避免時鐘誤差漏掉邊界上更新的 Issue
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# 保存在儲存中的 Issue 欄位
+ISSUE_FIELDS = ("number", "title", "body", "state", "labels", "created_at", "updated_at", "comments")
+
+
+def linked_references(timeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """從時間軸取出交叉引用的 Issue / PR"""
+    linked = []
+    for event in timeline:
+        if event.get("event") != "cross-referenced":
+            continue
+        source = (event.get("source") or {}).get("issue") or {}
+        if not source.get("number"):
+            continue
+        linked.append({
+            "number": source["number"],
+            "title": source.get("title", ""),
+            "type": "pull_request" if "pull_request" in source else "issue",
+            "state": source.get("state"),
+            "fr_ids": find_fr_ids(source.get("title"), source.get("body"))
+        })
+    return linked
+
+
+class IssueStore:
+    """以 JSON 檔保存的 Issue 儲存（issues.json，依 Issue 編號索引）"""
+
+    def __init__(self, store_dir: str = "temp/issue_store"):
+        self.store_dir = Path(store_dir)
+        self.path = self.store_dir / "issues.json"
+        self.data = self.load()
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STORE_VERSION:
+                return data
+            print(f"Issue 儲存格式版本不同，將重新同步: {self.path}")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Issue 儲存無法讀取，將重新同步: {e}")
+        return {"version": STORE_VERSION, "repo": None, "last_sync": None, "issues": {}}
+
+    def save(self):
+        """以暫存檔原子取代"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+
+    @property
+    def last_sync(self) -> Optional[str]:
+        return self.data.get("last_sync")
+
+    def issues(self) -> List[Dict[str, Any]]:
+        """所有 Issue，依建立時間由新到舊（與 API 排序相同）"""
+        return sorted(self.data["issues"].values(), key=lambda issue: issue.get("created_at", ""), reverse=True)
+
+    async def sync(self, client: GitHubClient, repo: str, full: bool = False,
+                   max_pages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """同步 since 之後更新的 Issue 與其留言、時間軸，回傳本次更新的 Issue"""
+        if self.data.get("repo") != repo:
+            self.data = {"version": STORE_VERSION, "repo": repo, "last_sync": None, "issues": {}}
+        since = None if full else self.last_sync
+        started = datetime.now(timezone.utc)
+
+        with metrics.timer("issue_sync"):
+            # 依更新時間由舊到新抓取：分頁上限截斷時，未抓取的都是更新時間較晚的 Issue
+            updated = await client.fetch_issues(repo, since=since, max_pages=max_pages,
+                                                sort="updated", direction="asc")
+            with_comments = [issue["number"] for issue in updated if issue.get("comments")]
+            comments, timelines = await gather_all([
+                client.fetch_issue_comments(repo, with_comments),
+                client.fetch_issue_timelines(repo, [issue["number"] for issue in updated])
+            ])
+
+        for issue in updated:
+            number = issue["number"]
+            record = {field: issue.get(field) for field in ISSUE_FIELDS}
+            record["labels"] = [{"name": label["name"]} for label in issue.get("labels", [])]
+            record["comment_fr_ids"] = find_fr_ids(*(comment.get("body") for comment in comments.get(number, [])))
+            record["linked"] = linked_references(timelines.get(number, []))
+            self.data["issues"][str(number)] = record
+        metrics.count("issues_synced", len(updated))
+
+        if not max_pages or len(updated) < max_pages * PER_PAGE:
+            self.data["last_sync"] = (started - SYNC_OVERLAP).strftime("%Y-%m-%dT%H:%M:%SZ")
+        else:
+            # 可能還有分頁未抓取：下次從已收到的最晚更新時間繼續，不跳過截斷的 Issue
+            self.data["last_sync"] = max(issue["updated_at"] for issue in updated)
+            print(f"已達分頁上限 {max_pages}，下次同步從 {self.data['last_sync']} 繼續")
+        self.save()
+        return updated
+
+
+def extra_fr_ids(issue: Dict[str, Any]) -> List[str]:
+    """留言與交叉引用中提到的 FR-ID"""
+    fr_ids = dict.fromkeys(issue.get("comment_fr_ids", []))
+    for linked in issue.get("linked", []):
+        fr_ids.update(dict.fromkeys(linked.get("fr_ids", [])))
+    return list(fr_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量同步 Issues、留言與交叉引用到本機儲存")
+    parser.add_argument("--store", default="temp/issue_store", help="儲存目錄")
+    parser.add_argument("--repo", default=os.getenv("GITHUB_REPOSITORY", "Tsaitung/PRD-and-Development-Roadmap"),
+                        help="儲存庫（owner/name）")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL, help="GitHub API 位址")
+    parser.add_argument("--connections", type=int, default=8, help="連線池大小")
+    parser.add_argument("--max-pages", type=int, help="最多抓取的分頁數（截斷時下次同步會接續）")
+    parser.add_argument("--full", action="store_true", help="忽略上次同步時間，重新同步全部")
+    args = parser.parse_args()
+
+    store = IssueStore(args.store)
+
+    async def run():
+        async with GitHubClient(os.getenv("GITHUB_TOKEN"), args.api_url, args.connections) as client:
+            return await store.sync(client, args.repo, args.full, args.max_pages)
+
+    try:
+        updated = asyncio.run(run())
+    except GitHubAPIError as e:
+        print(f"同步失敗: {e}")
+        return 1
+    linked = sum(len(issue.get("linked", [])) for issue in store.issues())
+    print(f"已同步 {len(updated)} 個更新的 Issue（共 {len(store.data['issues'])} 個，{linked} 個交叉引用），"
+          f"下次從 {store.last_sync} 開始")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+PRD / 路線圖管線的 Prometheus 匯出器
+讀取 temp/ 下各階段的輸出，轉為 Prometheus 文字格式並以快取快照提供抓取
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value: Any) -> str:
+    """跳脫標籤值中的特殊字元"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRenderer:
+    """將管線輸出轉為 Prometheus 文字格式
+
+    樣本依指標名稱分組保存，輸出時每個指標的 HELP / TYPE 與所有樣本連續排列
+    （文字格式要求同一指標的樣本不可與其他指標交錯）。
+    """
+
+    def __init__(self):
+        # 指標名稱 → (說明, 類型, 樣本行)，依宣告順序輸出
+        self.families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+    def declare(self, name: str, help_text: str, metric_type: str = "gauge"):
+        """宣告指標（每個指標一次）"""
+        if name not in self.families:
+            self.families[name] = (help_text, metric_type, [])
+
+    def sample(self, name: str, value: Any, labels: Optional[Dict[str, Any]] = None):
+        """加入單一樣本（指標須先宣告）"""
+        value_text = str(value) if isinstance(value, int) else repr(float(value))
+        if labels:
+            label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+            line = f"{name}{{{label_text}}} {value_text}"
+        else:
+            line = f"{name} {value_text}"
+        self.families[name][2].append(line)
+
+    def render(self) -> bytes:
+        lines = []
+        for name, (help_text, metric_type, samples) in self.families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class PipelineExporter:
+    """管理資料來源與快取快照"""
+
+    def __init__(self, temp_dir: str = "temp", validation_file: Optional[str] = None):
+        self.temp_dir = Path(temp_dir)
+        self.sources = {
+            "prd": self.temp_dir / "prd_status.json",
+            "test": self.temp_dir / "test_coverage.json",
+            "issue": self.temp_dir / "issue_status.json",
+            "validation": Path(validation_file) if validation_file else self.temp_dir / "prd_validation.json"
+        }
+        self.metrics_dir = self.temp_dir / "metrics"
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._snapshot = b""
+        self.snapshot_time = 0.0
+
+    def source_signature(self) -> Tuple:
+        """以各來源檔案的修改時間與大小判斷是否需要重建快照"""
+        paths = list(self.sources.values())
+        if self.metrics_dir.exists():
+            paths.extend(sorted(self.metrics_dir.glob("*.json")))
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def load_json(self, path: Path) -> Dict[str, Any]:
+        """讀取 JSON，不存在或格式錯誤時回傳空字典"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def render_prd(self, out: MetricsRenderer, prd: Dict[str, Any]):
+        """FR 狀態統計"""
+        if not prd:
+            return
+        out.declare("roadmap_frs", "依狀態統計的 FR 數量")
+        for status in ["completed", "draft", "in_progress", "not_started", "error"]:
+            out.sample("roadmap_frs", prd.get(f"{status}_fr_ids", 0), {"status": status})
+
+        out.declare("roadmap_module_submodules", "各模組依 PRD 狀態統計的子模組數量")
+        for module_name, module_info in prd.get("modules", {}).items():
+            counts: Dict[str, int] = {}
+            for submodule in module_info.get("submodules", []):
+                status = submodule.get("status", "🔴 未開始")
+                counts[status] = counts.get(status, 0) + 1
+            for status, count in sorted(counts.items()):
+                out.sample("roadmap_module_submodules", count, {"module": module_name, "status": status})
+
+    def render_tests(self, out: MetricsRenderer, test: Dict[str, Any]):
+        """測試結果與覆蓋率"""
+        if not test:
+            return
+        out.declare("roadmap_test_cases", "測試案例數量")
+        out.declare("roadmap_test_coverage_percent", "測試覆蓋率")
+        for suite in ["unit_tests", "integration_tests"]:
+            suite_data = test.get(suite, {})
+            suite_name = suite.replace("_tests", "")
+            for result in ["passed", "failed"]:
+                out.sample("roadmap_test_cases", suite_data.get(result, 0),
+                           {"suite": suite_name, "result": result})
+            out.sample("roadmap_test_coverage_percent", suite_data.get("coverage", 0), {"suite": suite_name})
+
+        out.declare("roadmap_fr_test_coverage_percent", "各 FR 的測試覆蓋率")
+        for fr_id, data in sorted(test.get("fr_coverage", {}).items()):
+            out.sample("roadmap_fr_test_coverage_percent", data.get("coverage", 0), {"fr_id": fr_id})
+
+    def render_issues(self, out: MetricsRenderer, issue: Dict[str, Any]):
+        """Issue 統計"""
+        if not issue:
+            return
+        out.declare("roadmap_issues", "依狀態統計的 Issue 數量")
+        out.sample("roadmap_issues", issue.get("open_issues", 0), {"state": "open"})
+        out.sample("roadmap_issues", issue.get("closed_issues", 0), {"state": "closed"})
+
+        out.declare("roadmap_issues_by_type", "依類型統計的 Issue 數量")
+        for issue_type, count in sorted(issue.get("issues_by_status", {}).items()):
+            out.sample("roadmap_issues_by_type", count, {"type": issue_type})
+
+        out.declare("roadmap_fr_issues", "各 FR 關聯的 Issue 數量")
+        for fr_id, data in sorted(issue.get("issues_by_fr", {}).items()):
+            out.sample("roadmap_fr_issues", data.get("open", 0), {"fr_id": fr_id, "state": "open"})
+            out.sample("roadmap_fr_issues", data.get("closed", 0), {"fr_id": fr_id, "state": "closed"})
+
+    def render_validation(self, out: MetricsRenderer, validation: Dict[str, Any]):
+        """PRD 驗證結果"""
+        summary = validation.get("summary")
+        if not summary:
+            return
+        out.declare("roadmap_prd_validation_files", "PRD 驗證檔案數量")
+        out.sample("roadmap_prd_validation_files", summary.get("passed_files", 0), {"result": "passed"})
+        out.sample("roadmap_prd_validation_files", summary.get("failed_files", 0), {"result": "failed"})
+        out.declare("roadmap_prd_validation_average_score", "PRD 驗證平均分數")
+        out.sample("roadmap_prd_validation_average_score", summary.get("average_score", 0))
+
+        out.declare("roadmap_prd_validation_errors", "依檢查項目統計的失敗檔案數")
+        for check_name, files in sorted(validation.get("errors_by_type", {}).items()):
+            out.sample("roadmap_prd_validation_errors", len(files), {"check": check_name})
+
+    def render_stage_metrics(self, out: MetricsRenderer):
+        """各腳本的階段耗時與計數器（來自 instrumentation）"""
+        if not self.metrics_dir.exists():
+            return
+        out.declare("roadmap_pipeline_run_seconds", "腳本總執行時間")
+        out.declare("roadmap_pipeline_stage_seconds", "腳本各階段累計耗時")
+        out.declare("roadmap_pipeline_counter", "腳本計數器")
+        for metrics_file in sorted(self.metrics_dir.glob("*.json")):
+            data = self.load_json(metrics_file)
+            script = data.get("script", metrics_file.stem)
+            out.sample("roadmap_pipeline_run_seconds", data.get("total_seconds", 0), {"script": script})
+            for stage, entry in data.get("timers", {}).items():
+                out.sample("roadmap_pipeline_stage_seconds", entry.get("seconds", 0),
+                           {"script": script, "stage": stage})
+            for counter, value in data.get("counters", {}).items():
+                out.sample("roadmap_pipeline_counter", value, {"script": script, "counter": counter})
+
+    def build_snapshot(self) -> bytes:
+        """重新讀取來源並產生快照"""
+        out = MetricsRenderer()
+        self.render_prd(out, self.load_json(self.sources["prd"]))
+        self.render_tests(out, self.load_json(self.sources["test"]))
+        self.render_issues(out, self.load_json(self.sources["issue"]))
+        self.render_validation(out, self.load_json(self.sources["validation"]))
+        self.render_stage_metrics(out)
+
+        out.declare("roadmap_exporter_snapshot_timestamp_seconds", "快照建立時間")
+        out.sample("roadmap_exporter_snapshot_timestamp_seconds", round(time.time(), 3))
+        return out.render()
+
+    def refresh(self, force: bool = False) -> bool:
+        """來源變更時重建快照，回傳是否有重建"""
+        signature = self.source_signature()
+        if not force and signature == self._signature:
+            return False
+        snapshot = self.build_snapshot()
+        with self._lock:
+            self._snapshot = snapshot
+            self._signature = signature
+            self.snapshot_time = time.time()
+        return True
+
+    def snapshot(self) -> bytes:
+        """取得目前快照（抓取時不重新計算）"""
+        with self._lock:
+            return self._snapshot
+
+    def start_refresher(self, interval: float) -> threading.Thread:
+        """背景執行緒定期檢查來源是否變更"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.refresh():
+                        print(f"快照已更新 ({time.strftime('%H:%M:%S')})")
+                except Exception as e:
+                    print(f"更新快照時發生錯誤: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+
+def make_handler(exporter: PipelineExporter):
+    """建立只回傳快取快照的 HTTP 處理器"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = exporter.snapshot()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以 Prometheus 格式匯出 PRD/路線圖管線指標")
+    parser.add_argument("--temp-dir", default="temp", help="管線輸出目錄")
+    parser.add_argument("--validation", help="validate_prd.py --output json 的輸出檔（預設 temp/prd_validation.json）")
+    parser.add_argument("--host", default="0.0.0.0", help="監聽位址")
+    parser.add_argument("--port", type=int, default=9108, help="監聽埠號")
+    parser.add_argument("--refresh", type=float, default=15.0, help="檢查來源變更的間隔（秒）")
+    parser.add_argument("--once", action="store_true", help="僅輸出一次指標後結束")
+    args = parser.parse_args()
+
+    exporter = PipelineExporter(args.temp_dir, args.validation)
+    exporter.refresh(force=True)
+
+    if args.once:
+        sys.stdout.write(exporter.snapshot().decode("utf-8"))
+        return 0
+
+    exporter.start_refresher(args.refresh)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(exporter))
+    print(f"指標服務已啟動: http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n停止服務")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
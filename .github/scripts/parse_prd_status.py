@@ -9,16 +9,41 @@ import re
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from file_scan import DEFAULT_MAX_FILE_BYTES, FileTooLargeError, search_first
+from snapshot import add_snapshot_arguments, export_stage
+from fr_grammar import FR_ID_PATTERN, FR_HEADING_PATTERN
+from stage_cache import add_cache_arguments, cache_from_args, run_stage
 
 class PRDParser:
-    def __init__(self):
-        self.prd_dir = Path("PRD")
-        self.fr_pattern = re.compile(r'FR-\d{3}')
+    def __init__(self, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES, root: str = "."):
+        self.prd_dir = Path(root) / "PRD"
+        self.max_file_bytes = max_file_bytes
+        self.fr_pattern = FR_ID_PATTERN
         self.status_pattern = re.compile(r'(📝 草稿|✅ 完成|🟡 開發中|🔴 未開始|⚠️ 有問題)')
+        self.abbr_pattern = re.compile(r'\[([A-Z]{2,3}-[A-Z]{2,3})\]')
+        self.owner_pattern = re.compile(r'[-*][ \t]*\*\*負責人\*\*[ \t]*[:：][ \t]*(.+)')
+        self.fr_heading_pattern = FR_HEADING_PATTERN
+        self.fr_status_pattern = re.compile(r'\*\*狀態\*\*\s*[:：]\s*(.+)')
         
     def parse_prd_files(self) -> Dict[str, Any]:
         """解析所有 PRD 文件"""
+        modules = {}
+        
+        if not self.prd_dir.exists():
+            print(f"PRD 目錄不存在: {self.prd_dir}")
+            return self.summarize_modules(modules)
+            
+        for module_dir in sorted(self.prd_dir.iterdir()):
+            if module_dir.is_dir():
+                modules[module_dir.name] = self.parse_module(module_dir)
+        
+        return self.summarize_modules(modules)
+    
+    def summarize_modules(self, modules: Dict[str, Any]) -> Dict[str, Any]:
+        """彙總各模組結果並統計各狀態的 FR-ID 數量"""
         results = {
             "modules": {},
             "total_fr_ids": 0,
@@ -29,94 +54,120 @@ class PRDParser:
             "error_fr_ids": 0
         }
         
-        if not self.prd_dir.exists():
-            print(f"PRD 目錄不存在: {self.prd_dir}")
-            return results
+        for module_name, module_results in modules.items():
+            results["modules"][module_name] = module_results
             
-        for module_dir in sorted(self.prd_dir.iterdir()):
-            if module_dir.is_dir():
-                module_name = module_dir.name
-                module_results = self.parse_module(module_dir)
-                results["modules"][module_name] = module_results
+            for submodule in module_results["submodules"]:
+                results["total_fr_ids"] += 1
+                status = submodule.get("status", "🔴 未開始")
                 
-                # 統計各狀態的 FR-ID 數量
-                for submodule in module_results["submodules"]:
-                    results["total_fr_ids"] += 1
-                    status = submodule.get("status", "🔴 未開始")
-                    
-                    if "完成" in status:
-                        results["completed_fr_ids"] += 1
-                    elif "草稿" in status:
-                        results["draft_fr_ids"] += 1
-                    elif "開發中" in status:
-                        results["in_progress_fr_ids"] += 1
-                    elif "有問題" in status:
-                        results["error_fr_ids"] += 1
-                    else:
-                        results["not_started_fr_ids"] += 1
+                if "完成" in status:
+                    results["completed_fr_ids"] += 1
+                elif "草稿" in status:
+                    results["draft_fr_ids"] += 1
+                elif "開發中" in status:
+                    results["in_progress_fr_ids"] += 1
+                elif "有問題" in status:
+                    results["error_fr_ids"] += 1
+                else:
+                    results["not_started_fr_ids"] += 1
         
         return results
     
+    def is_prd_file(self, prd_file: Path) -> bool:
+        """判斷是否為需要解析的 PRD 文件"""
+        return not ("README" in prd_file.name or "template" in prd_file.name.lower())
+    
     def parse_module(self, module_dir: Path) -> Dict[str, Any]:
         """解析單一模組目錄"""
-        module_name = module_dir.name
-        module_info = {
-            "name": module_name,
-            "submodules": [],
-            "total_submodules": 0,
-            "completed_submodules": 0
-        }
+        submodules = []
         
         # 尋找 PRD 文件
-        prd_files = list(module_dir.glob("**/*.md"))
+        with metrics.timer("walk"):
+            prd_files = list(module_dir.glob("**/*.md"))
+        metrics.count("files_scanned", len(prd_files))
         
         for prd_file in prd_files:
-            if "README" in prd_file.name or "template" in prd_file.name.lower():
+            if not self.is_prd_file(prd_file):
                 continue
                 
             submodule_info = self.parse_prd_file(prd_file)
             if submodule_info:
-                module_info["submodules"].append(submodule_info)
-                module_info["total_submodules"] += 1
-                
-                if submodule_info.get("status") == "✅ 完成":
-                    module_info["completed_submodules"] += 1
+                submodules.append(submodule_info)
         
-        return module_info
+        return self.build_module_info(module_dir.name, submodules)
+    
+    def build_module_info(self, module_name: str, submodules: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """由子模組解析結果建立模組資訊"""
+        return {
+            "name": module_name,
+            "submodules": submodules,
+            "total_submodules": len(submodules),
+            "completed_submodules": sum(1 for sub in submodules if sub.get("status") == "✅ 完成")
+        }
     
     def parse_prd_file(self, prd_file: Path) -> Dict[str, Any]:
         """解析單一 PRD 文件"""
         try:
-            content = prd_file.read_text(encoding='utf-8')
+            # 逐行掃描，FR-ID、狀態、模組縮寫與負責人都找到後即停止讀取
+            with metrics.timer("regex"):
+                matches = search_first(prd_file, {
+                    "fr_id": self.fr_pattern,
+                    "status": self.status_pattern,
+                    "module_abbr": self.abbr_pattern,
+                    "owner": self.owner_pattern
+                }, self.max_file_bytes)
             
             # 提取 FR-ID
-            fr_match = self.fr_pattern.search(content)
-            fr_id = fr_match.group() if fr_match else None
+            fr_id = matches["fr_id"].group() if matches["fr_id"] else None
             
             # 提取狀態
-            status_match = self.status_pattern.search(content)
-            status = status_match.group() if status_match else "🔴 未開始"
+            status = matches["status"].group() if matches["status"] else "🔴 未開始"
             
             # 提取模組縮寫
-            module_abbr = self.extract_module_abbr(content)
+            module_abbr = matches["module_abbr"].group(1) if matches["module_abbr"] else ""
+            
+            # 提取負責人
+            owner = matches["owner"].group(1).strip() if matches["owner"] else ""
             
             return {
                 "file_path": str(prd_file),
                 "fr_id": fr_id,
                 "status": status,
                 "module_abbr": module_abbr,
+                "owner": owner,
                 "last_modified": prd_file.stat().st_mtime
             }
             
+        except FileTooLargeError as e:
+            print(f"略過文件: {e}")
+            return None
         except Exception as e:
             print(f"解析文件時發生錯誤 {prd_file}: {e}")
             return None
     
+    def extract_fr_entries(self, content: str) -> List[Dict[str, Any]]:
+        """提取文件中每個 FR 標題的 FR-ID、名稱、行號與區塊內的狀態標記"""
+        headings = list(self.fr_heading_pattern.finditer(content))
+        entries = []
+        line, last = 1, 0
+        for i, match in enumerate(headings):
+            line += content.count('\n', last, match.start())
+            last = match.start()
+            block_end = headings[i + 1].start() if i + 1 < len(headings) else len(content)
+            status_match = self.fr_status_pattern.search(content, match.end(), block_end)
+            entries.append({
+                "fr_id": match.group(1),
+                "title": match.group(2).strip(),
+                "status": status_match.group(1).strip() if status_match else "",
+                "line": line
+            })
+        return entries
+    
     def extract_module_abbr(self, content: str) -> str:
         """提取模組縮寫"""
         # 尋找 [XXX-YYY] 格式的縮寫
-        abbr_pattern = re.compile(r'\[([A-Z]{2,3}-[A-Z]{2,3})\]')
-        match = abbr_pattern.search(content)
+        match = self.abbr_pattern.search(content)
         return match.group(1) if match else ""
     
     def generate_fr_ids_list(self, results: Dict[str, Any]) -> List[str]:
@@ -130,28 +181,41 @@ class PRDParser:
         
         return sorted(fr_ids)
 
+def save_results(prd_parser: PRDParser, results: Dict[str, Any], output_dir: Path,
+                 snapshot: Optional[str] = None, write_json: bool = True) -> List[str]:
+    """寫入 prd_status.json 與 fr_ids.json（及快照區段），回傳 FR-ID 列表"""
+    fr_ids = prd_parser.generate_fr_ids_list(results)
+    
+    export_stage(
+        {"prd_status": results, "fr_ids": fr_ids},
+        {"prd_status": output_dir / "prd_status.json", "fr_ids": output_dir / "fr_ids.json"},
+        snapshot, write_json
+    )
+    
+    return fr_ids
+
 def main():
     parser = argparse.ArgumentParser(description="解析 PRD 文件狀態")
     parser.add_argument("--output", default="temp", help="輸出目錄")
+    parser.add_argument("--max-file-size", type=int, default=DEFAULT_MAX_FILE_BYTES,
+                        help="單一 PRD 文件大小上限（位元組，0 表示不限制）")
+    add_snapshot_arguments(parser)
+    add_cache_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_from_args("parse_prd_status", args)
     
     # 建立輸出目錄
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # 解析 PRD 文件
-    prd_parser = PRDParser()
-    results = prd_parser.parse_prd_files()
-    
-    # 生成 FR-ID 列表
-    fr_ids = prd_parser.generate_fr_ids_list(results)
-    
-    # 寫入結果
-    with open(output_dir / "prd_status.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    prd_parser = PRDParser(args.max_file_size)
+    results = run_stage(cache_from_args(args), "prd_status", "parse_prd_status", [prd_parser.prd_dir],
+                        prd_parser.parse_prd_files, {"max_file_bytes": args.max_file_size})
     
-    with open(output_dir / "fr_ids.json", "w", encoding="utf-8") as f:
-        json.dump(fr_ids, f, ensure_ascii=False, indent=2)
+    # 生成 FR-ID 列表並寫入結果
+    save_results(prd_parser, results, output_dir, args.snapshot, not args.no_json)
     
     print(f"解析完成！")
     print(f"總 FR-ID 數量: {results['total_fr_ids']}")
@@ -160,6 +224,7 @@ def main():
     print(f"開發中: {results['in_progress_fr_ids']}")
     print(f"未開始: {results['not_started_fr_ids']}")
     print(f"有問題: {results['error_fr_ids']}")
+    print(f"量測結果: {metrics.save(output_dir)}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
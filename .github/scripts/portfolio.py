@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+多儲存庫彙總腳本
+以多個工作程序平行分析多個產品儲存庫（PRD 狀態、程式碼狀態、FR-ID 測試覆蓋），
+每個儲存庫依 git HEAD 快取結果，最後合併為單一組合層級的 MPM 與儀表板數據
+"""
+
+import sys
+import json
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from parse_prd_status import PRDParser
+from check_code_status import CodeStatusChecker
+from run_tests import TestRunner
+from update_mpm import MPMUpdater
+from stage_cache import hash_inputs, script_version
+
+# 快取格式版本，格式改變時遞增（分析程式碼的變更由 script_version 偵測）
+CACHE_VERSION = 1
+
+
+def repo_name(root: Path) -> str:
+    """儲存庫顯示名稱（目錄名稱）"""
+    return root.resolve().name
+
+
+def repo_path_hash(root: Path) -> str:
+    """儲存庫絕對路徑的短雜湊，用於區分同名的儲存庫"""
+    return hashlib.sha256(str(root.resolve()).encode("utf-8")).hexdigest()[:8]
+
+
+def repo_revision(root: Path) -> Optional[str]:
+    """以 HEAD 與未提交變更組成快取鍵；非 git 儲存庫回傳 None（不快取）
+
+    未提交變更以內容雜湊：已追蹤檔案取 git diff HEAD，未追蹤檔案取檔案內容，
+    同一個檔案再次修改時快取鍵也會改變。
+    """
+    paths = ["PRD", "src", "tests"]
+    try:
+        head = subprocess.run(["git", "-C", str(root), "rev-parse", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+        diff = subprocess.run(["git", "-C", str(root), "diff", "HEAD", "--binary", "--", *paths],
+                              capture_output=True, check=True).stdout
+        untracked = subprocess.run(["git", "-C", str(root), "ls-files", "--others", "--exclude-standard",
+                                    "-z", "--", *paths],
+                                   capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    if not diff and not untracked:
+        return head
+    digest = hashlib.sha256(diff)
+    untracked_files = [root / name for name in untracked.decode("utf-8").split("\0") if name]
+    digest.update(hash_inputs(untracked_files).encode("ascii"))
+    return f"{head}-{digest.hexdigest()[:12]}"
+
+
+def analyze_repo(root: str, cache_dir: str) -> Dict[str, Any]:
+    """分析單一儲存庫（在工作程序中執行），HEAD 未變時直接使用快取"""
+    root_path = Path(root)
+    name = repo_name(root_path)
+    revision = repo_revision(root_path)
+    cache_file = Path(cache_dir) / f"{name}-{repo_path_hash(root_path)}.json"
+    version = script_version("portfolio")
+
+    if revision and cache_file.exists():
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if (cached.get("revision") == revision and cached.get("cache_version") == CACHE_VERSION
+                    and cached.get("script_version") == version):
+                cached["cached"] = True
+                return cached
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    result = {
+        "cache_version": CACHE_VERSION,
+        "script_version": version,
+        "name": name,
+        "root": str(root_path),
+        "revision": revision,
+        "analyzed_at": datetime.now().isoformat(),
+        "prd": PRDParser(root=root).parse_prd_files(),
+        "code": CodeStatusChecker(root).check_code_status(),
+        "test": {"fr_coverage": TestRunner(root).analyze_fr_coverage()}
+    }
+
+    if revision:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+    result["cached"] = False
+    return result
+
+
+class PortfolioAggregator:
+    """合併多個儲存庫的分析結果"""
+
+    def __init__(self, repos: List[str], cache_dir: str = "temp/portfolio/cache", workers: int = 4):
+        self.repos = repos
+        self.cache_dir = cache_dir
+        self.workers = workers
+
+    def analyze(self) -> List[Dict[str, Any]]:
+        """平行分析所有儲存庫，結果依輸入順序排列"""
+        if self.workers <= 1 or len(self.repos) <= 1:
+            results = [analyze_repo(repo, self.cache_dir) for repo in self.repos]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(analyze_repo, self.repos, [self.cache_dir] * len(self.repos)))
+        self.assign_names(results)
+        return results
+    
+    def assign_names(self, repo_results: List[Dict[str, Any]]):
+        """目錄名稱相同的儲存庫（例如 /a/app 與 /b/app）附加路徑雜湊，避免合併時互相覆蓋"""
+        names = [repo_name(Path(result["root"])) for result in repo_results]
+        for result, name in zip(repo_results, names):
+            if names.count(name) > 1:
+                name = f"{name}-{repo_path_hash(Path(result['root']))}"
+            result["name"] = name
+
+    def merge(self, repo_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """合併為 MPMUpdater 可使用的數據，模組與 FR-ID 以 <儲存庫>/ 為前綴避免衝突"""
+        names = [result["name"] for result in repo_results]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"儲存庫名稱重複: {', '.join(duplicates)}")
+        
+        modules = {}
+        code = {"modules": {}, "total_modules": 0, "modules_with_code": 0, "modules_without_code": 0}
+        fr_coverage = {}
+
+        for result in repo_results:
+            name = result["name"]
+            for module_name, module_info in result["prd"].get("modules", {}).items():
+                modules[f"{name}/{module_name}"] = module_info
+            for module_name, module_info in result["code"].get("modules", {}).items():
+                code["modules"][f"{name}/{module_name}"] = module_info
+            for key in ("total_modules", "modules_with_code", "modules_without_code"):
+                code[key] += result["code"].get(key, 0)
+            for fr_id, coverage in result["test"].get("fr_coverage", {}).items():
+                fr_coverage[f"{name}/{fr_id}"] = coverage
+
+        return {
+            "prd": PRDParser().summarize_modules(modules),
+            "code": code,
+            "test": {"fr_coverage": fr_coverage},
+            "issue": {}
+        }
+
+    def generate_repo_table(self, repo_results: List[Dict[str, Any]], updater: MPMUpdater) -> str:
+        """各儲存庫進度摘要表"""
+        lines = [
+            "## 🗂️ 儲存庫進度",
+            "",
+            "| 儲存庫 | 模組數 | 子模組數 | 完成 | 開發中 | 草稿 | 有程式碼模組 | 整體進度 | 版本 |",
+            "|--------|--------|----------|------|--------|------|--------------|----------|------|"
+        ]
+        for result in repo_results:
+            prd = result["prd"]
+            progress = updater.calculate_progress({"prd": prd})
+            revision = (result["revision"] or "-")[:12]
+            lines.append(
+                f"| {result['name']} | {len(prd.get('modules', {}))} | {prd.get('total_fr_ids', 0)} | "
+                f"{prd.get('completed_fr_ids', 0)} | {prd.get('in_progress_fr_ids', 0)} | "
+                f"{prd.get('draft_fr_ids', 0)} | {result['code'].get('modules_with_code', 0)} | "
+                f"{progress['overall_progress']}% | {revision} |"
+            )
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平行分析多個儲存庫並產生組合層級的 MPM 與儀表板")
+    parser.add_argument("repos", nargs="*", help="儲存庫根目錄")
+    parser.add_argument("--repos-file", help="列出儲存庫根目錄的檔案（每行一個，# 開頭為註解）")
+    parser.add_argument("--workers", type=int, default=4, help="工作程序數量")
+    parser.add_argument("--cache-dir", default="temp/portfolio/cache", help="各儲存庫結果快取目錄")
+    parser.add_argument("--output", default="temp/portfolio", help="輸出目錄")
+    parser.add_argument("--mpm", default="docs/Portfolio_Module_Progress_Matrix.md", help="組合 MPM 輸出檔案")
+    parser.add_argument("--dashboard", help="同時產生儀表板到此目錄（需要 matplotlib）")
+    args = parser.parse_args()
+
+    repos = list(args.repos)
+    if args.repos_file:
+        with open(args.repos_file, "r", encoding="utf-8") as f:
+            repos.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not repos:
+        parser.error("請指定至少一個儲存庫")
+    resolved = [Path(repo).resolve() for repo in repos]
+    if len(set(resolved)) != len(resolved):
+        parser.error("同一個儲存庫指定了多次")
+
+    missing = [repo for repo in repos if not (Path(repo) / "PRD").exists()]
+    if missing:
+        print(f"找不到 PRD 目錄的儲存庫: {', '.join(missing)}")
+        return 1
+
+    aggregator = PortfolioAggregator(repos, args.cache_dir, args.workers)
+    repo_results = aggregator.analyze()
+    for result in repo_results:
+        source = "快取" if result["cached"] else "分析"
+        print(f"{result['name']}: {result['prd'].get('total_fr_ids', 0)} 個子模組（{source}）")
+
+    data = aggregator.merge(repo_results)
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # 組合 MPM：使用預設模板並附加各儲存庫摘要
+    updater = MPMUpdater()
+    updater.mpm_template_path = None
+    updater.output_path = Path(args.mpm)
+    content = updater.update_mpm(data)
+    content = content.replace("## 📈 進度統計", aggregator.generate_repo_table(repo_results, updater) + "\n\n## 📈 進度統計", 1)
+    updater.save_mpm(content)
+
+    mpm_data = updater.build_mpm_data(data)
+    mpm_data["repositories"] = [
+        {"name": result["name"], "root": result["root"], "revision": result["revision"]}
+        for result in repo_results
+    ]
+    with open(output_dir / "mpm_data.json", "w", encoding="utf-8") as f:
+        json.dump(mpm_data, f, ensure_ascii=False, indent=2)
+    print(f"組合數據已寫入: {output_dir / 'mpm_data.json'}")
+
+    if args.dashboard:
+        from generate_dashboard import DashboardGenerator
+        generator = DashboardGenerator()
+        generator.output_dir = Path(args.dashboard)
+        generator.output_dir.mkdir(parents=True, exist_ok=True)
+        generator.generate_dashboard(mpm_data)
+        print(f"儀表板已生成到: {generator.output_dir}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
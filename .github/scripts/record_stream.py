@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+串流 JSON 記錄檔（JSON Lines + 索引頁尾）
+大型輸出（例如 code_status）不必先在記憶體中組出完整結果再一次 json.dump：
+每個模組產生後立即寫成一行記錄，最後一行是頁尾（各記錄的位元組位移索引與彙總數字）。
+讀取端可以逐行串流、依索引直接跳到單一記錄，記憶體用量不隨儲存庫大小成長
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from instrumentation import metrics
+
+STREAM_FORMAT = "record-stream"
+STREAM_VERSION = 1
+
+# 從檔尾往前尋找頁尾時每次讀取的大小
+TAIL_CHUNK = 64 * 1024
+
+
+class RecordStreamError(ValueError):
+    """檔案不是有效的記錄串流（格式、版本不符或缺少頁尾）"""
+
+
+def _encode_line(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class RecordStreamWriter:
+    """逐筆寫入記錄，關閉時寫入索引頁尾；以暫存檔寫入，完成後原子取代目標檔"""
+
+    def __init__(self, path, kind: str):
+        self.path = Path(path)
+        self.kind = kind
+        self.index: Dict[str, int] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._offset = 0
+        self._write({"format": STREAM_FORMAT, "version": STREAM_VERSION, "kind": kind})
+
+    def _write(self, obj: Any):
+        line = _encode_line(obj)
+        self._file.write(line)
+        self._offset += len(line)
+
+    def write(self, key: str, record: Any):
+        """寫入一筆記錄（同一個鍵只能寫入一次）"""
+        if key in self.index:
+            raise ValueError(f"重複的記錄鍵: {key}")
+        self.index[key] = self._offset
+        self._write({"key": key, "record": record})
+        metrics.count("stream_records_written")
+
+    def close(self, summary: Optional[Dict[str, Any]] = None):
+        """寫入頁尾並取代目標檔"""
+        with metrics.timer("json_write"):
+            self._write({"footer": {"records": len(self.index), "index": self.index, "summary": summary or {}}})
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+        metrics.count("json_files_written")
+        metrics.count("bytes_written", self._offset)
+
+    def abort(self):
+        """放棄寫入（保留原本的目標檔）"""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif not self._file.closed:
+            self.close()
+
+
+class RecordStreamReader:
+    """讀取記錄串流：開啟時只讀取首行與頁尾，記錄在需要時才解碼"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self.header = json.loads(f.readline())
+            except json.JSONDecodeError as e:
+                raise RecordStreamError(f"{self.path} 不是記錄串流: {e}")
+            if self.header.get("format") != STREAM_FORMAT:
+                raise RecordStreamError(f"{self.path} 不是記錄串流")
+            if self.header.get("version") != STREAM_VERSION:
+                raise RecordStreamError(f"不支援的記錄串流版本: {self.header.get('version')}")
+            self.footer = self._read_footer(f)
+
+    def _read_footer(self, f) -> Dict[str, Any]:
+        """從檔尾往前讀到倒數第二個換行，取出最後一行的頁尾"""
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        tail = b""
+        while position > 0:
+            step = min(TAIL_CHUNK, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+            if tail.count(b"\n") >= 2:
+                break
+        line = tail.rstrip(b"\n").rsplit(b"\n", 1)[-1]
+        try:
+            footer = json.loads(line).get("footer")
+        except json.JSONDecodeError:
+            footer = None
+        if footer is None:
+            raise RecordStreamError(f"{self.path} 缺少頁尾（寫入未完成？）")
+        return footer
+
+    @property
+    def kind(self) -> str:
+        return self.header.get("kind")
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return self.footer.get("summary", {})
+
+    @property
+    def index(self) -> Dict[str, int]:
+        return self.footer.get("index", {})
+
+    def __len__(self) -> int:
+        return self.footer.get("records", 0)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def iter_records(self) -> Iterator[Tuple[str, Any]]:
+        """依寫入順序逐筆產生 (鍵, 記錄)，一次只解碼一行"""
+        with metrics.timer("json_read"):
+            with open(self.path, "rb") as f:
+                f.readline()
+                for line in f:
+                    entry = json.loads(line)
+                    if "footer" in entry:
+                        break
+                    yield entry["key"], entry["record"]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """依索引直接讀取單一記錄"""
+        offset = self.index.get(key)
+        if offset is None:
+            return default
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["record"]
+
+    def records(self) -> "LazyRecords":
+        """以唯讀對應表呈現所有記錄（迭代時串流讀取，不保留已讀的記錄）"""
+        return LazyRecords(self)
+
+    def load(self, records_key: str = "modules") -> Dict[str, Any]:
+        """還原為與原本 JSON 輸出相同形狀的字典（記錄部分為 LazyRecords）"""
+        data = {records_key: self.records()}
+        data.update(self.summary)
+        return data
+
+
+class LazyRecords(Mapping):
+    """記錄串流的唯讀對應表：items() / values() 逐行串流，單一鍵依索引讀取"""
+
+    def __init__(self, reader: RecordStreamReader):
+        self.reader = reader
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.reader:
+            raise KeyError(key)
+        return self.reader.get(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.reader.index)
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def items(self):
+        return self.reader.iter_records()
+
+    def values(self):
+        return (record for _, record in self.reader.iter_records())
+
+
+def is_record_stream(path) -> bool:
+    """檔案是否為記錄串流（只檢查首行）"""
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.readline()).get("format") == STREAM_FORMAT
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def load_json_or_stream(path, records_key: str = "modules") -> Dict[str, Any]:
+    """讀取一般 JSON 檔或記錄串流，回傳相同形狀的字典"""
+    if is_record_stream(path):
+        return RecordStreamReader(path).load(records_key)
+    with metrics.timer("json_read"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def iter_json_or_stream(path, records_key: str = "modules") -> Iterator[Tuple[str, Any]]:
+    """逐筆產生記錄：記錄串流以串流讀取，一般 JSON 檔則取出 records_key 對應表"""
+    if is_record_stream(path):
+        return RecordStreamReader(path).iter_records()
+    return iter(load_json_or_stream(path, records_key).get(records_key, {}).items())
+
+
+def write_records(path, kind: str, data: Dict[str, Any], records_key: str = "modules"):
+    """將已在記憶體中的結果寫成記錄串流（例如快取命中時）"""
+    with RecordStreamWriter(path, kind) as writer:
+        for key, record in data.get(records_key, {}).items():
+            writer.write(key, record)
+        writer.close({k: v for k, v in data.items() if k != records_key})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="檢視記錄串流或轉換為一般 JSON")
+    parser.add_argument("path", help="記錄串流檔案（.jsonl）")
+    parser.add_argument("--key", help="只輸出單一記錄")
+    parser.add_argument("--to-json", help="轉換為一般 JSON 檔（與原本的輸出格式相同）")
+    args = parser.parse_args()
+
+    try:
+        reader = RecordStreamReader(args.path)
+    except (OSError, RecordStreamError) as e:
+        print(f"無法讀取記錄串流: {e}")
+        return 1
+
+    if args.key:
+        if args.key not in reader:
+            print(f"沒有記錄: {args.key}")
+            return 1
+        json.dump(reader.get(args.key), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    if args.to_json:
+        data = reader.load()
+        data["modules"] = dict(data["modules"].items())
+        with open(args.to_json, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"已轉換: {args.to_json}")
+        return 0
+
+    print(f"記錄串流: {reader.path} ({reader.kind}，{len(reader)} 筆記錄)")
+    for key, value in reader.summary.items():
+        print(f"  {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+路線圖查詢服務
+一次載入 PRD / 程式碼 / 測試 / Issue 的整合模型，依模組、狀態、FR-ID 與負責人建立索引，
+以唯讀 HTTP/JSON 介面回答篩選查詢，並在來源檔案變更時自動重新載入
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit, unquote
+
+from parse_prd_status import PRDParser
+from file_scan import scan_fr_ids_in_files
+from fr_grammar import normalize_fr_id
+from status_history import status_key
+from record_stream import iter_json_or_stream
+
+# 可建立索引的欄位
+INDEXED_FIELDS = ("module", "status", "owner", "fr_id")
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "y")
+
+
+class RoadmapModel:
+    """整合模型：每個 FR 一筆紀錄，並建立各欄位的反向索引"""
+
+    def __init__(self, records: List[Dict[str, Any]], loaded_at: float, build_ms: float):
+        self.records = records
+        self.loaded_at = loaded_at
+        self.build_ms = build_ms
+        self.indexes: Dict[str, Dict[str, Set[int]]] = {field: {} for field in INDEXED_FIELDS}
+        for position, record in enumerate(records):
+            for field in INDEXED_FIELDS:
+                for key in self.index_keys(field, record):
+                    self.indexes[field].setdefault(key, set()).add(position)
+
+    @staticmethod
+    def index_keys(field: str, record: Dict[str, Any]) -> List[str]:
+        """欄位的索引鍵（不分大小寫）；模組可用完整目錄名稱或模組代碼查詢"""
+        if field == "module":
+            keys = [record["module"], record["module_code"], record["submodule"], record["module_abbr"]]
+        elif field == "status":
+            keys = [record["status"]]
+        elif field == "owner":
+            keys = [record["owner"]]
+        else:
+            keys = [record["fr_id"]]
+        return [key.lower() for key in keys if key]
+
+    def lookup(self, field: str, value: str) -> Set[int]:
+        if field == "fr_id":
+            value = normalize_fr_id(value) or value
+        return self.indexes[field].get(value.lower(), set())
+
+    def query(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        """以索引取交集後再套用其他條件"""
+        candidates: Optional[Set[int]] = None
+        for field in INDEXED_FIELDS:
+            if field in params:
+                matched = set()
+                for value in params[field].split(","):
+                    matched |= self.lookup(field, value.strip())
+                candidates = matched if candidates is None else candidates & matched
+
+        positions = sorted(candidates) if candidates is not None else range(len(self.records))
+        results = []
+        for position in positions:
+            record = self.records[position]
+            if "has_tests" in params and parse_bool(params["has_tests"]) != (record["test_count"] > 0):
+                continue
+            if "has_code" in params and parse_bool(params["has_code"]) != record["has_code"]:
+                continue
+            if "has_open_bugs" in params and parse_bool(params["has_open_bugs"]) != (record["open_bugs"] > 0):
+                continue
+            if "min_open_issues" in params and record["open_issues"] < int(params["min_open_issues"]):
+                continue
+            if "q" in params and params["q"].lower() not in record["title"].lower():
+                continue
+            results.append(record)
+        return results
+
+    def modules_summary(self) -> Dict[str, Dict[str, int]]:
+        """各模組依狀態統計的 FR 數量"""
+        summary: Dict[str, Dict[str, int]] = {}
+        for record in self.records:
+            counts = summary.setdefault(record["module"], {"total": 0})
+            counts["total"] += 1
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+        return dict(sorted(summary.items()))
+
+
+class RoadmapIndex:
+    """管理模型的載入與熱重載"""
+
+    def __init__(self, prd_dir: str = "PRD", tests_dir: str = "tests", temp_dir: str = "temp"):
+        self.prd_dir = Path(prd_dir)
+        self.tests_dir = Path(tests_dir)
+        self.temp_dir = Path(temp_dir)
+        self.parser = PRDParser()
+        self.parser.prd_dir = self.prd_dir
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._model = RoadmapModel([], 0.0, 0.0)
+
+    def source_files(self) -> Dict[str, List[Path]]:
+        """PRD 文件、測試檔案與管線輸出"""
+        prd_files, test_files = [], []
+        for root in (self.prd_dir, self.tests_dir):
+            if not root.exists():
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                current = Path(dirpath)
+                in_tests = root == self.tests_dir or "tests" in current.relative_to(root).parts
+                for filename in filenames:
+                    file_path = current / filename
+                    if in_tests:
+                        test_files.append(file_path)
+                    elif filename.endswith(".md") and self.parser.is_prd_file(file_path):
+                        prd_files.append(file_path)
+        outputs = [self.temp_dir / "code_status.jsonl", self.temp_dir / "code_status.json",
+                   self.temp_dir / "issue_status.json"]
+        return {"prd": sorted(prd_files), "test": sorted(test_files), "output": outputs}
+
+    def signature(self, sources: Dict[str, List[Path]]) -> Tuple:
+        """以各檔案的修改時間與大小判斷是否需要重新載入"""
+        signature = []
+        for paths in sources.values():
+            for path in paths:
+                try:
+                    stat = path.stat()
+                    signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    signature.append((str(path), None, None))
+        return tuple(signature)
+
+    def load_json(self, path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def iter_code_modules(self):
+        """逐一讀取程式碼狀態的模組（優先使用 code_status.jsonl 記錄串流）"""
+        for path in (self.temp_dir / "code_status.jsonl", self.temp_dir / "code_status.json"):
+            if path.exists():
+                try:
+                    yield from iter_json_or_stream(path)
+                except (OSError, ValueError):
+                    pass
+                return
+
+    def build(self, sources: Dict[str, List[Path]]) -> RoadmapModel:
+        """由來源檔案建立整合模型"""
+        start = time.perf_counter()
+
+        # 測試引用：FR-ID → 測試檔案
+        tests_by_fr: Dict[str, Set[str]] = {}
+        for hit in scan_fr_ids_in_files(sources["test"]):
+            tests_by_fr.setdefault(hit.fr_id, set()).add(hit.path)
+
+        # 程式碼：PRD 文件 → 程式碼檔案
+        code_by_file: Dict[str, List[str]] = {}
+        for _, module_info in self.iter_code_modules():
+            for submodule in module_info.get("submodules", []):
+                code_by_file[submodule.get("file_path", "")] = submodule.get("code_files", [])
+
+        issues_by_fr = self.load_json(self.temp_dir / "issue_status.json").get("issues_by_fr", {})
+
+        records = []
+        for prd_file in sources["prd"]:
+            try:
+                content = prd_file.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"讀取文件時發生錯誤 {prd_file}: {e}")
+                continue
+            parts = prd_file.relative_to(self.prd_dir).parts
+            module = parts[0] if len(parts) > 1 else ""
+            module_code = module.split("-")[1] if module.count("-") >= 1 else module
+            owner_match = self.parser.owner_pattern.search(content)
+            owner = owner_match.group(1).strip() if owner_match else ""
+            doc_status_match = self.parser.status_pattern.search(content)
+            doc_status = doc_status_match.group() if doc_status_match else "🔴 未開始"
+            module_abbr = self.parser.extract_module_abbr(content)
+            code_files = code_by_file.get(str(prd_file), [])
+
+            for entry in self.parser.extract_fr_entries(content):
+                fr_id = entry["fr_id"]
+                status_text = entry["status"] or doc_status
+                issues = issues_by_fr.get(fr_id, {})
+                open_bugs = sum(1 for issue in issues.get("issues", [])
+                                if issue.get("state") == "open" and issue.get("type") == "bug")
+                tests = sorted(tests_by_fr.get(fr_id, ()))
+                records.append({
+                    "fr_id": fr_id,
+                    "title": entry["title"],
+                    "module": module,
+                    "module_code": module_code,
+                    "submodule": prd_file.parent.name if len(parts) > 2 else "",
+                    "module_abbr": module_abbr,
+                    "status": status_key(status_text),
+                    "status_text": status_text,
+                    "owner": owner,
+                    "file": str(prd_file),
+                    "line": entry["line"],
+                    "tests": tests,
+                    "test_count": len(tests),
+                    "has_code": bool(code_files),
+                    "code_files": code_files,
+                    "open_issues": issues.get("open", 0),
+                    "closed_issues": issues.get("closed", 0),
+                    "open_bugs": open_bugs
+                })
+
+        build_ms = (time.perf_counter() - start) * 1000
+        return RoadmapModel(records, time.time(), build_ms)
+
+    def refresh(self, force: bool = False) -> bool:
+        """來源變更時重建模型，回傳是否有重建"""
+        sources = self.source_files()
+        signature = self.signature(sources)
+        if not force and signature == self._signature:
+            return False
+        model = self.build(sources)
+        with self._lock:
+            self._model = model
+            self._signature = signature
+        return True
+
+    @property
+    def model(self) -> RoadmapModel:
+        with self._lock:
+            return self._model
+
+    def start_refresher(self, interval: float) -> threading.Thread:
+        """背景執行緒定期檢查來源是否變更"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.refresh():
+                        model = self.model
+                        print(f"模型已重新載入: {len(model.records)} 個 FR（{model.build_ms:.0f}ms）")
+                except Exception as e:
+                    print(f"重新載入模型時發生錯誤: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+
+def handle_request(index: RoadmapIndex, path: str, query: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+    """處理查詢，回傳 (HTTP 狀態碼, 回應內容)"""
+    start = time.perf_counter()
+    model = index.model
+
+    if path in ("/", "/health"):
+        body = {"records": len(model.records), "loaded_at": model.loaded_at, "build_ms": round(model.build_ms, 1)}
+    elif path == "/frs":
+        try:
+            results = model.query(query)
+            limit = int(query.get("limit", 0) or 0)
+        except ValueError as e:
+            return 400, {"error": f"查詢參數錯誤: {e}"}
+        body = {"count": len(results), "results": results[:limit] if limit > 0 else results}
+    elif path.startswith("/frs/"):
+        fr_id = unquote(path[len("/frs/"):])
+        matches = [model.records[position] for position in sorted(model.lookup("fr_id", fr_id))]
+        if not matches:
+            return 404, {"error": f"找不到 FR-ID: {fr_id}"}
+        body = {"count": len(matches), "results": matches}
+    elif path == "/modules":
+        body = {"modules": model.modules_summary()}
+    elif path == "/owners":
+        owners: Dict[str, int] = {}
+        for record in model.records:
+            owners[record["owner"]] = owners.get(record["owner"], 0) + 1
+        body = {"owners": dict(sorted(owners.items()))}
+    else:
+        return 404, {"error": f"未知的路徑: {path}"}
+
+    body["took_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return 200, body
+
+
+def make_handler(index: RoadmapIndex):
+    """建立唯讀 HTTP 處理器"""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            # http.server 以 latin-1 解碼請求行，未編碼的中文參數需還原為 UTF-8
+            url = urlsplit(self.path.encode("latin-1").decode("utf-8", "replace"))
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, body = handle_request(index, url.path.rstrip("/") or "/", query)
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="路線圖唯讀查詢服務")
+    parser.add_argument("--prd-dir", default="PRD", help="PRD 目錄")
+    parser.add_argument("--tests-dir", default="tests", help="專案測試目錄")
+    parser.add_argument("--temp-dir", default="temp", help="管線輸出目錄（code_status.json、issue_status.json）")
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址")
+    parser.add_argument("--port", type=int, default=9110, help="監聽埠號")
+    parser.add_argument("--refresh", type=float, default=2.0, help="檢查來源變更的間隔（秒）")
+    parser.add_argument("--query", help="不啟動服務，直接執行一次查詢（例如 'module=WMS&status=in_progress&has_tests=false'）")
+    args = parser.parse_args()
+
+    index = RoadmapIndex(args.prd_dir, args.tests_dir, args.temp_dir)
+    index.refresh(force=True)
+    model = index.model
+    print(f"已載入 {len(model.records)} 個 FR（{model.build_ms:.0f}ms）", file=sys.stderr)
+
+    if args.query is not None:
+        url = urlsplit(args.query if args.query.startswith("/") else "/frs?" + args.query)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status, body = handle_request(index, url.path, query)
+        json.dump(body, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0 if status == 200 else 1
+
+    index.start_refresher(args.refresh)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(index))
+    print(f"查詢服務已啟動: http://{args.host}:{args.port}/frs")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n停止服務")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
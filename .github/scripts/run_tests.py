@@ -4,20 +4,46 @@
 分析測試結果和覆蓋率數據
 """
 
-import os
 import re
 import json
 import sys
 import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from snapshot import add_snapshot_arguments, export_stage
+from file_scan import scan_fr_ids_in_files
+from stage_cache import StageCache, add_cache_arguments, cache_from_args, run_stage
+
+# 單元測試執行器：名稱 → 設定檔（存在時才執行）
+UNIT_TEST_RUNNERS = {
+    "npm": "package.json",
+    "python": "requirements.txt",
+    "java": "pom.xml"
+}
+
+# 每個執行器的預設逾時（秒）
+DEFAULT_RUNNER_TIMEOUT = 600
+
+# 執行器狀態：完成的結果才列入合併的總數與覆蓋率
+RUNNER_COMPLETED = "completed"
+RUNNER_FAILED = "failed"
+RUNNER_TIMEOUT = "timeout"
+RUNNER_ERROR = "error"
 
 class TestRunner:
-    def __init__(self):
-        self.test_dir = Path("tests")
-        self.src_dir = Path("src")
+    def __init__(self, root: str = ".", runner_timeout: float = DEFAULT_RUNNER_TIMEOUT,
+                 cache: Optional[StageCache] = None):
+        self.root = Path(root)
+        self.runner_timeout = runner_timeout
+        # 只快取 FR-ID 覆蓋率分析；測試本身每次都執行（結果可能因逾時等暫時性因素而不同）
+        self.cache = cache
+        self.test_dir = Path(root) / "tests"
+        self.src_dir = Path(root) / "src"
         self.output_dir = Path("temp")
         self.output_dir.mkdir(exist_ok=True)
         
@@ -53,8 +79,9 @@ class TestRunner:
         integration_results = self.run_integration_tests()
         results["integration_tests"].update(integration_results)
         
-        # 分析 FR-ID 覆蓋率
-        fr_coverage = self.analyze_fr_coverage()
+        # 分析 FR-ID 覆蓋率（只依測試檔案內容，可快取）
+        fr_coverage = run_stage(self.cache, "test_fr_coverage", "run_tests", [self.test_dir],
+                                self.analyze_fr_coverage)
         results["fr_coverage"] = fr_coverage
         
         # 分析模組覆蓋率
@@ -63,33 +90,94 @@ class TestRunner:
         
         return results
     
+    def detect_unit_test_runners(self) -> List[str]:
+        """依設定檔（package.json、requirements.txt、pom.xml）找出需要執行的測試工具"""
+        return [name for name, config in UNIT_TEST_RUNNERS.items() if (self.root / config).exists()]
+    
     def run_unit_tests(self) -> Dict[str, Any]:
-        """執行單元測試"""
+        """執行單元測試：各測試工具同時執行，完成一個合併一個"""
         print("執行單元測試...")
         
-        # 檢查是否有 package.json (Node.js 專案)
-        if Path("package.json").exists():
-            return self.run_npm_tests()
+        runners = self.detect_unit_test_runners()
+        if not runners:
+            print("未找到測試配置檔案，使用模擬數據")
+            return self.get_mock_test_results("unit")
         
-        # 檢查是否有 requirements.txt (Python 專案)
-        elif Path("requirements.txt").exists():
-            return self.run_python_tests()
+        run_methods = {
+            "npm": self.run_npm_tests,
+            "python": self.run_python_tests,
+            "java": self.run_java_tests
+        }
+        runner_results = {}
+        with metrics.timer("unit_tests"):
+            with ThreadPoolExecutor(max_workers=len(runners)) as executor:
+                futures = {executor.submit(self.run_timed, run_methods[name]): name for name in runners}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    result = runner_results[name] = future.result()
+                    if result["status"] == RUNNER_COMPLETED:
+                        print(f"{name} 測試完成: {result['passed']}/{result['total']} 通過（{result['duration']}s）")
+                    else:
+                        print(f"{name} 測試未完成（{result['status']}，{result['duration']}s），不列入結果")
         
-        # 檢查是否有 pom.xml (Java 專案)
-        elif Path("pom.xml").exists():
-            return self.run_java_tests()
+        return self.merge_runner_results({name: runner_results[name] for name in runners})
+    
+    def run_timed(self, run_method) -> Dict[str, Any]:
+        """執行單一測試工具並記錄耗時"""
+        start = datetime.now()
+        result = run_method()
+        result["duration"] = round((datetime.now() - start).total_seconds(), 2)
+        return result
+    
+    def runner_failure(self, status: str) -> Dict[str, Any]:
+        """未完成的測試工具（輸出無法解析、逾時或無法執行）：只記錄狀態，不含測試數字"""
+        return {"status": status, "total": 0, "passed": 0, "failed": 0, "coverage": 0}
+    
+    def parsed_or_failure(self, name: str, result: subprocess.CompletedProcess,
+                          parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """有測試失敗時工具也會以非零結束碼結束，只要輸出可解析出測試數字仍視為完成"""
+        if result.returncode != 0 and parsed["total"] == 0:
+            print(f"{name} 執行失敗: {result.stderr}")
+            return self.runner_failure(RUNNER_FAILED)
+        return parsed
+    
+    def merge_runner_results(self, runner_results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """合併各測試工具的結果，覆蓋率依測試數量加權平均
+
+        只有完成的工具列入總數與覆蓋率；失敗或逾時的工具保留在 runners 中並標示狀態。
+        沒有任何工具完成時沿用原本的做法，改用模擬數據。
+        """
+        completed = [result for result in runner_results.values() if result["status"] == RUNNER_COMPLETED]
+        if len(runner_results) == 1 and completed:
+            return completed[0]
+        if not completed:
+            print("沒有測試工具成功完成，使用模擬數據")
+            merged = self.get_mock_test_results("unit")
+            merged["runners"] = runner_results
+            return merged
         
+        merged = {
+            "total": sum(result["total"] for result in completed),
+            "passed": sum(result["passed"] for result in completed),
+            "failed": sum(result["failed"] for result in completed),
+            "coverage": 0,
+            "runners": runner_results
+        }
+        if merged["total"] > 0:
+            merged["coverage"] = round(sum(result["coverage"] * result["total"]
+                                           for result in completed) / merged["total"], 1)
         else:
-            print("未找到測試配置檔案，使用模擬數據")
-            return self.get_mock_test_results("unit")
+            merged["coverage"] = round(sum(result["coverage"] for result in completed) / len(completed), 1)
+        return merged
     
     def run_integration_tests(self) -> Dict[str, Any]:
         """執行整合測試"""
         print("執行整合測試...")
         
         # 檢查是否有整合測試配置
-        integration_test_files = list(self.test_dir.glob("**/*integration*"))
-        integration_test_files.extend(list(self.test_dir.glob("**/*e2e*")))
+        with metrics.timer("walk"):
+            integration_test_files = list(self.test_dir.glob("**/*integration*"))
+            integration_test_files.extend(list(self.test_dir.glob("**/*e2e*")))
         
         if integration_test_files:
             return self.run_integration_test_files(integration_test_files)
@@ -101,71 +189,76 @@ class TestRunner:
         """執行 npm 測試"""
         try:
             # 執行 npm test
-            result = subprocess.run(
+            result = metrics.run(
                 ["npm", "test", "--", "--coverage", "--json"],
                 capture_output=True,
                 text=True,
-                cwd=os.getcwd()
+                cwd=str(self.root),
+                timeout=self.runner_timeout
             )
             
-            if result.returncode == 0:
-                # 解析測試結果
+            # 解析測試結果（有測試失敗時 jest 仍輸出 JSON）
+            try:
                 test_data = json.loads(result.stdout)
-                return self.parse_npm_test_results(test_data)
-            else:
+            except json.JSONDecodeError:
                 print(f"npm 測試執行失敗: {result.stderr}")
-                return self.get_mock_test_results("unit")
+                return self.runner_failure(RUNNER_FAILED)
+            return self.parse_npm_test_results(test_data)
                 
+        except subprocess.TimeoutExpired:
+            print(f"npm 測試逾時（{self.runner_timeout}s）")
+            return self.runner_failure(RUNNER_TIMEOUT)
         except Exception as e:
             print(f"執行 npm 測試時發生錯誤: {e}")
-            return self.get_mock_test_results("unit")
+            return self.runner_failure(RUNNER_ERROR)
     
     def run_python_tests(self) -> Dict[str, Any]:
         """執行 Python 測試"""
         try:
             # 執行 pytest
-            result = subprocess.run(
+            result = metrics.run(
                 ["pytest", "--cov=src", "--cov-report=json", "--json-report"],
                 capture_output=True,
                 text=True,
-                cwd=os.getcwd()
+                cwd=str(self.root),
+                timeout=self.runner_timeout
             )
             
-            if result.returncode == 0:
-                # 解析測試結果
-                return self.parse_python_test_results(result.stdout)
-            else:
-                print(f"pytest 執行失敗: {result.stderr}")
-                return self.get_mock_test_results("unit")
+            # 解析測試結果
+            return self.parsed_or_failure("pytest", result, self.parse_python_test_results(result.stdout))
                 
+        except subprocess.TimeoutExpired:
+            print(f"pytest 逾時（{self.runner_timeout}s）")
+            return self.runner_failure(RUNNER_TIMEOUT)
         except Exception as e:
             print(f"執行 Python 測試時發生錯誤: {e}")
-            return self.get_mock_test_results("unit")
+            return self.runner_failure(RUNNER_ERROR)
     
     def run_java_tests(self) -> Dict[str, Any]:
         """執行 Java 測試"""
         try:
             # 執行 Maven 測試
-            result = subprocess.run(
+            result = metrics.run(
                 ["mvn", "test", "jacoco:report"],
                 capture_output=True,
                 text=True,
-                cwd=os.getcwd()
+                cwd=str(self.root),
+                timeout=self.runner_timeout
             )
             
-            if result.returncode == 0:
-                return self.parse_java_test_results(result.stdout)
-            else:
-                print(f"Maven 測試執行失敗: {result.stderr}")
-                return self.get_mock_test_results("unit")
+            return self.parsed_or_failure("Maven 測試", result, self.parse_java_test_results(result.stdout))
                 
+        except subprocess.TimeoutExpired:
+            print(f"Maven 測試逾時（{self.runner_timeout}s）")
+            return self.runner_failure(RUNNER_TIMEOUT)
         except Exception as e:
             print(f"執行 Java 測試時發生錯誤: {e}")
-            return self.get_mock_test_results("unit")
+            return self.runner_failure(RUNNER_ERROR)
     
     def parse_npm_test_results(self, test_data: Dict[str, Any]) -> Dict[str, Any]:
         """解析 npm 測試結果"""
         return {
+            "status": RUNNER_COMPLETED,
             "total": test_data.get("numTotalTests", 0),
             "passed": test_data.get("numPassedTests", 0),
             "failed": test_data.get("numFailedTests", 0),
@@ -182,13 +275,13 @@ class TestRunner:
         coverage = 0
         
         for line in lines:
-            if "passed" in line and "failed" in line:
-                # 解析測試統計
-                match = re.search(r'(\d+) passed.*?(\d+) failed', line)
-                if match:
-                    passed = int(match.group(1))
-                    failed = int(match.group(2))
-                    total = passed + failed
+            # 解析測試統計（例如 "1 failed, 5 passed in 0.12s"，順序與項目依結果而定）
+            counts = dict((word, int(number)) for number, word in
+                          re.findall(r'(\d+) (passed|failed|errors?)\b', line))
+            if "passed" in counts or "failed" in counts:
+                passed = counts.get("passed", 0)
+                failed = counts.get("failed", 0) + counts.get("error", 0) + counts.get("errors", 0)
+                total = passed + failed
             
             if "TOTAL" in line and "%" in line:
                 # 解析覆蓋率
@@ -197,6 +290,7 @@ class TestRunner:
                     coverage = int(match.group(1))
         
         return {
+            "status": RUNNER_COMPLETED,
             "total": total,
             "passed": passed,
             "failed": failed,
@@ -212,15 +306,16 @@ class TestRunner:
         failed = 0
         
         for line in lines:
+            # 每個測試類別各有一行，最後一行是整體結果
             if "Tests run:" in line:
-                match = re.search(r'Tests run: (\d+), Failures: (\d+)', line)
+                match = re.search(r'Tests run: (\d+), Failures: (\d+), Errors: (\d+)', line)
                 if match:
                     total = int(match.group(1))
-                    failed = int(match.group(2))
+                    failed = int(match.group(2)) + int(match.group(3))
                     passed = total - failed
-                break
         
         return {
+            "status": RUNNER_COMPLETED,
             "total": total,
             "passed": passed,
             "failed": failed,
@@ -232,26 +327,24 @@ class TestRunner:
         fr_coverage = {}
         
         # 掃描測試檔案
-        test_files = list(self.test_dir.glob("**/*.spec.js"))
-        test_files.extend(list(self.test_dir.glob("**/*.test.js")))
-        test_files.extend(list(self.test_dir.glob("**/*_test.py")))
-        test_files.extend(list(self.test_dir.glob("**/*Test.java")))
+        with metrics.timer("walk"):
+            test_files = list(self.test_dir.glob("**/*.spec.js"))
+            test_files.extend(list(self.test_dir.glob("**/*.test.js")))
+            test_files.extend(list(self.test_dir.glob("**/*_test.py")))
+            test_files.extend(list(self.test_dir.glob("**/*Test.java")))
+        metrics.count("files_scanned", len(test_files))
         
-        for test_file in test_files:
-            content = test_file.read_text(encoding='utf-8')
+        # 以位元組層級掃描 FR-ID（不解碼整個檔案）
+        for hit in scan_fr_ids_in_files(test_files):
+            if hit.fr_id not in fr_coverage:
+                fr_coverage[hit.fr_id] = {
+                    "test_files": [],
+                    "coverage": 0,
+                    "status": "missing"
+                }
             
-            # 尋找 FR-ID
-            fr_matches = re.findall(r'FR-\d{3}', content)
-            for fr_id in fr_matches:
-                if fr_id not in fr_coverage:
-                    fr_coverage[fr_id] = {
-                        "test_files": [],
-                        "coverage": 0,
-                        "status": "missing"
-                    }
-                
-                fr_coverage[fr_id]["test_files"].append(str(test_file))
-                fr_coverage[fr_id]["status"] = "covered"
+            fr_coverage[hit.fr_id]["test_files"].append(hit.path)
+            fr_coverage[hit.fr_id]["status"] = "covered"
         
         # 計算覆蓋率
         for fr_id, data in fr_coverage.items():
@@ -304,11 +397,11 @@ class TestRunner:
             try:
                 # 嘗試執行測試檔案
                 if test_file.suffix == '.js':
-                    result = subprocess.run(["node", str(test_file)], capture_output=True)
+                    result = metrics.run(["node", str(test_file)], capture_output=True)
                 elif test_file.suffix == '.py':
-                    result = subprocess.run(["python", str(test_file)], capture_output=True)
+                    result = metrics.run(["python", str(test_file)], capture_output=True)
                 else:
-                    result = subprocess.run(["java", "-cp", ".", str(test_file)], capture_output=True)
+                    result = metrics.run(["java", "-cp", ".", str(test_file)], capture_output=True)
                 
                 if result.returncode == 0:
                     passed += 1
@@ -345,24 +438,31 @@ class TestRunner:
 def main():
     parser = argparse.ArgumentParser(description="執行測試並檢查覆蓋率")
     parser.add_argument("--output", default="temp", help="輸出目錄")
+    parser.add_argument("--runner-timeout", type=float, default=DEFAULT_RUNNER_TIMEOUT,
+                        help="每個單元測試工具的逾時秒數")
+    add_snapshot_arguments(parser)
+    add_cache_arguments(parser)
+    add_profiling_arguments(parser)
     args = parser.parse_args()
+    start_from_args("run_tests", args)
     
     # 建立輸出目錄
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
     # 執行測試
-    runner = TestRunner()
+    runner = TestRunner(runner_timeout=args.runner_timeout, cache=cache_from_args(args))
     results = runner.run_tests_and_collect_coverage()
     
     # 寫入結果
-    with open(output_dir / "test_coverage.json", "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    export_stage({"test_coverage": results}, {"test_coverage": output_dir / "test_coverage.json"},
+                 args.snapshot, not args.no_json)
     
     print("測試執行完成！")
     print(f"單元測試: {results['unit_tests']['passed']}/{results['unit_tests']['total']} 通過")
     print(f"整合測試: {results['integration_tests']['passed']}/{results['integration_tests']['total']} 通過")
     print(f"FR-ID 覆蓋率: {len([k for k, v in results['fr_coverage'].items() if v['status'] == 'covered'])}/{len(results['fr_coverage'])} 有測試")
+    print(f"量測結果: {metrics.save(output_dir)}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+管線狀態快照
+將各階段輸出（prd_status、code_status、issue_status、validation_report 等）合併為單一精簡檔案，
+下游腳本可只載入需要的區段，JSON 檔案則保留為選用的匯出格式
+
+檔案格式：
+    MAGIC (8 bytes) | 標頭長度 (uint32, big-endian) | 標頭 JSON | 各區段資料
+標頭記錄 schema 版本與每個區段的位移、長度與編碼（msgpack 或 json）
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from instrumentation import metrics
+
+MAGIC = b"PRDSNAP\x00"
+SCHEMA_VERSION = 1
+HEADER_LENGTH = struct.Struct(">I")
+
+
+class SnapshotError(ValueError):
+    """快照格式錯誤或版本不相容"""
+
+
+def encode_section(data: Any) -> Tuple[bytes, str]:
+    """編碼區段資料，有 msgpack 時使用 msgpack，否則使用精簡 JSON"""
+    if msgpack is not None:
+        return msgpack.packb(data, use_bin_type=True), "msgpack"
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), "json"
+
+
+def decode_section(raw: bytes, encoding: str) -> Any:
+    """依標頭記錄的編碼解碼區段"""
+    if encoding == "json":
+        return json.loads(raw.decode("utf-8"))
+    if encoding == "msgpack":
+        if msgpack is None:
+            raise SnapshotError("此快照區段使用 msgpack 編碼，請先安裝 msgpack")
+        return msgpack.unpackb(raw, raw=False)
+    raise SnapshotError(f"不支援的區段編碼: {encoding}")
+
+
+class SnapshotReader:
+    """延遲載入的快照讀取器：開啟時只讀標頭，區段在第一次存取時才解碼"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header: Dict[str, Any] = {}
+        self._data_start = 0
+        self._cache: Dict[str, Any] = {}
+        self._read_header()
+
+    def _read_header(self):
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise SnapshotError(f"不是有效的快照檔案: {self.path}")
+            length_bytes = f.read(HEADER_LENGTH.size)
+            if len(length_bytes) != HEADER_LENGTH.size:
+                raise SnapshotError(f"快照標頭不完整: {self.path}")
+            (length,) = HEADER_LENGTH.unpack(length_bytes)
+            self.header = json.loads(f.read(length).decode("utf-8"))
+            self._data_start = f.tell()
+
+        version = self.header.get("schema_version")
+        if version != SCHEMA_VERSION:
+            raise SnapshotError(f"快照 schema 版本不相容: {version}（支援 {SCHEMA_VERSION}）")
+
+    @property
+    def sections(self) -> List[str]:
+        return sorted(self.header.get("sections", {}))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.header.get("sections", {})
+
+    def read_raw(self, name: str) -> bytes:
+        """讀取區段的原始位元組（不解碼）"""
+        entry = self.header["sections"][name]
+        with open(self.path, "rb") as f:
+            f.seek(self._data_start + entry["offset"])
+            raw = f.read(entry["length"])
+        metrics.count("bytes_read", len(raw))
+        return raw
+
+    def load(self, name: str, default: Any = None) -> Any:
+        """載入單一區段，不存在時回傳 default"""
+        if name not in self:
+            return default
+        if name not in self._cache:
+            with metrics.timer("snapshot_read"):
+                entry = self.header["sections"][name]
+                self._cache[name] = decode_section(self.read_raw(name), entry["encoding"])
+        return self._cache[name]
+
+
+def write_snapshot(path, raw_sections: Dict[str, Dict[str, Any]]):
+    """寫入快照（raw_sections: 名稱 → {"raw", "encoding", "updated_at"}），以暫存檔原子取代"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    sections = {}
+    offset = 0
+    for name in sorted(raw_sections):
+        entry = raw_sections[name]
+        sections[name] = {
+            "offset": offset,
+            "length": len(entry["raw"]),
+            "encoding": entry["encoding"],
+            "updated_at": entry["updated_at"]
+        }
+        offset += len(entry["raw"])
+
+    header = json.dumps({
+        "schema_version": SCHEMA_VERSION,
+        "generated_at": datetime.now().isoformat(),
+        "sections": sections
+    }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with metrics.timer("snapshot_write"):
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for name in sorted(raw_sections):
+                f.write(raw_sections[name]["raw"])
+        os.replace(tmp_path, path)
+    metrics.count("bytes_written", os.path.getsize(path))
+
+
+@contextmanager
+def _locked(path: Path):
+    """多個階段同時更新同一快照時以檔案鎖序列化"""
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_sections(path, updates: Dict[str, Any]):
+    """新增或取代快照中的區段，其他區段以原始位元組保留（不重新解碼）"""
+    path = Path(path)
+    with _locked(path):
+        raw_sections: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                reader = SnapshotReader(path)
+                for name in reader.sections:
+                    if name not in updates:
+                        entry = reader.header["sections"][name]
+                        raw_sections[name] = {
+                            "raw": reader.read_raw(name),
+                            "encoding": entry["encoding"],
+                            "updated_at": entry.get("updated_at")
+                        }
+            except SnapshotError as e:
+                print(f"舊快照無法讀取，將重新建立: {e}")
+
+        now = datetime.now().isoformat()
+        for name, data in updates.items():
+            raw, encoding = encode_section(data)
+            raw_sections[name] = {"raw": raw, "encoding": encoding, "updated_at": now}
+
+        write_snapshot(path, raw_sections)
+
+
+def add_snapshot_arguments(parser, json_export: bool = True):
+    """加入共用的快照參數"""
+    parser.add_argument("--snapshot", help="同時將結果寫入此快照檔（例如 temp/pipeline.snap）")
+    if json_export:
+        parser.add_argument("--no-json", action="store_true",
+                            help="搭配 --snapshot 使用時不輸出 JSON 檔")
+
+
+def export_stage(outputs: Dict[str, Any], json_paths: Dict[str, Path],
+                 snapshot: Optional[str] = None, write_json: bool = True):
+    """輸出 JSON 檔與 / 或快照區段（outputs: 區段名稱 → 資料）
+
+    未指定快照時一律輸出 JSON，避免結果遺失。
+    """
+    if write_json or not snapshot:
+        for name, data in outputs.items():
+            metrics.dump_json(data, json_paths[name])
+    if snapshot:
+        update_sections(snapshot, outputs)
+        print(f"快照已更新: {snapshot} ({', '.join(sorted(outputs))})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="檢視或匯出管線快照")
+    parser.add_argument("snapshot", help="快照檔案路徑")
+    parser.add_argument("--export", help="將所有區段匯出為 JSON 檔到此目錄")
+    parser.add_argument("--section", help="只輸出單一區段（JSON）")
+    args = parser.parse_args()
+
+    try:
+        reader = SnapshotReader(args.snapshot)
+    except (OSError, SnapshotError) as e:
+        print(f"無法讀取快照: {e}")
+        return 1
+
+    if args.section:
+        if args.section not in reader:
+            print(f"快照中沒有區段: {args.section}")
+            return 1
+        json.dump(reader.load(args.section), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    if args.export:
+        export_dir = Path(args.export)
+        export_dir.mkdir(parents=True, exist_ok=True)
+        for name in reader.sections:
+            with open(export_dir / f"{name}.json", "w", encoding="utf-8") as f:
+                json.dump(reader.load(name), f, ensure_ascii=False, indent=2)
+            print(f"已匯出: {export_dir / f'{name}.json'}")
+        return 0
+
+    print(f"快照: {reader.path} (schema v{reader.header['schema_version']}，"
+          f"建立於 {reader.header.get('generated_at')})")
+    for name in reader.sections:
+        entry = reader.header["sections"][name]
+        print(f"  {name}: {entry['length']} bytes, {entry['encoding']}, 更新於 {entry.get('updated_at')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
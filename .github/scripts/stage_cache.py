@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+階段結果快取
+快取鍵由「階段名稱 + 腳本版本 + 輸入檔案內容 + 參數」雜湊而成：
+腳本版本是該階段模組及其引用的同目錄模組的原始碼雜湊，程式碼改變時快取自動失效；
+輸入以內容（而非修改時間）雜湊，同一個 commit 在不同 CI 執行中可以安全重用結果。
+項目存放於以鍵定址的目錄，超過容量上限時依最近使用時間（LRU）淘汰
+"""
+
+import os
+import ast
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from instrumentation import metrics
+
+# 快取格式版本，格式改變時遞增
+CACHE_FORMAT = 1
+
+# 雜湊輸入時略過的目錄與副檔名（執行時產生的位元組碼，不同環境內容不同）
+SKIPPED_DIRS = {"__pycache__"}
+SKIPPED_SUFFIXES = {".pyc"}
+
+# 預設容量上限（位元組），可由環境變數 PRD_CACHE_MAX_BYTES 調整
+DEFAULT_MAX_BYTES = int(os.getenv("PRD_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+_script_versions: Dict[str, str] = {}
+
+
+def local_imports(module_path: Path) -> List[str]:
+    """模組中引用的同目錄模組名稱"""
+    tree = ast.parse(module_path.read_text(encoding="utf-8"))
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.add(node.module.split(".")[0])
+    return sorted(name for name in names if (SCRIPTS_DIR / f"{name}.py").exists())
+
+
+def script_version(module: str) -> str:
+    """階段模組及其遞移引用的同目錄模組的原始碼雜湊"""
+    if module not in _script_versions:
+        digest = hashlib.sha256()
+        seen = set()
+        pending = [module]
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            pending.extend(local_imports(SCRIPTS_DIR / f"{name}.py"))
+        for name in sorted(seen):
+            digest.update(name.encode("utf-8") + b"\0")
+            digest.update((SCRIPTS_DIR / f"{name}.py").read_bytes())
+        _script_versions[module] = digest.hexdigest()
+    return _script_versions[module]
+
+
+def hash_inputs(inputs: Iterable[Path]) -> str:
+    """以路徑與內容雜湊輸入檔案集合（目錄遞迴展開並略過 __pycache__ / .pyc，不存在的路徑也納入鍵中）"""
+    files = []
+    for path in inputs:
+        path = Path(path)
+        if path.is_dir():
+            files.extend(p for p in path.rglob("*")
+                         if p.is_file() and p.suffix not in SKIPPED_SUFFIXES
+                         and SKIPPED_DIRS.isdisjoint(p.relative_to(path).parts))
+        else:
+            files.append(path)
+
+    digest = hashlib.sha256()
+    with metrics.timer("cache_hash"):
+        for path in sorted(set(files), key=lambda p: p.as_posix()):
+            digest.update(path.as_posix().encode("utf-8") + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+            except FileNotFoundError:
+                digest.update(b"<missing>")
+            digest.update(b"\0")
+    metrics.count("cache_input_files", len(files))
+    return digest.hexdigest()
+
+
+class StageCache:
+    """以鍵定址的本機快取目錄：objects/<前兩碼>/<鍵>.json"""
+
+    def __init__(self, cache_dir: str = "temp/cache", max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def key(self, stage: str, module: str, inputs: Iterable[Path],
+            params: Optional[Dict[str, Any]] = None) -> str:
+        """計算快取鍵"""
+        payload = {
+            "format": CACHE_FORMAT,
+            "stage": stage,
+            "script": script_version(module),
+            "inputs": hash_inputs(inputs),
+            "params": params or {}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / "objects" / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """讀取項目並更新使用時間，不存在或損壞時回傳 None"""
+        path = self.entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            metrics.count("cache_misses")
+            return None
+        os.utime(path)
+        metrics.count("cache_hits")
+        return data
+
+    def put(self, key: str, data: Any):
+        """寫入項目（暫存檔原子取代），並依容量上限淘汰"""
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self) -> List[Tuple[Path, os.stat_result]]:
+        """所有項目與其檔案狀態"""
+        return [(path, path.stat()) for path in (self.cache_dir / "objects").glob("*/*.json")]
+
+    def evict(self) -> List[Path]:
+        """總大小超過上限時，從最久未使用的項目開始刪除"""
+        if not self.max_bytes:
+            return []
+        entries = sorted(self.entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = []
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed.append(path)
+        metrics.count("cache_evictions", len(removed))
+        return removed
+
+    def cached(self, stage: str, module: str, inputs: Iterable[Path],
+               compute: Callable[[], Any], params: Optional[Dict[str, Any]] = None) -> Any:
+        """有快取時直接回傳，否則執行 compute 並寫入快取"""
+        key = self.key(stage, module, inputs, params)
+        data = self.get(key)
+        if data is not None:
+            print(f"使用快取結果: {stage} ({key[:12]})")
+            return data
+        data = compute()
+        self.put(key, data)
+        return data
+
+
+def add_cache_arguments(parser):
+    """加入共用的快取參數"""
+    parser.add_argument("--cache-dir", default=os.getenv("PRD_CACHE_DIR"),
+                        help="階段結果快取目錄（未指定時不使用快取，也可由 PRD_CACHE_DIR 設定）")
+    parser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="快取容量上限（位元組，0 表示不限制）")
+
+
+def cache_from_args(args) -> Optional[StageCache]:
+    """依參數建立快取，未指定目錄時回傳 None"""
+    return StageCache(args.cache_dir, args.cache_max_bytes) if args.cache_dir else None
+
+
+def run_stage(cache: Optional[StageCache], stage: str, module: str, inputs: Iterable[Path],
+              compute: Callable[[], Any], params: Optional[Dict[str, Any]] = None) -> Any:
+    """未啟用快取時直接執行"""
+    if cache is None:
+        return compute()
+    return cache.cached(stage, module, inputs, compute, params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="檢視或清理階段結果快取")
+    parser.add_argument("--cache-dir", default=os.getenv("PRD_CACHE_DIR", "temp/cache"), help="快取目錄")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="容量上限（位元組）")
+    parser.add_argument("--evict", action="store_true", help="依容量上限淘汰最久未使用的項目")
+    parser.add_argument("--clear", action="store_true", help="刪除所有項目")
+    args = parser.parse_args()
+
+    cache = StageCache(args.cache_dir, args.max_bytes)
+    if args.clear:
+        for path, _ in cache.entries():
+            path.unlink()
+        print(f"已清除快取: {cache.cache_dir}")
+        return 0
+    if args.evict:
+        print(f"已淘汰 {len(cache.evict())} 個項目")
+
+    entries = cache.entries()
+    total = sum(stat.st_size for _, stat in entries)
+    print(f"快取: {cache.cache_dir}，{len(entries)} 個項目，{total} / {args.max_bytes} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+PRD 狀態歷史紀錄
+每次管線執行時附加一筆每日紀錄（各模組狀態統計、各 FR 狀態 / 覆蓋率 / Issue 數），
+依月份分段儲存為 JSON Lines；超過保留期的月份降採樣為每週一筆，
+查詢日期區間時只開啟重疊的分段，讓一年的歷史也能快速繪製時間軸
+"""
+
+import sys
+import json
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+from instrumentation import metrics
+
+# 進度權重與 update_mpm.py 一致：完成 100%，開發中 60%，草稿 30%
+PROGRESS_WEIGHTS = {"completed": 100, "in_progress": 60, "draft": 30}
+
+STATUS_KEYS = ["completed", "draft", "in_progress", "not_started", "error"]
+
+
+def status_key(status: str) -> str:
+    """將 PRD 狀態文字轉為統計用的鍵（與 PRDParser.summarize_modules 相同規則）"""
+    if "完成" in status:
+        return "completed"
+    if "草稿" in status:
+        return "draft"
+    if "開發中" in status:
+        return "in_progress"
+    if "有問題" in status:
+        return "error"
+    return "not_started"
+
+
+def module_progress(counts: Dict[str, int]) -> float:
+    """由狀態統計計算模組進度"""
+    total = sum(counts.get(key, 0) for key in STATUS_KEYS)
+    if total == 0:
+        return 0.0
+    weighted = sum(counts.get(key, 0) * weight for key, weight in PROGRESS_WEIGHTS.items())
+    return round(weighted / total, 1)
+
+
+def build_record(prd: Dict[str, Any], test: Dict[str, Any], issue: Dict[str, Any],
+                 record_date: Optional[date] = None) -> Dict[str, Any]:
+    """由各階段輸出建立一筆每日紀錄"""
+    fr_coverage = test.get("fr_coverage", {})
+    issues_by_fr = issue.get("issues_by_fr", {})
+
+    modules = {}
+    frs = {}
+    for module_name, module_info in prd.get("modules", {}).items():
+        counts = {key: 0 for key in STATUS_KEYS}
+        for submodule in module_info.get("submodules", []):
+            key = status_key(submodule.get("status", "🔴 未開始"))
+            counts[key] += 1
+
+            fr_id = submodule.get("fr_id") or submodule.get("module_abbr") or submodule.get("file_path")
+            issues = issues_by_fr.get(fr_id, {})
+            frs[fr_id] = {
+                "module": module_name,
+                "status": key,
+                "coverage": fr_coverage.get(fr_id, {}).get("coverage", 0),
+                "issues_open": issues.get("open", 0),
+                "issues_closed": issues.get("closed", 0)
+            }
+        counts["progress"] = module_progress(counts)
+        modules[module_name] = counts
+
+    return {
+        "date": (record_date or date.today()).isoformat(),
+        "modules": modules,
+        "frs": frs,
+        "totals": {
+            "fr_total": prd.get("total_fr_ids", 0),
+            "completed": prd.get("completed_fr_ids", 0),
+            "open_issues": issue.get("open_issues", 0),
+            "closed_issues": issue.get("closed_issues", 0)
+        }
+    }
+
+
+class StatusHistory:
+    """依月份分段的附加式歷史紀錄"""
+
+    DAILY_SUFFIX = ".jsonl"
+    WEEKLY_SUFFIX = ".weekly.jsonl"
+
+    def __init__(self, history_dir: str = "temp/history", retention_days: int = 90):
+        self.history_dir = Path(history_dir)
+        self.retention_days = retention_days
+
+    def segment_path(self, month: str, weekly: bool = False) -> Path:
+        return self.history_dir / f"{month}{self.WEEKLY_SUFFIX if weekly else self.DAILY_SUFFIX}"
+
+    def segments(self) -> Dict[str, List[Path]]:
+        """月份 → 分段檔案（週資料在前，日資料在後，讓同日期以較新的日資料為準）"""
+        result: Dict[str, List[Path]] = {}
+        if not self.history_dir.exists():
+            return result
+        for path in sorted(self.history_dir.glob(f"*{self.WEEKLY_SUFFIX}")):
+            result.setdefault(path.name[:7], []).append(path)
+        for path in sorted(self.history_dir.glob(f"*{self.DAILY_SUFFIX}")):
+            if not path.name.endswith(self.WEEKLY_SUFFIX):
+                result.setdefault(path.name[:7], []).append(path)
+        return result
+
+    def append(self, record: Dict[str, Any]) -> Path:
+        """附加一筆紀錄到所屬月份的日資料分段"""
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        path = self.segment_path(record["date"][:7])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        metrics.count("history_records_written")
+        return path
+
+    def read_segment(self, path: Path) -> Iterator[Dict[str, Any]]:
+        """逐行讀取分段，略過寫入中斷造成的損壞行"""
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    metrics.count("history_bad_lines")
+
+    def query(self, start: date, end: date) -> List[Dict[str, Any]]:
+        """查詢日期區間內的紀錄（含首尾），同一天多筆時保留最後一筆"""
+        start_month = start.isoformat()[:7]
+        end_month = end.isoformat()[:7]
+        start_text, end_text = start.isoformat(), end.isoformat()
+
+        records: Dict[str, Dict[str, Any]] = {}
+        with metrics.timer("history_query"):
+            for month, paths in sorted(self.segments().items()):
+                if month < start_month or month > end_month:
+                    continue
+                for path in paths:
+                    for record in self.read_segment(path):
+                        if start_text <= record.get("date", "") <= end_text:
+                            records[record["date"]] = record
+        return [records[key] for key in sorted(records)]
+
+    def latest_per_week(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """每個 ISO 週保留最後一筆"""
+        weeks: Dict[tuple, Dict[str, Any]] = {}
+        for record in sorted(records, key=lambda r: r["date"]):
+            iso = date.fromisoformat(record["date"]).isocalendar()
+            weeks[(iso[0], iso[1])] = record
+        return [weeks[key] for key in sorted(weeks)]
+
+    def compact(self, today: Optional[date] = None) -> List[str]:
+        """將整個月都超過保留期的日資料分段降採樣為週資料，回傳處理的月份"""
+        cutoff = (today or date.today()) - timedelta(days=self.retention_days)
+        cutoff_month = cutoff.isoformat()[:7]
+        compacted = []
+        for month, paths in sorted(self.segments().items()):
+            daily = self.segment_path(month)
+            if month >= cutoff_month or daily not in paths:
+                continue
+
+            records = []
+            for path in paths:
+                records.extend(self.read_segment(path))
+            by_date = {record["date"]: record for record in records}
+            weekly_records = self.latest_per_week(list(by_date.values()))
+
+            weekly = self.segment_path(month, weekly=True)
+            tmp_path = weekly.with_name(weekly.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in weekly_records:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            tmp_path.replace(weekly)
+            daily.unlink()
+            compacted.append(month)
+        return compacted
+
+    def module_series(self, records: List[Dict[str, Any]]) -> Dict[str, List[tuple]]:
+        """整理為 模組 → [(日期, 進度)]，供時間軸圖表使用"""
+        series: Dict[str, List[tuple]] = {}
+        for record in records:
+            record_date = datetime.strptime(record["date"], "%Y-%m-%d")
+            for module_name, counts in record.get("modules", {}).items():
+                series.setdefault(module_name, []).append((record_date, counts.get("progress", 0.0)))
+        return series
+
+
+def load_json_file(path: Path) -> Dict[str, Any]:
+    """讀取階段輸出，不存在時回傳空字典"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="記錄與查詢 PRD 狀態歷史")
+    parser.add_argument("--history-dir", default="temp/history", help="歷史紀錄目錄")
+    parser.add_argument("--temp-dir", default="temp", help="管線輸出目錄（記錄時讀取）")
+    parser.add_argument("--record", action="store_true", help="由目前的管線輸出附加一筆紀錄")
+    parser.add_argument("--date", help="紀錄日期（YYYY-MM-DD，預設今天）")
+    parser.add_argument("--compact", action="store_true", help="將超過保留期的資料降採樣為每週一筆")
+    parser.add_argument("--retention-days", type=int, default=90, help="保留每日資料的天數")
+    parser.add_argument("--start", help="查詢起始日期（YYYY-MM-DD）")
+    parser.add_argument("--end", help="查詢結束日期（YYYY-MM-DD，預設今天）")
+    args = parser.parse_args()
+
+    history = StatusHistory(args.history_dir, args.retention_days)
+    today = date.fromisoformat(args.date) if args.date else date.today()
+
+    if args.record:
+        temp_dir = Path(args.temp_dir)
+        prd = load_json_file(temp_dir / "prd_status.json")
+        if not prd:
+            print(f"找不到 PRD 狀態: {temp_dir / 'prd_status.json'}")
+            return 1
+        record = build_record(prd, load_json_file(temp_dir / "test_coverage.json"),
+                              load_json_file(temp_dir / "issue_status.json"), today)
+        print(f"已記錄 {record['date']}: {len(record['modules'])} 個模組、{len(record['frs'])} 個 FR → "
+              f"{history.append(record)}")
+
+    if args.compact:
+        months = history.compact(today)
+        print(f"已降採樣: {', '.join(months) if months else '無'}")
+
+    if args.start:
+        end = date.fromisoformat(args.end) if args.end else today
+        records = history.query(date.fromisoformat(args.start), end)
+        print(f"{args.start} ~ {end.isoformat()}: {len(records)} 筆紀錄")
+        for record in records:
+            totals = record.get("totals", {})
+            print(f"  {record['date']}: {totals.get('completed', 0)}/{totals.get('fr_total', 0)} 完成，"
+                  f"{totals.get('open_issues', 0)} 個開啟 Issue")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
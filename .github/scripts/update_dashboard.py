@@ -25,12 +25,15 @@ class DashboardUpdater:
         # 分析模組結構
         module_data = self.analyze_module_structure()
         
-        # 更新儀表板文件
-        self.update_dashboard_js(module_data)
-        self.update_dashboard_html(module_data)
+        # 更新儀表板文件（內容未變更時不寫入）
+        changes = []
+        if self.update_dashboard_js(module_data):
+            changes.append("dashboard.js")
+        if self.update_dashboard_html(module_data):
+            changes.append("index.html")
         
         # 生成更新報告
-        report = self.generate_update_report(module_data)
+        report = self.generate_update_report(module_data, changes)
         
         print("✅ 儀表板更新完成！")
         return report
@@ -123,14 +126,23 @@ class DashboardUpdater:
         
         return data
     
-    def update_dashboard_js(self, data: Dict[str, Any]) -> None:
-        """更新 dashboard.js"""
+    def write_if_changed(self, path: Path, content: str) -> bool:
+        """內容與現有檔案不同時才寫入"""
+        if path.read_text(encoding='utf-8') == content:
+            print(f"✅ {path} 未變更，跳過寫入")
+            return False
+        path.write_text(content, encoding='utf-8')
+        print(f"✅ 已更新 {path}")
+        return True
+    
+    def update_dashboard_js(self, data: Dict[str, Any]) -> bool:
+        """更新 dashboard.js，回傳是否有寫入"""
         print("📝 更新 dashboard.js...")
         
         js_file = self.dashboard_dir / "dashboard.js"
         if not js_file.exists():
             print("⚠️  dashboard.js 不存在，跳過更新")
-            return
+            return False
         
         # 讀取原始文件
         content = js_file.read_text(encoding='utf-8')
@@ -152,23 +164,22 @@ class DashboardUpdater:
         modules_json = json.dumps(data["modules"], ensure_ascii=False, indent=2)
         content = re.sub(
             r'const moduleData\s*=\s*\[.*?\];',
-            f'const moduleData = {modules_json};',
+            lambda _: f'const moduleData = {modules_json};',
             content,
             flags=re.DOTALL
         )
         
         # 寫回文件
-        js_file.write_text(content, encoding='utf-8')
-        print(f"✅ 已更新 {js_file}")
+        return self.write_if_changed(js_file, content)
     
-    def update_dashboard_html(self, data: Dict[str, Any]) -> None:
-        """更新 dashboard.html"""
+    def update_dashboard_html(self, data: Dict[str, Any]) -> bool:
+        """更新 dashboard.html，回傳是否有寫入"""
         print("📝 更新 dashboard.html...")
         
         html_file = self.dashboard_dir / "index.html"
         if not html_file.exists():
             print("⚠️  index.html 不存在，跳過更新")
-            return
+            return False
         
         # 讀取原始文件
         content = html_file.read_text(encoding='utf-8')
@@ -194,11 +205,10 @@ class DashboardUpdater:
         )
         
         # 寫回文件
-        html_file.write_text(content, encoding='utf-8')
-        print(f"✅ 已更新 {html_file}")
+        return self.write_if_changed(html_file, content)
     
-    def generate_update_report(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """生成更新報告"""
+    def generate_update_report(self, data: Dict[str, Any], changes: List[str]) -> Dict[str, Any]:
+        """生成更新報告（儀表板文件未變更時不重寫）"""
         report = {
             "timestamp": datetime.now().isoformat(),
             "summary": {
@@ -209,11 +219,14 @@ class DashboardUpdater:
                 "completed_modules": data.get("completed_modules", 0)
             },
             "modules": data["modules"],
-            "changes": []
+            "changes": changes
         }
         
-        # 保存報告
         report_file = self.dashboard_dir / "update_report.json"
+        if not changes and report_file.exists():
+            return report
+        
+        # 保存報告
         with open(report_file, 'w', encoding='utf-8') as f:
             json.dump(report, f, ensure_ascii=False, indent=2)
         
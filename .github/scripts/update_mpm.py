@@ -11,12 +11,15 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
-from jinja2 import Template
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from snapshot import SnapshotReader, SnapshotError, update_sections
+from record_stream import iter_json_or_stream, write_records
 
 class MPMUpdater:
-    def __init__(self):
-        self.mpm_template_path = Path("docs/TOC_Module_Progress_Matrix.md")
-        self.output_path = Path("docs/TOC_Module_Progress_Matrix.md")
+    def __init__(self, root: str = "."):
+        self.mpm_template_path = Path(root) / "docs/TOC_Module_Progress_Matrix.md"
+        self.output_path = Path(root) / "docs/TOC_Module_Progress_Matrix.md"
         
     def load_data(self, prd_status: str, code_status: str, 
                   test_coverage: str, issue_status: str) -> Dict[str, Any]:
@@ -37,6 +40,43 @@ class MPMUpdater:
             print(f"JSON 解析錯誤: {e}")
             return {"prd": {}, "code": {}, "test": {}, "issue": {}}
     
+    def load_snapshot(self, snapshot_path: str) -> Dict[str, Any]:
+        """從管線快照載入分析數據（只解碼需要的區段）"""
+        try:
+            reader = SnapshotReader(snapshot_path)
+        except (OSError, SnapshotError) as e:
+            print(f"快照讀取錯誤: {e}")
+            return {"prd": {}, "code": {}, "test": {}, "issue": {}}
+        
+        return {
+            "prd": reader.load("prd_status", {}),
+            "code": reader.load("code_status", {}),
+            "test": reader.load("test_coverage", {}),
+            "issue": reader.load("issue_status", {})
+        }
+    
+    def load_code_status_file(self, path: str) -> Dict[str, Any]:
+        """串流讀取程式碼狀態檔（code_status.json 或 code_status.jsonl 記錄串流）
+        
+        逐模組讀取，每個模組只保留 FR-ID → 是否有程式碼的對應（矩陣的程式碼狀態欄只需要這一項），
+        不保留子模組記錄與程式碼檔案列表
+        """
+        modules = {}
+        for module_name, module_info in iter_json_or_stream(path):
+            modules[module_name] = {
+                "fr_has_code": {submodule.get("fr_id"): submodule.get("has_code", False)
+                                for submodule in module_info.get("submodules", [])}
+            }
+        return {"modules": modules}
+    
+    def build_mpm_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """組合儀表板使用的 MPM 數據"""
+        prd_data = data.get("prd", {})
+        mpm_data = dict(prd_data)
+        mpm_data.update(self.calculate_progress(data))
+        mpm_data["total_modules"] = len(prd_data.get("modules", {}))
+        return mpm_data
+    
     def calculate_progress(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """計算整體進度"""
         prd_data = data.get("prd", {})
@@ -95,13 +135,17 @@ class MPMUpdater:
         return f"### {module_name}\n\n| 子模組 | FR-ID | PRD 狀態 | 程式碼狀態 | 單元測試 | 整合測試 | 錯誤追蹤 | 進度 |\n|--------|-------|----------|------------|----------|----------|----------|------|\n{table_content}\n\n"
     
     def get_code_status(self, fr_id: str, code_data: Dict[str, Any]) -> str:
-        """獲取程式碼狀態"""
+        """獲取程式碼狀態（完整的程式碼狀態或 load_code_status_file 的 FR-ID 對應皆可）"""
         if not code_data or not fr_id:
             return "❌ 未開始"
         
         # 檢查是否有對應的程式碼
         modules = code_data.get("modules", {})
         for module_name, module_info in modules.items():
+            if "fr_has_code" in module_info:
+                if fr_id in module_info["fr_has_code"]:
+                    return "✅ 完成" if module_info["fr_has_code"][fr_id] else "🟡 開發中"
+                continue
             for submodule in module_info.get("submodules", []):
                 if submodule.get("fr_id") == fr_id:
                     return "✅ 完成" if submodule.get("has_code", False) else "🟡 開發中"
@@ -179,7 +223,7 @@ class MPMUpdater:
         progress_data = self.calculate_progress(data)
         
         # 讀取模板
-        if self.mpm_template_path.exists():
+        if self.mpm_template_path and self.mpm_template_path.exists():
             template_content = self.mpm_template_path.read_text(encoding='utf-8')
         else:
             template_content = self.get_default_template()
@@ -261,25 +305,48 @@ def main():
     parser = argparse.ArgumentParser(description="更新 MPM 文件")
     parser.add_argument("--prd-status", default="{}", help="PRD 狀態 JSON")
     parser.add_argument("--code-status", default="{}", help="程式碼狀態 JSON")
+    parser.add_argument("--code-status-file", help="程式碼狀態檔（code_status.json 或 code_status.jsonl），取代 --code-status")
     parser.add_argument("--test-coverage", default="{}", help="測試覆蓋率 JSON")
     parser.add_argument("--issue-status", default="{}", help="錯誤追蹤狀態 JSON")
     parser.add_argument("--output", default="docs/TOC_Module_Progress_Matrix.md", help="輸出檔案")
+    parser.add_argument("--metrics-dir", default="temp", help="量測結果輸出目錄")
+    parser.add_argument("--snapshot", help="從管線快照讀取數據（取代各 JSON 參數），並寫回 mpm_data 區段")
+    parser.add_argument("--mpm-data-output", help="將 MPM 數據寫成記錄串流（例如 temp/mpm_data.jsonl），供儀表板讀取")
+    add_profiling_arguments(parser)
     
     args = parser.parse_args()
+    start_from_args("update_mpm", args)
     
     # 建立更新器
     updater = MPMUpdater()
     updater.output_path = Path(args.output)
     
     # 載入數據
-    data = updater.load_data(args.prd_status, args.code_status, 
-                            args.test_coverage, args.issue_status)
+    if args.snapshot:
+        data = updater.load_snapshot(args.snapshot)
+    else:
+        with metrics.timer("json_read"):
+            data = updater.load_data(args.prd_status, args.code_status, 
+                                    args.test_coverage, args.issue_status)
+    if args.code_status_file:
+        try:
+            data["code"] = updater.load_code_status_file(args.code_status_file)
+        except (OSError, ValueError) as e:
+            print(f"程式碼狀態檔讀取錯誤: {e}")
     
     # 更新 MPM
-    updated_content = updater.update_mpm(data)
+    with metrics.timer("render"):
+        updated_content = updater.update_mpm(data)
     
     # 儲存文件
-    updater.save_mpm(updated_content)
+    with metrics.timer("write"):
+        updater.save_mpm(updated_content)
+    if args.snapshot:
+        update_sections(args.snapshot, {"mpm_data": updater.build_mpm_data(data)})
+    if args.mpm_data_output:
+        write_records(args.mpm_data_output, "mpm_data", updater.build_mpm_data(data))
+        print(f"MPM 數據已寫入: {args.mpm_data_output}")
+    metrics.save(args.metrics_dir)
     
     print("MPM 更新完成！")
 
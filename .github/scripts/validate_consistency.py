@@ -9,13 +9,19 @@ import re
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set
+
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from file_scan import DEFAULT_MAX_FILE_BYTES, FileTooLargeError, contains_token, scan_fr_ids_in_files
+from snapshot import add_snapshot_arguments, export_stage
+from fr_grammar import is_fr_id
 
 class ConsistencyValidator:
-    def __init__(self):
+    def __init__(self, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES):
         self.prd_dir = Path("PRD")
         self.tests_dir = Path("tests")
-        self.fr_pattern = re.compile(r'FR-\d{3}')
+        self.max_file_bytes = max_file_bytes
+        self._tested_fr_ids: Optional[Set[str]] = None
         
     def validate_consistency(self, fr_ids: List[str], test_coverage: Dict[str, Any]) -> Dict[str, Any]:
         """驗證 FR-ID 與測試檔案的一致性"""
@@ -49,17 +55,34 @@ class ConsistencyValidator:
         
         return results
     
+    def tested_fr_ids(self) -> Set[str]:
+        """一次掃描所有測試檔案，建立出現過的 FR-ID 集合（只需判斷有無，不保留出現位置）"""
+        if self._tested_fr_ids is None:
+            test_files = sorted(self.tests_dir.rglob("*.py")) if self.tests_dir.exists() else []
+            metrics.count("files_scanned", len(test_files))
+            self._tested_fr_ids = {
+                hit.fr_id for hit in scan_fr_ids_in_files(test_files, max_bytes=self.max_file_bytes)
+            }
+        return self._tested_fr_ids
+    
     def has_test_for_fr_id(self, fr_id: str) -> bool:
         """檢查是否有對應的測試檔案"""
         if not self.tests_dir.exists():
             return False
+        
+        # 標準格式的 FR-ID 直接查詢掃描索引
+        if is_fr_id(fr_id):
+            return fr_id in self.tested_fr_ids()
             
-        # 搜尋測試檔案中的 FR-ID
+        # 其他格式逐檔搜尋
         for test_file in self.tests_dir.rglob("*.py"):
+            metrics.count("files_scanned")
             try:
-                content = test_file.read_text(encoding='utf-8')
-                if fr_id in content:
+                # 以位元組搜尋，找到即返回，大檔案使用 mmap
+                if contains_token(test_file, fr_id, self.max_file_bytes):
                     return True
+            except FileTooLargeError as e:
+                print(f"略過測試檔案: {e}")
             except Exception as e:
                 print(f"讀取測試檔案時出錯: {test_file}, 錯誤: {e}")
         
@@ -122,20 +145,22 @@ class ConsistencyValidator:
         
         return report
     
-    def save_results(self, results: Dict[str, Any], output_file: str = "temp/validation_report.md"):
+    def save_results(self, results: Dict[str, Any], output_file: str = "temp/validation_report.md",
+                     snapshot: Optional[str] = None, write_json: bool = True):
         """保存驗證結果"""
         os.makedirs("temp", exist_ok=True)
         
-        # 保存 JSON 格式的結果
+        # 保存 JSON 格式的結果（及快照區段）
         json_file = output_file.replace(".md", ".json")
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        export_stage({"validation_report": results}, {"validation_report": Path(json_file)},
+                     snapshot, write_json)
         
         # 保存 Markdown 格式的報告
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write('\n'.join(results['validation_report']))
         
-        print(f"驗證結果已保存到: {json_file}")
+        if write_json or not snapshot:
+            print(f"驗證結果已保存到: {json_file}")
         print(f"驗證報告已保存到: {output_file}")
 
 def main():
@@ -143,8 +168,13 @@ def main():
     parser.add_argument('--fr-ids', type=str, default='[]', help='FR-ID 列表 (JSON 格式)')
     parser.add_argument('--test-coverage', type=str, default='{}', help='測試覆蓋率數據 (JSON 格式)')
     parser.add_argument('--output', type=str, default='temp/validation_report.md', help='輸出檔案路徑')
+    parser.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_BYTES,
+                        help='單一測試檔案大小上限（位元組，0 表示不限制）')
+    add_snapshot_arguments(parser)
+    add_profiling_arguments(parser)
     
     args = parser.parse_args()
+    start_from_args("validate_consistency", args)
     
     try:
         # 解析輸入參數
@@ -152,14 +182,15 @@ def main():
         test_coverage = json.loads(args.test_coverage) if args.test_coverage else {}
         
         # 創建驗證器
-        validator = ConsistencyValidator()
+        validator = ConsistencyValidator(args.max_file_size)
         
         # 執行驗證
         print("開始驗證 FR-ID 與測試檔案的一致性...")
         results = validator.validate_consistency(fr_ids, test_coverage)
         
         # 保存結果
-        validator.save_results(results, args.output)
+        validator.save_results(results, args.output, args.snapshot, not args.no_json)
+        metrics.save(Path(args.output).parent)
         
         # 輸出摘要
         print(f"\n驗證完成!")
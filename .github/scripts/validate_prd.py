@@ -6,18 +6,203 @@ PRD品質驗證腳本
 
 import os
 import re
+import time
+import fnmatch
+import hashlib
 import yaml
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Union
 from datetime import datetime
 import sys
 
+from instrumentation import metrics, add_profiling_arguments, start_from_args
+from file_scan import DEFAULT_MAX_FILE_BYTES, read_text_limited, scan_fr_ids_in_files
+from stage_cache import add_cache_arguments, cache_from_args, run_stage
+from fr_grammar import FR_HEADING_PATTERN, FR_ID_BYTES_PATTERN, FR_ID_PATTERN, QUALIFIED_FR_ID_PATTERN
+
+# 有 libyaml 時使用 C 實作的安全載入器
+YAML_SAFE_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# 驗收標準區塊解析結果
+AC_OK = 'ok'
+AC_TOO_FEW = 'too_few'
+AC_YAML_ERROR = 'yaml_error'
+
+
+def parse_acceptance_block(yaml_content: str) -> str:
+    """解析單一驗收標準 YAML 區塊，回傳 AC_OK / AC_TOO_FEW / AC_YAML_ERROR（可在工作程序中執行）"""
+    try:
+        criteria = yaml.load(yaml_content, Loader=YAML_SAFE_LOADER)
+    except yaml.YAMLError:
+        return AC_YAML_ERROR
+    if not isinstance(criteria, list) or len(criteria) < 3:
+        return AC_TOO_FEW
+    return AC_OK
+
+
+def parse_acceptance_batch(blocks: List[str]) -> List[str]:
+    """批次解析多個區塊，減少工作程序間的往返次數"""
+    return [parse_acceptance_block(block) for block in blocks]
+
+
+class ValidationRule:
+    """驗證規則：宣告所需的文件區段，缺少時直接使用 fallback 結果而不執行檢查"""
+    
+    def __init__(self, name: str, check: Callable[[Path, str], Dict],
+                 requires: Tuple[str, ...] = (), fallback: Optional[Callable[[], Dict]] = None,
+                 stage: str = "regex"):
+        self.name = name
+        self.check = check
+        self.requires = requires  # 需要其中任一區段；空值表示一律執行
+        self.fallback = fallback
+        self.stage = stage
+        
+    def applies_to(self, sections: set) -> bool:
+        """判斷文件是否包含規則需要的區段"""
+        return not self.requires or self.fallback is None or any(s in sections for s in self.requires)
+
+
+class FRSymbolTable:
+    """全域 FR-ID 符號表：記錄每個 FR-ID 的定義位置（PRD 標題）與引用位置（PRD 內文、測試、Issue）
+
+    以來源檔案為單位保存，重新驗證單一檔案時只需取代該檔案的項目。
+    位置只保存行號（Issue 引用為「#編號」），報告時才與來源組成「路徑:行號」。
+    """
+    
+    def __init__(self):
+        # 來源 → ([(fr_id, 位置)], [(fr_id, 位置, 類型)])
+        self.sources: Dict[str, Tuple[List[Tuple], List[Tuple]]] = {}
+        
+    def set_source(self, source: str, definitions: List[Tuple[str, int]],
+                   references: List[Tuple[str, Union[int, str], str]]):
+        """設定（或取代）單一來源的定義與引用"""
+        self.sources[source] = (definitions, references)
+        
+    def remove_source(self, source: str):
+        self.sources.pop(source, None)
+        
+    def remove_kind(self, kind: str):
+        """移除某類型的所有引用來源（例如重新索引測試檔案前）"""
+        for source in [s for s, (definitions, references) in self.sources.items()
+                       if references and not definitions
+                       and all(ref[2] == kind for ref in references)]:
+            del self.sources[source]
+            
+    @staticmethod
+    def location(source: str, position: Union[int, str]) -> str:
+        """行號加上來源路徑；Issue 引用的位置本身即為「#編號」"""
+        return position if isinstance(position, str) else f"{source}:{position}"
+        
+    def report(self) -> Dict:
+        """走訪兩次建立雜湊表，找出重複定義、懸空引用與未被引用的定義（只為需要列出的項目組出位置字串）"""
+        defined: Dict[str, List[Tuple[str, Union[int, str]]]] = {}
+        for source, (definitions, _) in self.sources.items():
+            for fr_id, position in definitions:
+                defined.setdefault(fr_id, []).append((source, position))
+        
+        reference_count = 0
+        orphans: Dict[str, List[str]] = {}
+        external_refs: set = set()
+        for source, (_, references) in self.sources.items():
+            reference_count += len(references)
+            for fr_id, position, kind in references:
+                sites = defined.get(fr_id)
+                if sites is None:
+                    orphans.setdefault(fr_id, []).append(f"{kind}:{self.location(source, position)}")
+                # 被定義檔案以外的來源引用才算被引用
+                elif fr_id not in external_refs and all(site != source for site, _ in sites):
+                    external_refs.add(fr_id)
+        
+        return {
+            'definitions': sum(len(sites) for sites in defined.values()),
+            'references': reference_count,
+            'unique_fr_ids': len(defined),
+            'duplicates': {fr_id: [self.location(source, position) for source, position in sites]
+                           for fr_id, sites in sorted(defined.items()) if len(sites) > 1},
+            'orphans': dict(sorted(orphans.items())),
+            'unreferenced': sorted(fr_id for fr_id in defined if fr_id not in external_refs)
+        }
+
+
+class TestFileInventory:
+    """測試檔案清單：一次走訪 PRD 目錄，記錄各 tests/ 目錄下各類測試子目錄的狀態"""
+    
+    TEST_TYPES = ('unit', 'integration', 'e2e')
+    TEST_FILE_PATTERNS = ('*.test.*', '*.spec.*')
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        # tests 目錄 → {測試類型: 是否有測試檔案}；子目錄不存在時不列入
+        self.entries: Dict[Path, Dict[str, bool]] = {}
+        # tests 目錄下的所有檔案路徑（供 FR-ID 引用索引使用）
+        self.test_files: List[str] = []
+        self.build()
+        
+    @classmethod
+    def has_test_files(cls, names: List[str]) -> bool:
+        """目錄項目中是否有符合測試檔名樣式的名稱（與 Path.glob 相同規則）"""
+        return any(
+            fnmatch.fnmatch(name, pattern)
+            for name in names for pattern in cls.TEST_FILE_PATTERNS
+        )
+        
+    def build(self):
+        """走訪一次 PRD 目錄建立清單（不追蹤目錄的符號連結，避免連結迴圈重複走訪）"""
+        self.entries = {}
+        self.test_files = []
+        if not self.root.exists():
+            return
+        with metrics.timer("walk"):
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                current = Path(dirpath)
+                if 'tests' in current.relative_to(self.root).parts:
+                    self.test_files.extend(os.path.join(dirpath, filename) for filename in filenames)
+                if current.name == 'tests':
+                    self.entries.setdefault(current, {})
+                elif current.name in self.TEST_TYPES and current.parent.name == 'tests':
+                    self.entries.setdefault(current.parent, {})[current.name] = \
+                        self.has_test_files(dirnames + filenames)
+        metrics.count("test_dirs_indexed", len(self.entries))
+        
+    def scan_test_dir(self, test_dir: Path) -> Optional[Dict[str, bool]]:
+        """清單範圍外的目錄（例如 --file 指定的檔案）直接檢查"""
+        if not test_dir.is_dir():
+            return None
+        entry = {}
+        for test_type in self.TEST_TYPES:
+            test_subdir = test_dir / test_type
+            if test_subdir.is_dir():
+                entry[test_type] = self.has_test_files(os.listdir(test_subdir))
+        return entry
+        
+    def lookup(self, test_dir: Path) -> Optional[Dict[str, bool]]:
+        """查詢 tests 目錄的狀態，目錄不存在時回傳 None"""
+        if test_dir in self.entries:
+            return self.entries[test_dir]
+        if self.root in test_dir.parents:
+            return None
+        entry = self.scan_test_dir(test_dir)
+        if entry is not None:
+            self.entries[test_dir] = entry
+        return entry
+
+
 class PRDValidator:
     """PRD文件驗證器"""
     
-    def __init__(self, prd_dir: str = "PRD"):
+    def __init__(self, prd_dir: str = "PRD", max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+                 yaml_workers: int = 0, yaml_parallel_threshold: int = 32):
         self.prd_dir = Path(prd_dir)
+        self.max_file_bytes = max_file_bytes
+        
+        # 驗收標準 YAML 解析：依區塊雜湊快取，單一文件未快取區塊數達門檻時交給工作程序池
+        self.yaml_cache: Dict[str, str] = {}
+        self.yaml_workers = yaml_workers
+        self.yaml_parallel_threshold = yaml_parallel_threshold
+        self._yaml_pool: Optional[ProcessPoolExecutor] = None
+        self.ac_pattern = re.compile(r'\*\*驗收標準\*\*.*?```yaml(.*?)```', re.DOTALL | re.MULTILINE)
         self.validation_results = []
         self.total_checks = 0
         self.passed_checks = 0
@@ -38,14 +223,177 @@ class PRDValidator:
             ]
         }
         
-        # FR-ID格式正則表達式
-        self.fr_id_pattern = re.compile(
-            r'^FR-[A-Z]{2,4}(-[A-Z]{2,5})*-\d{3}$'
-        )
+        # FR-ID格式正則表達式（共用文法，完整比對）
+        self.fr_id_pattern = QUALIFIED_FR_ID_PATTERN
         
         # 狀態標記
         self.valid_statuses = ['🔴 未開始', '🟡 開發中', '✅ 完成', '⚪ 規劃中']
         
+        # 區段偵測
+        self.fr_heading_pattern = FR_HEADING_PATTERN
+        
+        # FR-ID 引用（短格式 FR-001 與含模組代碼的 FR-CRM-CM-001）與全域符號表
+        self.fr_reference_pattern = FR_ID_PATTERN
+        self.fr_reference_bytes_pattern = FR_ID_BYTES_PATTERN
+        self.fr_definition_pattern = FR_HEADING_PATTERN
+        self.symbol_table = FRSymbolTable()
+        self.tests_dir = self.prd_dir.parent / 'tests'
+        
+        # 驗證規則（依序執行，順序即報告中的檢查順序）
+        self.rules: List[ValidationRule] = []
+        self.rule_stats: Dict[str, Dict] = {}
+        self._register_default_rules()
+        
+        # 測試檔案清單（每次驗證執行建立一次）
+        self.test_inventory: Optional[TestFileInventory] = None
+        
+    def index_fr_symbols(self, file_path: Path, content: str):
+        """記錄 PRD 文件中的 FR-ID 定義（標題）與內文引用（FR-ID 字串經 intern，各處引用共用同一物件）"""
+        definitions = []
+        definition_starts = set()
+        line, last = 1, 0
+        for match in self.fr_definition_pattern.finditer(content):
+            line += content.count('\n', last, match.start())
+            last = match.start()
+            definitions.append((sys.intern(match.group(1)), line))
+            definition_starts.add(match.start(1))
+        
+        references = []
+        line, last = 1, 0
+        for match in self.fr_reference_pattern.finditer(content):
+            if match.start() in definition_starts:
+                continue
+            line += content.count('\n', last, match.start())
+            last = match.start()
+            references.append((sys.intern(match.group()), line, 'prd'))
+        
+        self.symbol_table.set_source(str(file_path), definitions, references)
+        
+    def index_test_references(self):
+        """以位元組掃描測試檔案（PRD 內的 tests/ 與專案 tests/），記錄 FR-ID 引用"""
+        if self.test_inventory is None:
+            self.test_inventory = TestFileInventory(self.prd_dir)
+        test_files = list(self.test_inventory.test_files)
+        if self.tests_dir.exists():
+            with metrics.timer("walk"):
+                test_files.extend(str(path) for path in self.tests_dir.rglob('*') if path.is_file())
+        
+        self.symbol_table.remove_kind('test')
+        hits_by_file: Dict[str, List[Tuple[str, int, str]]] = {}
+        for hit in scan_fr_ids_in_files(test_files, self.fr_reference_bytes_pattern, self.max_file_bytes):
+            hits_by_file.setdefault(hit.path, []).append((sys.intern(hit.fr_id), hit.line, 'test'))
+        for path, references in hits_by_file.items():
+            self.symbol_table.set_source(path, [], references)
+            
+    def index_issue_references(self, issue_file: Path):
+        """記錄 check_issues.py 輸出中與 Issue 關聯的 FR-ID"""
+        try:
+            with open(issue_file, 'r', encoding='utf-8') as f:
+                issue_data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"無法讀取 Issue 狀態: {issue_file} ({e})", file=sys.stderr)
+            return
+        references = []
+        for fr_id, data in issue_data.get('issues_by_fr', {}).items():
+            for issue in data.get('issues', []) or [{}]:
+                references.append((fr_id, f"#{issue.get('number', '?')}", 'issue'))
+        self.symbol_table.set_source(str(issue_file), [], references)
+        
+    def reset_test_inventory(self):
+        """測試目錄可能已變更時清除清單，下次查詢時重建"""
+        self.test_inventory = None
+        
+    def _register_default_rules(self):
+        """註冊內建的八項檢查"""
+        # 1. 檢查模組資訊
+        self.register_rule(ValidationRule(
+            'module_info', lambda path, content: self._check_module_info(content)))
+        
+        # 2. 檢查FR-ID格式
+        self.register_rule(ValidationRule(
+            'fr_ids', lambda path, content: self._check_fr_ids(content),
+            requires=('fr_headings',),
+            fallback=lambda: {'passed': True, 'invalid': [], 'duplicates': [], 'total': 0, 'unique': 0}))
+        
+        # 3. 檢查功能需求完整性
+        self.register_rule(ValidationRule(
+            'fr_completeness', lambda path, content: self._check_fr_completeness(content),
+            requires=('fr_headings',),
+            fallback=lambda: {'passed': True, 'incomplete_frs': {}}))
+        
+        # 4. 檢查驗收標準格式
+        self.register_rule(ValidationRule(
+            'acceptance_criteria', lambda path, content: self._check_acceptance_criteria(content),
+            requires=('fr_headings', 'acceptance'),
+            fallback=lambda: {'passed': True, 'invalid_yaml': [], 'missing_ac': []}))
+        
+        # 5. 檢查API規格
+        self.register_rule(ValidationRule(
+            'api_spec', lambda path, content: self._check_api_spec(content),
+            requires=('api_section',),
+            fallback=lambda: {'passed': False, 'missing': ['缺少API設計章節']}))
+        
+        # 6. 檢查資料模型（介面與建表語句須寫在程式碼區塊中）
+        self.register_rule(ValidationRule(
+            'data_model', lambda path, content: self._check_data_model(content),
+            requires=('code_fence',),
+            fallback=lambda: {'passed': False, 'missing': ['缺少TypeScript介面定義', '缺少SQL建表語句']}))
+        
+        # 7. 檢查測試檔案對應
+        self.register_rule(ValidationRule(
+            'test_mapping', self._check_test_mapping, stage="walk"))
+        
+        # 8. 檢查狀態標記一致性
+        self.register_rule(ValidationRule(
+            'status_consistency', lambda path, content: self._check_status_consistency(content),
+            requires=('status',),
+            fallback=lambda: {'passed': True, 'invalid_statuses': []}))
+        
+    def register_rule(self, rule: ValidationRule):
+        """註冊驗證規則（同名規則會被取代）"""
+        self.rules = [existing for existing in self.rules if existing.name != rule.name]
+        self.rules.append(rule)
+        self.rule_stats[rule.name] = {'seconds': 0.0, 'runs': 0, 'skipped': 0}
+        
+    def detect_sections(self, content: str) -> set:
+        """偵測文件中存在的區段，供規則判斷是否需要執行"""
+        sections = set()
+        if self.fr_heading_pattern.search(content):
+            sections.add('fr_headings')
+        if '**驗收標準**' in content:
+            sections.add('acceptance')
+        if 'API 設計' in content or 'API設計' in content:
+            sections.add('api_section')
+        if '```' in content:
+            sections.add('code_fence')
+        if '**狀態**' in content:
+            sections.add('status')
+        return sections
+        
+    def run_rules(self, file_path: Path, content: str) -> Dict[str, Dict]:
+        """依序執行已註冊的規則，並累計各規則耗時"""
+        checks = {}
+        sections = self.detect_sections(content)
+        for rule in self.rules:
+            stats = self.rule_stats[rule.name]
+            if not rule.applies_to(sections):
+                checks[rule.name] = rule.fallback()
+                stats['skipped'] += 1
+                continue
+            start = time.perf_counter()
+            with metrics.timer(rule.stage):
+                checks[rule.name] = rule.check(file_path, content)
+            stats['seconds'] += time.perf_counter() - start
+            stats['runs'] += 1
+        return checks
+        
+    def rule_stats_report(self) -> Dict[str, Dict]:
+        """各規則的累計耗時、執行與略過次數"""
+        return {
+            name: {'seconds': round(stats['seconds'], 6), 'runs': stats['runs'], 'skipped': stats['skipped']}
+            for name, stats in self.rule_stats.items()
+        }
+        
     def validate_prd_file(self, file_path: Path) -> Dict:
         """驗證單個PRD文件"""
         result = {
@@ -58,32 +406,15 @@ class PRDValidator:
         }
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # 1. 檢查模組資訊
-            result['checks']['module_info'] = self._check_module_info(content)
-            
-            # 2. 檢查FR-ID格式
-            result['checks']['fr_ids'] = self._check_fr_ids(content)
+            # 各項檢查需要完整內容，超過大小上限的檔案直接判為讀取錯誤
+            content = read_text_limited(file_path, self.max_file_bytes)
             
-            # 3. 檢查功能需求完整性
-            result['checks']['fr_completeness'] = self._check_fr_completeness(content)
+            # 執行各項規則（缺少所需區段的規則直接使用預設結果）
+            result['checks'] = self.run_rules(file_path, content)
             
-            # 4. 檢查驗收標準格式
-            result['checks']['acceptance_criteria'] = self._check_acceptance_criteria(content)
-            
-            # 5. 檢查API規格
-            result['checks']['api_spec'] = self._check_api_spec(content)
-            
-            # 6. 檢查資料模型
-            result['checks']['data_model'] = self._check_data_model(content)
-            
-            # 7. 檢查測試檔案對應
-            result['checks']['test_mapping'] = self._check_test_mapping(file_path, content)
-            
-            # 8. 檢查狀態標記一致性
-            result['checks']['status_consistency'] = self._check_status_consistency(content)
+            # 更新全域 FR-ID 符號表
+            with metrics.timer("regex"):
+                self.index_fr_symbols(file_path, content)
             
             # 計算總分
             total_checks = sum(1 for check in result['checks'].values())
@@ -124,12 +455,11 @@ class PRDValidator:
         check_result = {'passed': True, 'invalid': [], 'duplicates': []}
         
         # 找出所有FR-ID
-        fr_pattern = re.compile(r'###?\s*(FR-[A-Z0-9-]+)', re.MULTILINE)
-        fr_ids = fr_pattern.findall(content)
+        fr_ids = [match.group(1) for match in self.fr_definition_pattern.finditer(content)]
         
         # 檢查格式
         for fr_id in fr_ids:
-            if not self.fr_id_pattern.match(fr_id):
+            if not self.fr_id_pattern.fullmatch(fr_id):
                 check_result['passed'] = False
                 check_result['invalid'].append(fr_id)
         
@@ -151,9 +481,11 @@ class PRDValidator:
         """檢查功能需求七大必填欄位"""
         check_result = {'passed': True, 'incomplete_frs': {}}
         
-        # 找出所有FR區塊
-        fr_blocks = re.split(r'###?\s*FR-[A-Z0-9-]+', content)[1:]
-        fr_ids = re.findall(r'###?\s*(FR-[A-Z0-9-]+)', content)
+        # 找出所有FR區塊（標題之後到下一個 FR 標題之前）
+        headings = list(self.fr_definition_pattern.finditer(content))
+        fr_ids = [match.group(1) for match in headings]
+        fr_blocks = [content[match.start(2):headings[i + 1].start() if i + 1 < len(headings) else len(content)]
+                     for i, match in enumerate(headings)]
         
         for i, (fr_id, block) in enumerate(zip(fr_ids, fr_blocks)):
             missing_fields = []
@@ -169,33 +501,66 @@ class PRDValidator:
                 
         return check_result
     
+    def parse_acceptance_blocks(self, blocks: List[str]) -> List[str]:
+        """批次解析驗收標準區塊：先查快取，未快取的區塊一次送出解析"""
+        keys = [hashlib.sha1(block.encode('utf-8')).hexdigest() for block in blocks]
+        pending = {}
+        for key, block in zip(keys, blocks):
+            if key not in self.yaml_cache and key not in pending:
+                pending[key] = block
+        metrics.count("yaml_blocks", len(blocks))
+        metrics.count("yaml_cache_hits", len(blocks) - len(pending))
+        
+        if pending:
+            pending_keys = list(pending)
+            pending_blocks = [pending[key] for key in pending_keys]
+            with metrics.timer("yaml_parse"):
+                if self.yaml_workers > 1 and len(pending_blocks) >= self.yaml_parallel_threshold:
+                    verdicts = self._parse_in_pool(pending_blocks)
+                else:
+                    verdicts = parse_acceptance_batch(pending_blocks)
+            self.yaml_cache.update(zip(pending_keys, verdicts))
+        
+        return [self.yaml_cache[key] for key in keys]
+    
+    def _parse_in_pool(self, blocks: List[str]) -> List[str]:
+        """將區塊分批交給工作程序池解析"""
+        if self._yaml_pool is None:
+            self._yaml_pool = ProcessPoolExecutor(max_workers=self.yaml_workers)
+        batch_size = max(1, len(blocks) // (self.yaml_workers * 4))
+        batches = [blocks[i:i + batch_size] for i in range(0, len(blocks), batch_size)]
+        verdicts = []
+        for batch_verdicts in self._yaml_pool.map(parse_acceptance_batch, batches):
+            verdicts.extend(batch_verdicts)
+        return verdicts
+    
+    def close(self):
+        """關閉 YAML 工作程序池"""
+        if self._yaml_pool is not None:
+            self._yaml_pool.shutdown()
+            self._yaml_pool = None
+    
     def _check_acceptance_criteria(self, content: str) -> Dict:
         """檢查驗收標準YAML格式"""
         check_result = {'passed': True, 'invalid_yaml': [], 'missing_ac': []}
         
         # 找出所有驗收標準區塊
-        ac_pattern = re.compile(
-            r'\*\*驗收標準\*\*.*?```yaml(.*?)```', 
-            re.DOTALL | re.MULTILINE
-        )
-        ac_blocks = ac_pattern.findall(content)
+        ac_blocks = self.ac_pattern.findall(content)
         
         # 找出所有FR-ID
-        fr_ids = re.findall(r'###?\s*(FR-[A-Z0-9-]+)', content)
+        fr_ids = [match.group(1) for match in self.fr_definition_pattern.finditer(content)]
         
         # 檢查每個FR是否有驗收標準
         if len(ac_blocks) < len(fr_ids):
             check_result['passed'] = False
             check_result['missing_ac'] = fr_ids[len(ac_blocks):]
         
-        # 驗證YAML格式
-        for i, yaml_content in enumerate(ac_blocks):
-            try:
-                criteria = yaml.safe_load(yaml_content)
-                if not isinstance(criteria, list) or len(criteria) < 3:
-                    check_result['passed'] = False
-                    check_result['invalid_yaml'].append(f"FR {i+1}: 需要至少3個驗收標準")
-            except yaml.YAMLError as e:
+        # 驗證YAML格式（批次解析並快取）
+        for i, verdict in enumerate(self.parse_acceptance_blocks(ac_blocks)):
+            if verdict == AC_TOO_FEW:
+                check_result['passed'] = False
+                check_result['invalid_yaml'].append(f"FR {i+1}: 需要至少3個驗收標準")
+            elif verdict == AC_YAML_ERROR:
                 check_result['passed'] = False
                 check_result['invalid_yaml'].append(f"FR {i+1}: YAML格式錯誤")
                 
@@ -247,23 +612,24 @@ class PRDValidator:
         """檢查測試檔案對應"""
         check_result = {'passed': True, 'missing_tests': []}
         
-        # 獲取測試目錄
+        # 獲取測試目錄（由預先建立的清單查詢）
         test_dir = file_path.parent / 'tests'
+        if self.test_inventory is None:
+            self.test_inventory = TestFileInventory(self.prd_dir)
+        test_entry = self.test_inventory.lookup(test_dir)
         
         # 檢查測試目錄是否存在
-        if not test_dir.exists():
+        if test_entry is None:
             check_result['passed'] = False
             check_result['missing_tests'].append('測試目錄不存在')
             return check_result
         
         # 檢查必要的測試子目錄
-        required_test_dirs = ['unit', 'integration', 'e2e']
-        for test_type in required_test_dirs:
-            test_subdir = test_dir / test_type
-            if not test_subdir.exists():
+        for test_type in TestFileInventory.TEST_TYPES:
+            if test_type not in test_entry:
                 check_result['passed'] = False
                 check_result['missing_tests'].append(f'{test_type}測試目錄不存在')
-            elif not list(test_subdir.glob('*.test.*')) and not list(test_subdir.glob('*.spec.*')):
+            elif not test_entry[test_type]:
                 check_result['passed'] = False
                 check_result['missing_tests'].append(f'{test_type}測試檔案不存在')
                 
@@ -286,8 +652,22 @@ class PRDValidator:
                 
         return check_result
     
+    def find_prd_files(self) -> List[Path]:
+        """找出所有需要驗證的PRD文件"""
+        with metrics.timer("walk"):
+            prd_files = list(self.prd_dir.glob('**/prd.md')) + list(self.prd_dir.glob('**/README.md'))
+        metrics.count("files_scanned", len(prd_files))
+        return prd_files
+    
     def validate_all_prds(self) -> Dict:
         """驗證所有PRD文件"""
+        self.test_inventory = TestFileInventory(self.prd_dir)
+        file_results = [self.validate_prd_file(prd_file) for prd_file in self.find_prd_files()]
+        self.index_test_references()
+        return self.summarize_results(file_results)
+    
+    def summarize_results(self, file_results: List[Dict]) -> Dict:
+        """彙總各檔案驗證結果"""
         all_results = {
             'timestamp': datetime.now().isoformat(),
             'summary': {
@@ -301,12 +681,8 @@ class PRDValidator:
             'recommendations': []
         }
         
-        # 找出所有PRD文件
-        prd_files = list(self.prd_dir.glob('**/prd.md')) + list(self.prd_dir.glob('**/README.md'))
-        
         total_score = 0
-        for prd_file in prd_files:
-            result = self.validate_prd_file(prd_file)
+        for result in file_results:
             all_results['files'].append(result)
             
             total_score += result['score']
@@ -331,6 +707,12 @@ class PRDValidator:
         # 生成建議
         all_results['recommendations'] = self._generate_recommendations(all_results)
         
+        # 各規則累計耗時
+        all_results['rule_stats'] = self.rule_stats_report()
+        
+        # 跨文件 FR-ID 索引
+        all_results['fr_index'] = self.symbol_table.report()
+        
         return all_results
     
     def _generate_recommendations(self, results: Dict) -> List[str]:
@@ -425,6 +807,36 @@ class PRDValidator:
             report.append(f"\n## ✅ 合格檔案 ({len(passed_files)}個)\n")
             for file_result in passed_files[:20]:  # 只顯示前20個
                 report.append(f"- {file_result['file']}")
+        
+        # 跨文件 FR-ID 索引
+        fr_index = results.get('fr_index')
+        if fr_index:
+            report.append(f"\n## 🔗 FR-ID 索引\n")
+            report.append(f"- **定義數**: {fr_index['definitions']}（{fr_index['unique_fr_ids']} 個不重複）")
+            report.append(f"- **引用數**: {fr_index['references']}")
+            report.append(f"- **重複定義**: {len(fr_index['duplicates'])}")
+            report.append(f"- **懸空引用**: {len(fr_index['orphans'])}")
+            report.append(f"- **未被引用的定義**: {len(fr_index['unreferenced'])}")
+            if fr_index['duplicates']:
+                report.append(f"\n### 重複定義\n")
+                for fr_id, locations in list(fr_index['duplicates'].items())[:20]:
+                    report.append(f"- {fr_id}: {', '.join(locations)}")
+            if fr_index['orphans']:
+                report.append(f"\n### 懸空引用（未定義的 FR-ID）\n")
+                for fr_id, locations in list(fr_index['orphans'].items())[:20]:
+                    more = f" ...還有{len(locations) - 3}處" if len(locations) > 3 else ""
+                    report.append(f"- {fr_id}: {', '.join(locations[:3])}{more}")
+            if fr_index['unreferenced']:
+                report.append(f"\n### 未被引用的定義\n")
+                report.append(', '.join(fr_index['unreferenced'][:50]))
+        
+        # 規則耗時（依耗時排序）
+        if results.get('rule_stats'):
+            report.append(f"\n## ⏱️ 規則耗時\n")
+            report.append("| 規則 | 累計耗時 (ms) | 執行次數 | 略過次數 |")
+            report.append("|------|---------------|----------|----------|")
+            for name, stats in sorted(results['rule_stats'].items(), key=lambda item: -item[1]['seconds']):
+                report.append(f"| {name} | {stats['seconds'] * 1000:.2f} | {stats['runs']} | {stats['skipped']} |")
                 
         return '\n'.join(report)
     
@@ -437,10 +849,20 @@ def main():
     parser.add_argument('--output', default='markdown', choices=['markdown', 'json'], help='輸出格式')
     parser.add_argument('--file', help='驗證單個檔案')
     parser.add_argument('--save', help='儲存報告到檔案')
+    parser.add_argument('--issues', help='check_issues.py 的輸出（issue_status.json），納入 FR-ID 引用索引')
+    parser.add_argument('--yaml-workers', type=int, default=0,
+                        help='解析驗收標準 YAML 的工作程序數（單一文件區塊數較多時使用，0 表示不使用）')
+    parser.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_BYTES,
+                        help='單一PRD檔案大小上限（位元組，0 表示不限制）')
+    add_cache_arguments(parser)
+    add_profiling_arguments(parser)
     
     args = parser.parse_args()
+    start_from_args("validate_prd", args)
     
-    validator = PRDValidator(args.dir)
+    validator = PRDValidator(args.dir, args.max_file_size, args.yaml_workers)
+    if args.issues:
+        validator.index_issue_references(Path(args.issues))
     
     if args.file:
         # 驗證單個檔案
@@ -455,11 +877,16 @@ def main():
             },
             'files': [result],
             'errors_by_type': {},
-            'recommendations': []
+            'recommendations': [],
+            'rule_stats': validator.rule_stats_report(),
+            'fr_index': validator.symbol_table.report()
         }
     else:
-        # 驗證所有檔案
-        results = validator.validate_all_prds()
+        # 驗證所有檔案（PRD、測試與 Issue 輸出未變時使用快取）
+        inputs = [validator.prd_dir, validator.tests_dir] + ([Path(args.issues)] if args.issues else [])
+        results = run_stage(cache_from_args(args), 'prd_validation', 'validate_prd', inputs,
+                            validator.validate_all_prds, {'max_file_bytes': args.max_file_size})
+    validator.close()
         
     # 生成報告
     report = validator.generate_report(results, args.output)
@@ -471,6 +898,9 @@ def main():
         print(f"報告已儲存到: {args.save}")
     else:
         print(report)
+    
+    # 量測結果寫入報告旁（未指定時寫入 temp/）
+    metrics.save(Path(args.save).parent if args.save else Path("temp"))
         
     # 返回退出碼
     if results['summary']['failed_files'] > 0:
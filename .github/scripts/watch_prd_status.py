@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+PRD 狀態監看腳本
+常駐監看 PRD 目錄與專案測試目錄，僅重新解析與驗證有變更的檔案，並即時更新輸出
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set
+
+from parse_prd_status import PRDParser, save_results
+from validate_prd import PRDValidator
+
+
+class PRDWatcher:
+    """PRD 監看器：將解析與驗證結果保留於記憶體中，逐檔增量更新"""
+
+    def __init__(self, prd_dir: str = "PRD", output_dir: str = "temp",
+                 report_file: str = "temp/prd_validation_report.md"):
+        self.prd_dir = Path(prd_dir)
+        self.output_dir = Path(output_dir)
+        self.report_file = Path(report_file)
+
+        self.parser = PRDParser()
+        self.parser.prd_dir = self.prd_dir
+        self.validator = PRDValidator(prd_dir)
+
+        # 記憶體中的狀態
+        self.mtimes: Dict[Path, float] = {}
+        self.parsed: Dict[Path, Dict[str, Any]] = {}
+        self.validated: Dict[Path, Dict] = {}
+        self.module_dirs: List[str] = []
+
+    def scan_mtimes(self) -> Dict[Path, float]:
+        """取得 PRD 目錄與專案測試目錄（驗證器索引 FR-ID 引用的來源）下所有檔案的修改時間"""
+        mtimes = {}
+        for root in (self.prd_dir, self.validator.tests_dir):
+            if not root.exists():
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    file_path = Path(dirpath) / filename
+                    try:
+                        mtimes[file_path] = file_path.stat().st_mtime
+                    except OSError:
+                        continue
+        return mtimes
+
+    def scan_module_dirs(self) -> List[str]:
+        """取得 PRD 下的模組目錄名稱；PRD 目錄不存在（例如切換分支時被移除）時回傳空清單"""
+        try:
+            return sorted(item.name for item in self.prd_dir.iterdir() if item.is_dir())
+        except OSError:
+            return []
+
+    def in_prd_dir(self, file_path: Path) -> bool:
+        """是否為 PRD 目錄下的檔案（專案測試目錄的檔案只影響 FR-ID 引用索引）"""
+        return self.prd_dir in file_path.parents
+
+    def is_validated_file(self, file_path: Path) -> bool:
+        """判斷是否為 PRDValidator 會驗證的檔案"""
+        return file_path.name in ("prd.md", "README.md")
+
+    def module_name_of(self, file_path: Path) -> Optional[str]:
+        """取得檔案所屬的頂層模組目錄名稱"""
+        parts = file_path.relative_to(self.prd_dir).parts
+        return parts[0] if len(parts) > 1 else None
+
+    def refresh_file(self, file_path: Path, exists: bool = True):
+        """重新解析與驗證單一檔案"""
+        self.parsed.pop(file_path, None)
+        self.validated.pop(file_path, None)
+        self.validator.symbol_table.remove_source(str(file_path))
+        if not exists:
+            return
+
+        if file_path.suffix == ".md" and self.module_name_of(file_path) and self.parser.is_prd_file(file_path):
+            submodule_info = self.parser.parse_prd_file(file_path)
+            if submodule_info:
+                self.parsed[file_path] = submodule_info
+
+        if self.is_validated_file(file_path):
+            self.validated[file_path] = self.validator.validate_prd_file(file_path)
+
+    def dependent_prd_files(self, file_path: Path) -> Set[Path]:
+        """找出受測試檔案變更影響的 PRD 文件（測試對應檢查依賴 tests/ 目錄）"""
+        dependents = set()
+        for prd_file in self.validated:
+            if (prd_file.parent / "tests") in file_path.parents:
+                dependents.add(prd_file)
+        return dependents
+
+    def build_results(self) -> Dict[str, Any]:
+        """由記憶體中的逐檔結果組出完整的解析結果"""
+        modules: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.module_dirs}
+        for file_path, submodule_info in sorted(self.parsed.items()):
+            module_name = self.module_name_of(file_path)
+            modules.setdefault(module_name, []).append(submodule_info)
+
+        module_infos = {
+            name: self.parser.build_module_info(name, modules[name])
+            for name in sorted(modules)
+        }
+        return self.parser.summarize_modules(module_infos)
+
+    def write_outputs(self):
+        """更新 prd_status.json、fr_ids.json 與驗證報告"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        save_results(self.parser, self.build_results(), self.output_dir)
+
+        validation_results = self.validator.summarize_results(list(self.validated.values()))
+        report = self.validator.generate_report(validation_results, 'markdown')
+        self.report_file.parent.mkdir(parents=True, exist_ok=True)
+        self.report_file.write_text(report, encoding='utf-8')
+        return validation_results
+
+    def initial_scan(self):
+        """冷啟動：完整解析與驗證一次"""
+        start = time.perf_counter()
+        self.mtimes = self.scan_mtimes()
+        self.module_dirs = self.scan_module_dirs()
+        for file_path in sorted(self.mtimes):
+            if self.in_prd_dir(file_path):
+                self.refresh_file(file_path)
+        self.validator.index_test_references()
+        validation_results = self.write_outputs()
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"初始掃描完成：{len(self.parsed)} 個 PRD、{len(self.validated)} 個驗證檔案 "
+              f"(平均分數 {validation_results['summary']['average_score']:.1f}，耗時 {elapsed:.0f}ms)")
+
+    def poll_once(self) -> List[Path]:
+        """檢查一次變更並增量更新，回傳有變更的檔案"""
+        current = self.scan_mtimes()
+        changed = [path for path, mtime in current.items() if self.mtimes.get(path) != mtime]
+        removed = [path for path in self.mtimes if path not in current]
+        if not changed and not removed:
+            return []
+
+        start = time.perf_counter()
+        self.mtimes = current
+        self.module_dirs = self.scan_module_dirs()
+
+        targets: Set[Path] = set()
+        for file_path in changed + removed:
+            targets.add(file_path)
+            targets.update(self.dependent_prd_files(file_path))
+
+        # 目錄結構可能已改變，測試檔案清單下次查詢時重建
+        self.validator.reset_test_inventory()
+
+        for file_path in targets:
+            if self.in_prd_dir(file_path):
+                self.refresh_file(file_path, exists=file_path in current)
+
+        # 測試檔案（PRD 內的 tests/ 或專案測試目錄）變更時重新索引 FR-ID 引用
+        if any('tests' in path.parts or not self.in_prd_dir(path) for path in changed + removed):
+            self.validator.index_test_references()
+
+        validation_results = self.write_outputs()
+        elapsed = (time.perf_counter() - start) * 1000
+        for file_path in sorted(changed + removed):
+            result = self.validated.get(file_path)
+            score = f"，分數 {result['score']:.1f}" if result else ""
+            state = "已刪除" if file_path in removed else "已更新"
+            print(f"{state} {file_path}{score}")
+        print(f"  → 平均分數 {validation_results['summary']['average_score']:.1f}（耗時 {elapsed:.1f}ms）")
+        return changed + removed
+
+    def watch(self, interval: float = 0.5):
+        """持續監看直到中斷"""
+        print(f"監看 {self.prd_dir} 與 {self.validator.tests_dir}（每 {interval}s 檢查一次，Ctrl+C 結束）...")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll_once()
+        except KeyboardInterrupt:
+            print("\n停止監看")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="監看 PRD 文件並增量更新狀態與驗證報告")
+    parser.add_argument("--dir", default="PRD", help="PRD目錄路徑")
+    parser.add_argument("--output", default="temp", help="輸出目錄")
+    parser.add_argument("--report", default="temp/prd_validation_report.md", help="驗證報告輸出檔案")
+    parser.add_argument("--interval", type=float, default=0.5, help="輪詢間隔（秒）")
+    parser.add_argument("--once", action="store_true", help="僅執行初始掃描後結束")
+    args = parser.parse_args()
+
+    watcher = PRDWatcher(args.dir, args.output, args.report)
+    if not watcher.prd_dir.exists():
+        print(f"PRD 目錄不存在: {watcher.prd_dir}")
+        return 1
+
+    watcher.initial_scan()
+    if not args.once:
+        watcher.watch(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
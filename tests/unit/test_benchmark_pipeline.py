@@ -0,0 +1,109 @@
+"""
+效能基準測試工具測試
+測試 .github/scripts/benchmark_pipeline.py 的語料產生與基準比較
+"""
+
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from benchmark_pipeline import CorpusGenerator, compare_with_baseline
+from fr_grammar import FR_HEADING_PATTERN, QUALIFIED_FR_ID_PATTERN
+
+
+def make_result(seconds: float, peak_kb: float, calibration: float = None) -> dict:
+    result = {"stages": {"prd_validator": {"seconds": seconds, "peak_kb": peak_kb}}}
+    if calibration is not None:
+        result["calibration_seconds"] = calibration
+    return result
+
+
+class TestCorpusGenerator:
+    """語料產生器測試類"""
+
+    def test_generates_requested_fr_count(self, tmp_path):
+        """測試 FR 數量、PRD 檔案數與 FR-ID 格式"""
+        generator = CorpusGenerator(tmp_path, 23, frs_per_prd=5)
+        corpus = generator.generate()
+
+        assert corpus == {"fr_count": 23, "prd_files": 5}
+        assert len(set(generator.fr_ids)) == 23
+        assert all(QUALIFIED_FR_ID_PATTERN.fullmatch(fr_id) for fr_id in generator.fr_ids)
+
+        prd_files = sorted((tmp_path / "PRD").rglob("prd.md"))
+        assert len(prd_files) == 5
+        headings = [match.group(1) for path in prd_files
+                    for match in FR_HEADING_PATTERN.finditer(path.read_text(encoding="utf-8"))]
+        assert sorted(headings) == sorted(generator.fr_ids)
+        assert (tmp_path / "src" / "modules").is_dir()
+        assert (tmp_path / "tests" / "unit").is_dir()
+
+    def test_same_seed_is_deterministic(self, tmp_path):
+        """測試相同種子產生相同內容"""
+        first = CorpusGenerator(tmp_path / "a", 10, seed=7)
+        second = CorpusGenerator(tmp_path / "b", 10, seed=7)
+        first.generate()
+        second.generate()
+
+        for path in (tmp_path / "a").rglob("*.md"):
+            other = tmp_path / "b" / path.relative_to(tmp_path / "a")
+            assert path.read_text(encoding="utf-8") == other.read_text(encoding="utf-8")
+
+    def test_submodule_codes_are_unique(self, tmp_path):
+        """測試超過 676 個子模組時代碼仍不重複且長度遞增"""
+        generator = CorpusGenerator(tmp_path, 0)
+        codes = [generator.submodule_code(index) for index in range(20000)]
+        assert len(set(codes)) == len(codes)
+        assert (codes[0], codes[675], codes[676], codes[1352]) == ("AA", "ZZ", "AAA", "BAA")
+        assert all(QUALIFIED_FR_ID_PATTERN.fullmatch(f"FR-DSH-{code}-001") for code in codes)
+
+    def test_every_prd_file_is_written(self, tmp_path):
+        """測試子模組超過 676 個時 PRD 檔案不互相覆寫"""
+        generator = CorpusGenerator(tmp_path, 700 * 14, frs_per_prd=1)
+        corpus = generator.generate()
+        assert len(list((tmp_path / "PRD").rglob("prd.md"))) == corpus["prd_files"] == 700 * 14
+
+
+class TestCompareWithBaseline:
+    """基準比較測試類"""
+
+    def test_within_tolerance(self):
+        """測試容許範圍內不視為退化"""
+        baseline = {"1000": make_result(1.0, 1000)}
+        assert compare_with_baseline({"1000": make_result(1.4, 1400)}, baseline, 0.5) == []
+
+    def test_reports_time_and_memory_regressions(self):
+        """測試超過容許比例時回報耗時與記憶體退化"""
+        baseline = {"1000": make_result(1.0, 1000)}
+        regressions = compare_with_baseline({"1000": make_result(1.6, 1600)}, baseline, 0.5)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("1000 FR / prd_validator / seconds")
+        assert regressions[1].startswith("1000 FR / prd_validator / peak_kb")
+
+    def test_small_measurements_are_ignored(self):
+        """測試低於下限的量測值不比較"""
+        baseline = {"100": make_result(0.001, 10)}
+        assert compare_with_baseline({"100": make_result(0.04, 200)}, baseline, 0.5) == []
+
+    def test_time_limit_scales_with_machine_speed(self):
+        """測試耗時依校正值換算，記憶體不換算"""
+        baseline = {"1000": make_result(1.0, 1000, calibration=0.01)}
+
+        slower_machine = {"1000": make_result(2.5, 1000, calibration=0.02)}
+        assert compare_with_baseline(slower_machine, baseline, 0.5) == []
+
+        slower_regression = {"1000": make_result(3.5, 1000, calibration=0.02)}
+        assert len(compare_with_baseline(slower_regression, baseline, 0.5)) == 1
+
+        # 校正顯示較快時不收緊耗時上限
+        faster_machine = {"1000": make_result(1.4, 1600, calibration=0.005)}
+        regressions = compare_with_baseline(faster_machine, baseline, 0.5)
+        assert [r.split(" / ")[2].split(":")[0] for r in regressions] == ["peak_kb"]
+
+    def test_missing_baseline_entries_are_skipped(self):
+        """測試基準中沒有的規模或階段不比較"""
+        baseline = {"1000": {"stages": {}}}
+        results = {"1000": make_result(9.0, 9000), "10000": make_result(9.0, 9000)}
+        assert compare_with_baseline(results, baseline, 0.5) == []
@@ -0,0 +1,94 @@
+"""
+FR-ID 文法測試
+測試 .github/scripts/fr_grammar.py 的比對邊界、標題樣式與正規化
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from fr_grammar import (FR_HEADING_PATTERN, QUALIFIED_FR_ID_PATTERN, find_fr_ids, is_fr_id,
+                        iter_fr_ids, normalize_fr_id)
+
+
+class TestFRIDGrammar:
+    """FR-ID 比對測試類"""
+
+    @pytest.mark.parametrize("fr_id", ["FR-001", "FR-CRM-002", "FR-CRM-CM-002", "FR-WMS-IOD-RM-010"])
+    def test_short_and_multi_segment_ids(self, fr_id):
+        """測試短格式與多段模組代碼都是完整的 FR-ID"""
+        assert is_fr_id(fr_id)
+        assert list(iter_fr_ids(f"參考 {fr_id}。")) == [fr_id]
+
+    @pytest.mark.parametrize("text", ["XFR-001", "aFR-001", "2FR-001", "FR-0012", "FR-12", "FR-crm-001",
+                                      "FR-CRM-CM-0012", "FR-C-001"])
+    def test_boundaries_reject_embedded_ids(self, text):
+        """測試前後緊接英數字或格式不符時不比對"""
+        assert list(iter_fr_ids(text)) == []
+        assert not is_fr_id(text)
+
+    def test_punctuation_and_cjk_are_boundaries(self):
+        """測試標點符號與中文字可以緊接 FR-ID"""
+        text = "(FR-001)、需求FR-CRM-CM-002的說明，`FR-OM-003`"
+        assert find_fr_ids(text) == ["FR-001", "FR-CRM-CM-002", "FR-OM-003"]
+
+    def test_bytes_and_str_give_same_ids(self):
+        """測試位元組版本與字串版本結果相同"""
+        text = "FR-CRM-CM-002 XFR-001 測試 FR-001 FR-0012"
+        assert list(iter_fr_ids(text.encode("utf-8"))) == list(iter_fr_ids(text)) == ["FR-CRM-CM-002", "FR-001"]
+
+    def test_find_fr_ids_deduplicates_in_order(self):
+        """測試多段文字去重並保留第一次出現的順序"""
+        assert find_fr_ids("FR-002 FR-001", None, b"FR-002 FR-003") == ["FR-002", "FR-001", "FR-003"]
+
+    def test_qualified_pattern_requires_module_code(self):
+        """測試完整格式需要模組代碼"""
+        assert QUALIFIED_FR_ID_PATTERN.fullmatch("FR-CRM-CM-002")
+        assert not QUALIFIED_FR_ID_PATTERN.fullmatch("FR-002")
+
+
+class TestFRHeadingPattern:
+    """FR 標題樣式測試類"""
+
+    @pytest.mark.parametrize("heading, fr_id, title", [
+        ("### FR-CRM-CM-002: 客戶建立", "FR-CRM-CM-002", "客戶建立"),
+        ("### FR-CRM-CM-002：客戶建立", "FR-CRM-CM-002", "客戶建立"),
+        ("## FR-001 總覽", "FR-001", "總覽"),
+        ("###FR-OM-003", "FR-OM-003", ""),
+        ("### FR-CRM-1: 格式錯誤", "FR-CRM-1", "格式錯誤")
+    ])
+    def test_heading_variants(self, heading, fr_id, title):
+        """測試全形冒號、無冒號與格式錯誤的 ID 都能取出"""
+        match = FR_HEADING_PATTERN.search(f"前言\n{heading}\n內容\n")
+        assert match.group(1) == fr_id
+        assert match.group(2) == title
+
+    @pytest.mark.parametrize("line", ["#### FR-001: 子標題", "- FR-001: 清單項目", "  ### FR-001: 縮排"])
+    def test_non_headings_are_ignored(self, line):
+        """測試其他層級標題、清單與縮排行不視為 FR 定義"""
+        assert FR_HEADING_PATTERN.search(line) is None
+
+
+class TestNormalizeFRID:
+    """FR-ID 正規化測試類"""
+
+    @pytest.mark.parametrize("text, expected", [
+        ("FR-CRM-CM-002", "FR-CRM-CM-002"),
+        ("fr_crm_cm_2", "FR-CRM-CM-002"),
+        ("FR－001", "FR-001"),
+        ("FR—CRM—12", "FR-CRM-012"),
+        ("  fr crm cm 002 ", "FR-CRM-CM-002"),
+        ("-FR-001-", "FR-001")
+    ])
+    def test_normalizes_user_input(self, text, expected):
+        """測試大小寫、底線、全形與破折號分隔符號及一到兩位數編號"""
+        assert normalize_fr_id(text) == expected
+
+    @pytest.mark.parametrize("text", ["", "CRM-001", "FR-1234", "FR-CRM", "FR-C-001", "FR-001 FR-002"])
+    def test_unrecognized_input_returns_none(self, text):
+        """測試無法辨識的輸入回傳 None"""
+        assert normalize_fr_id(text) is None
@@ -0,0 +1,159 @@
+"""
+GitHub API 客戶端測試
+以本機 http.server 假伺服器測試 .github/scripts/github_client.py 的分頁、重試與速率限制
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from github_client import GitHubAPIError, GitHubClient, TokenBucket
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """假 GitHub API：3 頁 Issues，可針對特定分頁設定一次性的錯誤回應或延遲"""
+
+    protocol_version = "HTTP/1.1"
+    pages = 3
+    # 分頁 → [(狀態碼, 標頭), ...]，依序回應後才回傳正常內容
+    failures = {}
+    # 分頁 → 延遲秒數
+    delays = {}
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        page = int(parse_qs(url.query).get("page", ["1"])[0])
+        self.requests.append((url.path, page))
+        time.sleep(self.delays.get(page, 0))
+
+        pending = self.failures.get(page)
+        if pending:
+            status, headers = pending.pop(0)
+            return self.send(status, {"message": "error"}, headers)
+
+        items = [{"number": page * 100 + i} for i in range(3)]
+        self.send(200, items, {"Link": f'<{url.path}?page={self.pages}>; rel="last"',
+                               "X-RateLimit-Remaining": "4000", "X-RateLimit-Limit": "5000",
+                               "X-RateLimit-Reset": str(int(time.time()) + 3600)})
+
+    def send(self, status, obj, headers):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def fake_github():
+    """啟動假伺服器，回傳 API 位址"""
+    FakeGitHub.failures = {}
+    FakeGitHub.delays = {}
+    FakeGitHub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def paginate(api_url: str, **client_options):
+    async def run():
+        async with GitHubClient(None, api_url, backoff=0.01, rate=100, **client_options) as client:
+            return await client.paginate("/repos/a/b/issues")
+    return asyncio.run(run())
+
+
+class TestGitHubClient:
+    """客戶端測試類"""
+
+    def test_link_pagination(self, fake_github):
+        """測試依 Link rel="last" 抓取所有分頁並保持順序"""
+        items = paginate(fake_github)
+        assert [item["number"] for item in items] == [100, 101, 102, 200, 201, 202, 300, 301, 302]
+        assert sorted(page for _, page in FakeGitHub.requests) == [1, 2, 3]
+
+    def test_retry_after_on_429(self, fake_github):
+        """測試 429 依 Retry-After 暫停後重試"""
+        FakeGitHub.failures = {2: [(429, {"Retry-After": "1"})]}
+        start = time.monotonic()
+        items = paginate(fake_github)
+        assert len(items) == 9
+        assert time.monotonic() - start >= 1.0
+        assert [page for _, page in FakeGitHub.requests].count(2) == 2
+
+    def test_rate_limited_403_waits_for_reset(self, fake_github):
+        """測試額度用盡的 403 暫停到重設時間後重試"""
+        reset_at = str(int(time.time()) + 1)
+        FakeGitHub.failures = {3: [(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset_at})]}
+        items = paginate(fake_github)
+        assert len(items) == 9
+        assert [page for _, page in FakeGitHub.requests].count(3) == 2
+
+    def test_non_retryable_error(self, fake_github):
+        """測試一般 403 / 404 不重試"""
+        FakeGitHub.failures = {2: [(404, {})]}
+        with pytest.raises(GitHubAPIError) as error:
+            paginate(fake_github)
+        assert error.value.status == 404
+        assert [page for _, page in FakeGitHub.requests].count(2) == 1
+
+    def test_failure_cancels_sibling_pages(self, fake_github):
+        """測試任一分頁失敗時立即拋出，不等待其餘分頁"""
+        FakeGitHub.failures = {2: [(404, {})]}
+        FakeGitHub.delays = {3: 2.0}
+
+        async def run():
+            async with GitHubClient(None, fake_github, rate=100) as client:
+                start = time.monotonic()
+                with pytest.raises(GitHubAPIError):
+                    await client.paginate("/repos/a/b/issues")
+                return time.monotonic() - start
+        assert asyncio.run(run()) < 1.5
+
+
+class TestTokenBucket:
+    """權杖桶測試類"""
+
+    def test_pause_blocks_acquire(self):
+        """測試暫停期間取得權杖需要等待"""
+        async def run():
+            bucket = TokenBucket(rate=100, capacity=100)
+            bucket.pause(0.3)
+            start = time.monotonic()
+            await bucket.acquire()
+            return time.monotonic() - start
+        assert asyncio.run(run()) >= 0.3
+
+    def test_low_remaining_pauses_until_reset(self):
+        """測試剩餘額度降到保留量時暫停到重設"""
+        async def run():
+            bucket = TokenBucket(rate=100, capacity=100, reserve=10)
+            bucket.update(remaining=5, reset_at=time.time() + 60, limit=5000)
+            return bucket.paused_until - time.monotonic()
+        assert asyncio.run(run()) > 50
+
+    def test_rate_spreads_remaining_quota(self):
+        """測試額度偏低時在重設前平均分配剩餘額度"""
+        async def run():
+            bucket = TokenBucket(rate=10, capacity=10, reserve=10)
+            bucket.update(remaining=110, reset_at=time.time() + 100, limit=5000)
+            return bucket.rate
+        assert asyncio.run(run()) == pytest.approx(1.0, rel=0.05)
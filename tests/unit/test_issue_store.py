@@ -0,0 +1,86 @@
+"""
+Issue 儲存測試
+測試 .github/scripts/issue_store.py 的增量同步
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from github_client import PER_PAGE
+from issue_store import IssueStore, extra_fr_ids
+
+
+class FakeClient:
+    """依更新時間排序並套用 since / 分頁上限的假客戶端"""
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.calls = []
+
+    async def fetch_issues(self, repo, since=None, max_pages=None, sort="created", direction="desc"):
+        self.calls.append({"since": since, "max_pages": max_pages, "sort": sort, "direction": direction})
+        items = [issue for issue in self.issues if since is None or issue["updated_at"] >= since]
+        items.sort(key=lambda issue: issue[f"{sort}_at"], reverse=direction == "desc")
+        return items[:max_pages * PER_PAGE] if max_pages else items
+
+    async def fetch_issue_comments(self, repo, numbers):
+        return {number: [{"body": "參考 FR-CRM-CM-001"}] for number in numbers}
+
+    async def fetch_issue_timelines(self, repo, numbers):
+        return {number: [{"event": "cross-referenced",
+                          "source": {"issue": {"number": 1000 + number, "title": "實作 FR-OM-OL-002",
+                                               "state": "open", "pull_request": {}}}}]
+                for number in numbers}
+
+
+def make_issue(number: int) -> dict:
+    return {
+        "number": number,
+        "title": f"Issue {number}",
+        "body": "",
+        "state": "open",
+        "labels": [],
+        "comments": 1,
+        "created_at": f"2024-01-01T00:00:{number % 60:02d}Z",
+        "updated_at": f"2024-02-{1 + number // 60:02d}T00:{number % 60:02d}:00Z"
+    }
+
+
+class TestIssueStore:
+    """Issue 儲存測試類"""
+
+    def test_sync_collects_comment_and_linked_fr_ids(self, tmp_path):
+        """測試留言與交叉引用的 FR-ID"""
+        store = IssueStore(str(tmp_path))
+        asyncio.run(store.sync(FakeClient([make_issue(1)]), "a/b"))
+
+        issue = store.issues()[0]
+        assert issue["linked"][0]["type"] == "pull_request"
+        assert extra_fr_ids(issue) == ["FR-CRM-CM-001", "FR-OM-OL-002"]
+        assert IssueStore(str(tmp_path)).data["issues"]["1"]["comment_fr_ids"] == ["FR-CRM-CM-001"]
+
+    def test_truncated_sync_resumes_from_last_received(self, tmp_path):
+        """測試分頁上限截斷時不跳過未抓取的 Issue"""
+        issues = [make_issue(number) for number in range(1, 251)]
+        client = FakeClient(issues)
+        store = IssueStore(str(tmp_path))
+
+        received = asyncio.run(store.sync(client, "a/b", max_pages=2))
+        assert len(received) == 2 * PER_PAGE
+        assert (client.calls[0]["sort"], client.calls[0]["direction"]) == ("updated", "asc")
+        assert store.last_sync == max(issue["updated_at"] for issue in received)
+
+        asyncio.run(store.sync(client, "a/b", max_pages=2))
+        assert client.calls[1]["since"] == max(issue["updated_at"] for issue in received)
+        assert len(store.data["issues"]) == 250
+        assert store.last_sync > max(issue["updated_at"] for issue in issues)
+
+    def test_complete_sync_advances_to_start_time(self, tmp_path):
+        """測試未截斷時以同步開始時間（減去重疊）作為下次起點"""
+        store = IssueStore(str(tmp_path))
+        asyncio.run(store.sync(FakeClient([make_issue(n) for n in range(1, 11)]), "a/b", max_pages=2))
+        assert store.last_sync > "2024-03"
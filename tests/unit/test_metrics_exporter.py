@@ -0,0 +1,61 @@
+"""
+Prometheus 匯出器測試
+測試 .github/scripts/metrics_exporter.py 的輸出格式
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from metrics_exporter import MetricsRenderer, PipelineExporter
+
+
+def metric_families(text: str):
+    """依出現順序回傳每段連續樣本的指標名稱"""
+    names = []
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name = line.split("{")[0].split(" ")[0]
+        if not names or names[-1] != name:
+            names.append(name)
+    return names
+
+
+class TestMetricsExporter:
+    """匯出器測試類"""
+
+    def test_samples_are_grouped_by_family(self):
+        """測試交錯加入的樣本依指標分組輸出"""
+        out = MetricsRenderer()
+        out.declare("a_total", "A")
+        out.declare("b_total", "B")
+        out.sample("a_total", 1, {"x": "1"})
+        out.sample("b_total", 2)
+        out.sample("a_total", 3, {"x": "2"})
+
+        lines = out.render().decode("utf-8").splitlines()
+        assert lines == [
+            "# HELP a_total A", "# TYPE a_total gauge", 'a_total{x="1"} 1', 'a_total{x="2"} 3',
+            "# HELP b_total B", "# TYPE b_total gauge", "b_total 2"
+        ]
+
+    def test_snapshot_families_are_contiguous(self, tmp_path):
+        """測試測試結果與各腳本量測的指標不交錯"""
+        suite = {"passed": 8, "failed": 2, "coverage": 75.0}
+        (tmp_path / "test_coverage.json").write_text(
+            json.dumps({"unit_tests": suite, "integration_tests": suite}), encoding="utf-8")
+        (tmp_path / "metrics").mkdir()
+        for script in ("check_code_status", "parse_prd_status"):
+            (tmp_path / "metrics" / f"{script}.json").write_text(json.dumps({
+                "script": script, "total_seconds": 0.5,
+                "timers": {"walk": {"seconds": 0.1}}, "counters": {"files_scanned": 3}
+            }), encoding="utf-8")
+
+        names = metric_families(PipelineExporter(str(tmp_path)).build_snapshot().decode("utf-8"))
+        assert len(names) == len(set(names))
+        assert "roadmap_test_coverage_percent" in names
+        assert "roadmap_pipeline_counter" in names
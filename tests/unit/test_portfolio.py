@@ -0,0 +1,105 @@
+"""
+組合分析測試
+測試 .github/scripts/portfolio.py 的快取鍵與儲存庫合併
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+import portfolio
+from portfolio import PortfolioAggregator, analyze_repo, repo_revision
+
+
+def git(root: Path, *args: str):
+    subprocess.run(["git", "-C", str(root), "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   check=True, capture_output=True)
+
+
+class TestRepoRevision:
+    """快取鍵測試類"""
+
+    def test_revision_changes_with_every_edit(self, tmp_path):
+        """測試同一個檔案再次修改、未追蹤檔案修改時快取鍵都會改變"""
+        git(tmp_path, "init", "-q")
+        (tmp_path / "PRD").mkdir()
+        prd_file = tmp_path / "PRD" / "prd.md"
+        prd_file.write_text("v1", encoding="utf-8")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", "init")
+
+        revisions = [repo_revision(tmp_path)]
+        for content in ("v2", "v3"):
+            prd_file.write_text(content, encoding="utf-8")
+            revisions.append(repo_revision(tmp_path))
+        for content in ("new1", "new2"):
+            (tmp_path / "PRD" / "new.md").write_text(content, encoding="utf-8")
+            revisions.append(repo_revision(tmp_path))
+
+        assert len(set(revisions)) == len(revisions)
+        assert all(revision.startswith(revisions[0]) for revision in revisions)
+
+    def test_changes_outside_tracked_paths_are_ignored(self, tmp_path):
+        """測試 PRD/src/tests 以外的變更不影響快取鍵"""
+        git(tmp_path, "init", "-q")
+        (tmp_path / "README.md").write_text("v1", encoding="utf-8")
+        git(tmp_path, "add", ".")
+        git(tmp_path, "commit", "-q", "-m", "init")
+        clean = repo_revision(tmp_path)
+
+        (tmp_path / "README.md").write_text("v2", encoding="utf-8")
+        assert repo_revision(tmp_path) == clean
+
+    def test_non_git_directory(self, tmp_path):
+        """測試非 git 目錄不快取"""
+        assert repo_revision(tmp_path / "missing") is None
+
+
+def make_repo(root: Path, fr_id: str) -> Path:
+    prd_dir = root / "PRD" / "01-DSH-Dashboard" / "01.1-DSH-OV-Overview"
+    prd_dir.mkdir(parents=True)
+    (prd_dir / "prd.md").write_text(f"# [DSH-OV] 總覽\n\n### {fr_id}: 總覽\n**狀態**: ✅ 完成\n", encoding="utf-8")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return root
+
+
+class TestPortfolioAggregator:
+    """組合彙總測試類"""
+
+    def test_same_directory_names_do_not_overwrite(self, tmp_path, monkeypatch):
+        """測試不同路徑但目錄名稱相同的儲存庫各自保留"""
+        monkeypatch.chdir(tmp_path)
+        repos = [str(make_repo(tmp_path / "a" / "app", "FR-DSH-OV-001")),
+                 str(make_repo(tmp_path / "b" / "app", "FR-DSH-OV-002"))]
+        aggregator = PortfolioAggregator(repos, str(tmp_path / "cache"), workers=1)
+        results = aggregator.analyze()
+
+        names = [result["name"] for result in results]
+        assert len(set(names)) == 2
+        assert all(name.startswith("app-") for name in names)
+        assert len(aggregator.merge(results)["prd"]["modules"]) == 2
+
+    def test_merge_rejects_duplicate_names(self, tmp_path):
+        """測試合併時名稱重複拋出錯誤"""
+        result = {"name": "app", "prd": {}, "code": {}, "test": {}}
+        with pytest.raises(ValueError):
+            PortfolioAggregator([]).merge([result, dict(result)])
+
+    def test_cache_is_invalidated_by_script_changes(self, tmp_path, monkeypatch):
+        """測試分析腳本改變時不使用快取"""
+        monkeypatch.chdir(tmp_path)
+        repo = str(make_repo(tmp_path / "app", "FR-DSH-OV-001"))
+        cache_dir = str(tmp_path / "cache")
+
+        assert analyze_repo(repo, cache_dir)["cached"] is False
+        assert analyze_repo(repo, cache_dir)["cached"] is True
+
+        monkeypatch.setattr(portfolio, "script_version", lambda module: "changed")
+        assert analyze_repo(repo, cache_dir)["cached"] is False
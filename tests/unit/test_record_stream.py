@@ -0,0 +1,111 @@
+"""
+記錄串流測試
+測試 .github/scripts/record_stream.py 的頁尾索引讀取與截斷檔案的處理
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+import record_stream
+from record_stream import (RecordStreamError, RecordStreamReader, RecordStreamWriter,
+                           is_record_stream, load_json_or_stream)
+
+
+def write_stream(path: Path, count: int = 3) -> dict:
+    records = {f"{i:02d}-MOD": {"name": f"{i:02d}-MOD", "has_code": i % 2 == 0, "files": ["a.ts"] * i}
+               for i in range(count)}
+    with RecordStreamWriter(path, "code_status") as writer:
+        for key, record in records.items():
+            writer.write(key, record)
+        writer.close({"total_modules": count})
+    return records
+
+
+class TestRecordStreamReader:
+    """記錄串流讀取測試類"""
+
+    def test_footer_index_and_summary(self, tmp_path):
+        """測試依頁尾索引讀取單一記錄與彙總"""
+        path = tmp_path / "code_status.jsonl"
+        records = write_stream(path)
+
+        reader = RecordStreamReader(path)
+        assert reader.kind == "code_status"
+        assert len(reader) == 3
+        assert reader.summary == {"total_modules": 3}
+        assert reader.get("02-MOD") == records["02-MOD"]
+        assert reader.get("missing") is None
+        assert list(reader.iter_records()) == list(records.items())
+
+        data = load_json_or_stream(path)
+        assert data["total_modules"] == 3
+        assert dict(data["modules"].items()) == records
+
+    def test_footer_larger_than_tail_chunk(self, tmp_path, monkeypatch):
+        """測試頁尾超過一次讀取的大小時仍能完整讀取"""
+        monkeypatch.setattr(record_stream, "TAIL_CHUNK", 16)
+        path = tmp_path / "code_status.jsonl"
+        records = write_stream(path, count=20)
+        reader = RecordStreamReader(path)
+        assert len(reader.index) == 20
+        assert reader.get("19-MOD") == records["19-MOD"]
+
+    @pytest.mark.parametrize("cut", ["footer", "mid_footer", "mid_record", "header_only"])
+    def test_truncated_file_is_rejected(self, tmp_path, cut):
+        """測試寫入中斷（缺少或不完整的頁尾）時拋出 RecordStreamError"""
+        path = tmp_path / "code_status.jsonl"
+        write_stream(path)
+        lines = path.read_bytes().splitlines(keepends=True)
+        truncated = {
+            "footer": b"".join(lines[:-1]),
+            "mid_footer": b"".join(lines[:-1]) + lines[-1][:len(lines[-1]) // 2],
+            "mid_record": b"".join(lines[:2]) + lines[2][:10],
+            "header_only": lines[0]
+        }[cut]
+        path.write_bytes(truncated)
+
+        assert is_record_stream(path)
+        with pytest.raises(RecordStreamError):
+            RecordStreamReader(path)
+
+    def test_empty_or_plain_json_is_not_a_stream(self, tmp_path):
+        """測試空檔案與一般 JSON 不視為記錄串流"""
+        empty = tmp_path / "empty.jsonl"
+        empty.write_bytes(b"")
+        with pytest.raises(RecordStreamError):
+            RecordStreamReader(empty)
+
+        plain = tmp_path / "code_status.json"
+        plain.write_text(json.dumps({"modules": {"A": {}}}), encoding="utf-8")
+        assert not is_record_stream(plain)
+        assert load_json_or_stream(plain) == {"modules": {"A": {}}}
+
+
+class TestRecordStreamWriter:
+    """記錄串流寫入測試類"""
+
+    def test_failed_write_keeps_previous_file(self, tmp_path):
+        """測試寫入途中發生錯誤時保留原本的檔案"""
+        path = tmp_path / "code_status.jsonl"
+        records = write_stream(path)
+
+        with pytest.raises(RuntimeError):
+            with RecordStreamWriter(path, "code_status") as writer:
+                writer.write("00-MOD", {})
+                raise RuntimeError("中斷")
+
+        assert RecordStreamReader(path).get("01-MOD") == records["01-MOD"]
+        assert not path.with_name(path.name + ".tmp").exists()
+
+    def test_duplicate_key_is_rejected(self, tmp_path):
+        """測試同一個鍵不能寫入兩次"""
+        with RecordStreamWriter(tmp_path / "x.jsonl", "code_status") as writer:
+            writer.write("A", {})
+            with pytest.raises(ValueError):
+                writer.write("A", {})
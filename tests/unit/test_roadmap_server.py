@@ -0,0 +1,141 @@
+"""
+路線圖查詢服務測試
+測試 .github/scripts/roadmap_server.py 的索引查詢、篩選條件與 HTTP 回應
+"""
+
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from roadmap_server import RoadmapIndex, handle_request, make_handler
+
+
+def write_prd(path: Path, abbr: str, owner: str, frs: list):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    blocks = "\n".join(f"### {fr_id}: {title}\n**狀態**: {status}\n" for fr_id, title, status in frs)
+    path.write_text(f"# [{abbr}] PRD\n\n- **負責人**: {owner}\n\n## 功能需求\n\n{blocks}", encoding="utf-8")
+
+
+@pytest.fixture
+def index(tmp_path):
+    """兩個模組、四個 FR；WMS-IOD-001 有測試，CRM-CM-001 有未關閉的 bug"""
+    write_prd(tmp_path / "PRD" / "08-WMS-Warehouse" / "08.1-WMS-IOD-Inventory" / "prd.md", "WMS-IOD", "小明", [
+        ("FR-WMS-IOD-001", "入庫作業", "🟡 開發中"),
+        ("FR-WMS-IOD-002", "庫存盤點", "✅ 完成")
+    ])
+    write_prd(tmp_path / "PRD" / "02-CRM-Customer" / "02.1-CRM-CM-Customer" / "prd.md", "CRM-CM", "小華", [
+        ("FR-CRM-CM-001", "客戶建立", "🟡 開發中"),
+        ("FR-CRM-CM-002", "客戶合併", "🔴 未開始")
+    ])
+    (tmp_path / "PRD" / "README.md").write_text("### FR-XXX-001: 不是 PRD\n", encoding="utf-8")
+    (tmp_path / "tests" / "unit").mkdir(parents=True)
+    (tmp_path / "tests" / "unit" / "test_inbound.py").write_text('"""FR-WMS-IOD-001"""\n', encoding="utf-8")
+    (tmp_path / "temp").mkdir()
+    (tmp_path / "temp" / "issue_status.json").write_text(json.dumps({"issues_by_fr": {
+        "FR-CRM-CM-001": {"open": 3, "closed": 1, "issues": [{"state": "open", "type": "bug"}]},
+        "FR-WMS-IOD-001": {"open": 1, "closed": 0, "issues": [{"state": "open", "type": "feature"}]}
+    }}), encoding="utf-8")
+
+    roadmap = RoadmapIndex(str(tmp_path / "PRD"), str(tmp_path / "tests"), str(tmp_path / "temp"))
+    roadmap.refresh(force=True)
+    return roadmap
+
+
+def query_ids(index: RoadmapIndex, **params) -> list:
+    return [record["fr_id"] for record in index.model.query(params)]
+
+
+class TestRoadmapModel:
+    """整合模型查詢測試類"""
+
+    def test_records_are_built_from_sources(self, index):
+        """測試每個 FR 一筆紀錄並帶入負責人、測試與 Issue 數字"""
+        records = {record["fr_id"]: record for record in index.model.records}
+        assert sorted(records) == ["FR-CRM-CM-001", "FR-CRM-CM-002", "FR-WMS-IOD-001", "FR-WMS-IOD-002"]
+        assert records["FR-WMS-IOD-001"]["owner"] == "小明"
+        assert records["FR-WMS-IOD-001"]["test_count"] == 1
+        assert records["FR-CRM-CM-001"]["open_bugs"] == 1
+        assert records["FR-WMS-IOD-002"]["status"] == "completed"
+
+    def test_index_intersection(self, index):
+        """測試多個索引欄位取交集，同一欄位以逗號分隔取聯集，且不分大小寫"""
+        assert query_ids(index, module="WMS", status="in_progress") == ["FR-WMS-IOD-001"]
+        assert query_ids(index, module="wms-iod") == ["FR-WMS-IOD-001", "FR-WMS-IOD-002"]
+        assert sorted(query_ids(index, module="WMS,CRM", status="in_progress")) == ["FR-CRM-CM-001", "FR-WMS-IOD-001"]
+        assert query_ids(index, owner="小華", status="not_started") == ["FR-CRM-CM-002"]
+        assert query_ids(index, module="WMS", owner="小華") == []
+
+    def test_filters(self, index):
+        """測試 has_tests、has_open_bugs 與 min_open_issues 篩選"""
+        assert query_ids(index, module="WMS", has_tests="false") == ["FR-WMS-IOD-002"]
+        assert query_ids(index, has_tests="true") == ["FR-WMS-IOD-001"]
+        assert query_ids(index, has_open_bugs="yes") == ["FR-CRM-CM-001"]
+        assert query_ids(index, min_open_issues="2") == ["FR-CRM-CM-001"]
+        assert sorted(query_ids(index, min_open_issues="1")) == ["FR-CRM-CM-001", "FR-WMS-IOD-001"]
+        assert query_ids(index, q="盤點") == ["FR-WMS-IOD-002"]
+
+    def test_refresh_only_when_sources_change(self, index, tmp_path):
+        """測試來源未變更時不重建，測試檔案變更後重建"""
+        assert not index.refresh()
+        (tmp_path / "tests" / "unit" / "test_count.py").write_text('"""FR-WMS-IOD-002"""\n', encoding="utf-8")
+        assert index.refresh()
+        assert query_ids(index, has_tests="false") == ["FR-CRM-CM-001", "FR-CRM-CM-002"]
+
+
+class TestHandleRequest:
+    """查詢處理測試類"""
+
+    def test_bad_integer_returns_400(self, index):
+        """測試整數參數格式錯誤時回傳 400"""
+        assert handle_request(index, "/frs", {"min_open_issues": "abc"})[0] == 400
+        assert handle_request(index, "/frs", {"limit": "ten"})[0] == 400
+
+    def test_limit(self, index):
+        """測試 limit 只限制回傳筆數，count 仍為全部符合數"""
+        status, body = handle_request(index, "/frs", {"limit": "1"})
+        assert status == 200
+        assert (body["count"], len(body["results"])) == (4, 1)
+
+    def test_single_fr_lookup(self, index):
+        """測試單一 FR 查詢會正規化 FR-ID，找不到時回傳 404"""
+        status, body = handle_request(index, "/frs/fr_crm_cm_1", {})
+        assert status == 200
+        assert body["results"][0]["fr_id"] == "FR-CRM-CM-001"
+        assert handle_request(index, "/frs/FR-OM-OL-999", {})[0] == 404
+        assert handle_request(index, "/unknown", {})[0] == 404
+
+    def test_modules_summary(self, index):
+        """測試模組統計"""
+        status, body = handle_request(index, "/modules", {})
+        assert status == 200
+        assert body["modules"]["08-WMS-Warehouse"] == {"total": 2, "in_progress": 1, "completed": 1}
+
+    def test_http_handler(self, index):
+        """測試 HTTP 介面的狀態碼與中文參數"""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(index))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            with urlopen(f"{base}/frs?owner={quote('小明')}&has_tests=true") as response:
+                body = json.loads(response.read())
+            assert [record["fr_id"] for record in body["results"]] == ["FR-WMS-IOD-001"]
+
+            with pytest.raises(HTTPError) as error:
+                urlopen(f"{base}/frs?min_open_issues=x")
+            assert error.value.code == 400
+            with pytest.raises(HTTPError) as error:
+                urlopen(f"{base}/frs/FR-OM-OL-999")
+            assert error.value.code == 404
+        finally:
+            server.shutdown()
+            server.server_close()
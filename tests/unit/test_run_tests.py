@@ -0,0 +1,147 @@
+"""
+測試執行器測試
+測試 .github/scripts/run_tests.py 合併多個測試工具結果的方式
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+import run_tests
+from run_tests import RUNNER_COMPLETED, RUNNER_FAILED, RUNNER_TIMEOUT
+from stage_cache import StageCache
+
+
+def completed(total: int, passed: int, coverage: float) -> dict:
+    return {"status": RUNNER_COMPLETED, "total": total, "passed": passed,
+            "failed": total - passed, "coverage": coverage}
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return run_tests.TestRunner(root=str(tmp_path), runner_timeout=1)
+
+
+class TestMergeRunnerResults:
+    """測試工具結果合併測試類"""
+
+    def test_failed_and_timed_out_runners_are_excluded(self, runner):
+        """測試失敗與逾時的工具不列入總數與覆蓋率，但保留狀態"""
+        results = {
+            "npm": completed(30, 27, 90),
+            "python": runner.runner_failure(RUNNER_TIMEOUT),
+            "java": runner.runner_failure(RUNNER_FAILED)
+        }
+        merged = runner.merge_runner_results(results)
+
+        assert (merged["total"], merged["passed"], merged["failed"], merged["coverage"]) == (30, 27, 3, 90)
+        assert merged["runners"]["python"]["status"] == RUNNER_TIMEOUT
+        assert merged["runners"]["java"]["status"] == RUNNER_FAILED
+
+    def test_coverage_is_weighted_by_test_count(self, runner):
+        """測試覆蓋率依測試數量加權平均"""
+        merged = runner.merge_runner_results({"npm": completed(30, 30, 90), "python": completed(10, 10, 50)})
+        assert merged["total"] == 40
+        assert merged["coverage"] == 80
+
+    def test_no_completed_runner_falls_back_to_mock_data(self, runner):
+        """測試沒有工具完成時使用模擬數據並保留各工具狀態"""
+        results = {"npm": runner.runner_failure(RUNNER_TIMEOUT)}
+        merged = runner.merge_runner_results(results)
+        assert merged["total"] == runner.get_mock_test_results("unit")["total"]
+        assert merged["runners"] == results
+
+    def test_single_completed_runner_is_returned_as_is(self, runner):
+        """測試只有一個完成的工具時直接回傳其結果"""
+        result = completed(5, 4, 70)
+        assert runner.merge_runner_results({"python": result}) is result
+
+
+class TestRunnerTimeout:
+    """測試工具逾時測試類"""
+
+    def test_timeout_is_marked(self, runner, monkeypatch):
+        """測試逾時的工具回傳 timeout 狀態而非模擬數據"""
+        def timeout(*args, **kwargs):
+            raise subprocess.TimeoutExpired(args[0], kwargs.get("timeout"))
+        monkeypatch.setattr(run_tests.metrics, "run", timeout)
+
+        result = runner.run_python_tests()
+        assert result["status"] == RUNNER_TIMEOUT
+        assert result["total"] == 0
+
+
+class TestFailingTests:
+    """測試失敗時的結果解析測試類"""
+
+    def fake_run(self, monkeypatch, returncode: int, stdout: str):
+        def run(command, **kwargs):
+            return subprocess.CompletedProcess(command, returncode, stdout, "")
+        monkeypatch.setattr(run_tests.metrics, "run", run)
+
+    def test_failing_pytest_is_still_counted(self, runner, monkeypatch):
+        """測試有測試失敗（結束碼 1）時仍解析輸出並列入結果"""
+        self.fake_run(monkeypatch, 1, "TOTAL   120   30   75%\n==== 2 failed, 8 passed, 1 error in 0.5s ====\n")
+        result = runner.run_python_tests()
+        assert (result["status"], result["total"], result["passed"], result["failed"], result["coverage"]) == \
+            (RUNNER_COMPLETED, 11, 8, 3, 75)
+
+    def test_all_passing_pytest(self, runner, monkeypatch):
+        """測試全部通過時（沒有 failed 字樣）也能解析"""
+        self.fake_run(monkeypatch, 0, "==== 5 passed in 0.1s ====\n")
+        assert runner.run_python_tests()["total"] == 5
+
+    def test_failing_jest_json_is_parsed(self, runner, monkeypatch):
+        """測試 jest 有測試失敗時仍解析 JSON 輸出"""
+        self.fake_run(monkeypatch, 1, '{"numTotalTests": 4, "numPassedTests": 3, "numFailedTests": 1}')
+        result = runner.run_npm_tests()
+        assert (result["status"], result["failed"]) == (RUNNER_COMPLETED, 1)
+
+    def test_failing_maven_uses_overall_result(self, runner, monkeypatch):
+        """測試 Maven 使用最後的整體結果行"""
+        self.fake_run(monkeypatch, 1, "Tests run: 2, Failures: 0, Errors: 0, Skipped: 0\n"
+                                      "Tests run: 7, Failures: 1, Errors: 1, Skipped: 0\n")
+        result = runner.run_java_tests()
+        assert (result["status"], result["total"], result["passed"]) == (RUNNER_COMPLETED, 7, 5)
+
+    def test_unparseable_output_is_failure(self, runner, monkeypatch):
+        """測試輸出無法解析時標示為失敗"""
+        self.fake_run(monkeypatch, 2, "ERROR: usage\n")
+        assert runner.run_python_tests()["status"] == RUNNER_FAILED
+        assert runner.run_java_tests()["status"] == RUNNER_FAILED
+        assert runner.run_npm_tests()["status"] == RUNNER_FAILED
+
+
+class TestStageCache:
+    """快取範圍測試類"""
+
+    def test_only_fr_coverage_is_cached(self, tmp_path, monkeypatch):
+        """測試測試工具每次都執行，只有 FR-ID 覆蓋率分析使用快取"""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "tests").mkdir()
+        (tmp_path / "tests" / "login.test.js").write_text("// FR-CRM-CM-001\n", encoding="utf-8")
+        runner = run_tests.TestRunner(root=str(tmp_path), cache=StageCache(str(tmp_path / "cache")))
+        calls = {"unit": 0, "fr": 0}
+
+        def unit_tests():
+            calls["unit"] += 1
+            return runner.runner_failure(RUNNER_TIMEOUT)
+
+        def fr_coverage():
+            calls["fr"] += 1
+            return run_tests.TestRunner.analyze_fr_coverage(runner)
+
+        monkeypatch.setattr(runner, "run_unit_tests", unit_tests)
+        monkeypatch.setattr(runner, "analyze_fr_coverage", fr_coverage)
+        first = runner.run_tests_and_collect_coverage()
+        second = runner.run_tests_and_collect_coverage()
+
+        assert calls == {"unit": 2, "fr": 1}
+        assert second["fr_coverage"] == first["fr_coverage"]
+        assert list(first["fr_coverage"]) == ["FR-CRM-CM-001"]
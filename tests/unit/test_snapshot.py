@@ -0,0 +1,59 @@
+"""
+管線狀態快照測試
+測試 .github/scripts/snapshot.py 的區段更新與讀取
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from snapshot import SnapshotError, SnapshotReader, update_sections
+
+
+class TestUpdateSections:
+    """區段更新測試類"""
+
+    def test_round_trip(self, tmp_path):
+        """測試寫入後讀回相同內容"""
+        path = tmp_path / "pipeline.snap"
+        prd = {"modules": {"01-DSH": {"submodules": [{"fr_id": "FR-DSH-OV-001", "status": "✅ 完成"}]}},
+               "total_fr_ids": 1}
+        update_sections(path, {"prd_status": prd, "issue_status": {"open_issues": 3}})
+
+        reader = SnapshotReader(path)
+        assert reader.sections == ["issue_status", "prd_status"]
+        assert reader.load("prd_status") == prd
+        assert reader.load("issue_status") == {"open_issues": 3}
+        assert reader.load("missing", {}) == {}
+
+    def test_update_keeps_other_sections_byte_for_byte(self, tmp_path):
+        """測試只取代指定區段，其他區段的位元組與更新時間保持不變"""
+        path = tmp_path / "pipeline.snap"
+        update_sections(path, {"prd_status": {"total_fr_ids": 1}, "code_status": {"modules": {}}})
+        before = SnapshotReader(path)
+        raw_code = before.read_raw("code_status")
+        code_updated_at = before.header["sections"]["code_status"]["updated_at"]
+
+        update_sections(path, {"prd_status": {"total_fr_ids": 2}, "mpm_data": {"overall_progress": 50}})
+
+        after = SnapshotReader(path)
+        assert after.sections == ["code_status", "mpm_data", "prd_status"]
+        assert after.load("prd_status") == {"total_fr_ids": 2}
+        assert after.load("mpm_data") == {"overall_progress": 50}
+        assert after.read_raw("code_status") == raw_code
+        assert after.header["sections"]["code_status"]["updated_at"] == code_updated_at
+        assert not path.with_name(path.name + ".tmp").exists()
+
+    def test_invalid_file_is_rebuilt(self, tmp_path):
+        """測試舊檔案無法讀取時重新建立"""
+        path = tmp_path / "pipeline.snap"
+        path.write_bytes(b"not a snapshot")
+        with pytest.raises(SnapshotError):
+            SnapshotReader(path)
+
+        update_sections(path, {"prd_status": {"total_fr_ids": 1}})
+        assert SnapshotReader(path).sections == ["prd_status"]
@@ -0,0 +1,114 @@
+"""
+階段結果快取測試
+測試 .github/scripts/stage_cache.py 的快取鍵與失效
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from stage_cache import StageCache, hash_inputs, script_version
+
+
+def make_inputs(root: Path) -> Path:
+    prd = root / "PRD" / "01-DSH"
+    prd.mkdir(parents=True)
+    (prd / "prd.md").write_text("### FR-DSH-OV-001: 總覽\n", encoding="utf-8")
+    return root / "PRD"
+
+
+class TestCacheKey:
+    """快取鍵測試類"""
+
+    def test_key_is_stable_for_same_inputs(self, tmp_path):
+        """測試相同輸入與參數得到相同的鍵"""
+        inputs = make_inputs(tmp_path)
+        cache = StageCache(str(tmp_path / "cache"))
+        assert cache.key("prd_status", "parse_prd_status", [inputs]) == \
+            cache.key("prd_status", "parse_prd_status", [inputs])
+
+    def test_key_changes_with_content_not_mtime(self, tmp_path):
+        """測試內容改變時鍵改變，只改修改時間時鍵不變"""
+        inputs = make_inputs(tmp_path)
+        prd_file = inputs / "01-DSH" / "prd.md"
+        cache = StageCache(str(tmp_path / "cache"))
+        key = cache.key("prd_status", "parse_prd_status", [inputs])
+
+        os.utime(prd_file, (1, 1))
+        assert cache.key("prd_status", "parse_prd_status", [inputs]) == key
+
+        prd_file.write_text("### FR-DSH-OV-001: 總覽\n**狀態**: ✅ 完成\n", encoding="utf-8")
+        assert cache.key("prd_status", "parse_prd_status", [inputs]) != key
+
+    def test_key_includes_stage_params_and_new_files(self, tmp_path):
+        """測試階段名稱、參數、新增檔案與不存在的路徑都影響鍵"""
+        inputs = make_inputs(tmp_path)
+        cache = StageCache(str(tmp_path / "cache"))
+        key = cache.key("prd_status", "parse_prd_status", [inputs])
+
+        assert cache.key("other", "parse_prd_status", [inputs]) != key
+        assert cache.key("prd_status", "parse_prd_status", [inputs], {"max_pages": 2}) != key
+        assert hash_inputs([tmp_path / "missing"]) != hash_inputs([])
+
+        (inputs / "01-DSH" / "README.md").write_text("說明\n", encoding="utf-8")
+        assert cache.key("prd_status", "parse_prd_status", [inputs]) != key
+
+    def test_bytecode_is_not_hashed(self, tmp_path):
+        """測試 __pycache__ 與 .pyc 不影響鍵"""
+        inputs = make_inputs(tmp_path)
+        digest = hash_inputs([inputs])
+        (inputs / "__pycache__").mkdir()
+        (inputs / "__pycache__" / "conftest.cpython-312.pyc").write_bytes(b"\x00")
+        (inputs / "01-DSH" / "helper.pyc").write_bytes(b"\x00")
+        assert hash_inputs([inputs]) == digest
+
+    def test_script_version_covers_local_imports(self):
+        """測試腳本版本隨引用的同目錄模組不同而不同"""
+        assert script_version("parse_prd_status") != script_version("fr_grammar")
+        assert len(script_version("parse_prd_status")) == 64
+
+
+class TestCacheInvalidation:
+    """快取失效測試類"""
+
+    def test_cached_recomputes_after_input_change(self, tmp_path):
+        """測試輸入改變後重新計算，未改變時使用快取"""
+        inputs = make_inputs(tmp_path)
+        cache = StageCache(str(tmp_path / "cache"))
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"count": len(calls)}
+
+        assert cache.cached("prd_status", "parse_prd_status", [inputs], compute) == {"count": 1}
+        assert cache.cached("prd_status", "parse_prd_status", [inputs], compute) == {"count": 1}
+
+        (inputs / "01-DSH" / "prd.md").write_text("變更\n", encoding="utf-8")
+        assert cache.cached("prd_status", "parse_prd_status", [inputs], compute) == {"count": 2}
+        assert len(calls) == 2
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """測試損壞的項目視為未命中"""
+        cache = StageCache(str(tmp_path / "cache"))
+        cache.put("ab" * 32, {"ok": True})
+        cache.entry_path("ab" * 32).write_text("{", encoding="utf-8")
+        assert cache.get("ab" * 32) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """測試超過容量上限時淘汰最久未使用的項目"""
+        cache = StageCache(str(tmp_path / "cache"), max_bytes=0)
+        keys = ["aa" * 32, "bb" * 32, "cc" * 32]
+        for index, key in enumerate(keys):
+            cache.put(key, {"payload": "x" * 100})
+            os.utime(cache.entry_path(key), (1000 + index, 1000 + index))
+        cache.get(keys[0])
+
+        cache.max_bytes = 2 * cache.entry_path(keys[0]).stat().st_size
+        removed = cache.evict()
+        assert removed == [cache.entry_path(keys[1])]
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[2]) is not None
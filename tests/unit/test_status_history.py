@@ -0,0 +1,80 @@
+"""
+PRD 狀態歷史紀錄測試
+測試 .github/scripts/status_history.py 跨月份的查詢與降採樣
+"""
+
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from status_history import StatusHistory
+
+
+def make_record(day: date, progress: float = 0.0) -> dict:
+    return {"date": day.isoformat(), "modules": {"01-DSH": {"progress": progress}}, "frs": {}, "totals": {}}
+
+
+def fill(history: StatusHistory, start: date, end: date):
+    day = start
+    while day <= end:
+        history.append(make_record(day, float(day.day)))
+        day += timedelta(days=1)
+
+
+class TestStatusHistory:
+    """歷史紀錄測試類"""
+
+    def test_query_across_month_boundary(self, tmp_path):
+        """測試跨月份查詢只回傳區間內的紀錄，且依日期排序"""
+        history = StatusHistory(str(tmp_path))
+        fill(history, date(2024, 1, 25), date(2024, 3, 5))
+
+        records = history.query(date(2024, 1, 30), date(2024, 2, 2))
+        assert [r["date"] for r in records] == ["2024-01-30", "2024-01-31", "2024-02-01", "2024-02-02"]
+        assert sorted(history.segments()) == ["2024-01", "2024-02", "2024-03"]
+
+    def test_same_day_keeps_last_record(self, tmp_path):
+        """測試同一天多筆時保留最後一筆"""
+        history = StatusHistory(str(tmp_path))
+        history.append(make_record(date(2024, 2, 29), 10.0))
+        history.append(make_record(date(2024, 2, 29), 20.0))
+        records = history.query(date(2024, 2, 1), date(2024, 3, 1))
+        assert [r["modules"]["01-DSH"]["progress"] for r in records] == [20.0]
+
+    def test_compact_only_months_past_retention(self, tmp_path):
+        """測試只降採樣整個月都超過保留期的月份，每個 ISO 週保留最後一筆"""
+        history = StatusHistory(str(tmp_path), retention_days=30)
+        fill(history, date(2024, 1, 1), date(2024, 3, 31))
+
+        compacted = history.compact(today=date(2024, 3, 15))
+        assert compacted == ["2024-01"]
+        assert history.segments()["2024-01"] == [history.segment_path("2024-01", weekly=True)]
+        assert history.segment_path("2024-02") in history.segments()["2024-02"]
+
+        january = history.query(date(2024, 1, 1), date(2024, 1, 31))
+        # 1/1 為週一；各週最後一天為 1/7、1/14、1/21、1/28，月底 1/29-1/31 屬於跨月的週
+        assert [r["date"] for r in january] == ["2024-01-07", "2024-01-14", "2024-01-21",
+                                                "2024-01-28", "2024-01-31"]
+
+        # 跨月週的二月部分仍為日資料
+        boundary = history.query(date(2024, 1, 29), date(2024, 2, 4))
+        assert [r["date"] for r in boundary] == ["2024-01-31", "2024-02-01", "2024-02-02",
+                                                 "2024-02-03", "2024-02-04"]
+
+    def test_late_record_after_compaction(self, tmp_path):
+        """測試降採樣後補寫的紀錄可查詢，再次降採樣時與週資料合併"""
+        history = StatusHistory(str(tmp_path), retention_days=30)
+        fill(history, date(2024, 1, 1), date(2024, 1, 14))
+        history.compact(today=date(2024, 3, 15))
+
+        history.append(make_record(date(2024, 1, 20), 99.0))
+        assert [r["date"] for r in history.query(date(2024, 1, 1), date(2024, 1, 31))] == \
+            ["2024-01-07", "2024-01-14", "2024-01-20"]
+
+        assert history.compact(today=date(2024, 3, 15)) == ["2024-01"]
+        assert [r["date"] for r in history.query(date(2024, 1, 1), date(2024, 1, 31))] == \
+            ["2024-01-07", "2024-01-14", "2024-01-20"]
+        assert not history.segment_path("2024-01").exists()
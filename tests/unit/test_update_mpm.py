@@ -0,0 +1,62 @@
+"""
+MPM 更新測試
+測試 .github/scripts/update_mpm.py 讀取程式碼狀態檔的方式
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from record_stream import write_records
+from update_mpm import MPMUpdater
+
+
+def make_code_status() -> dict:
+    def submodule(fr_id, has_code):
+        return {"fr_id": fr_id, "has_code": has_code, "code_files": [f"src/{fr_id}.ts"] if has_code else []}
+    return {
+        "modules": {
+            "01-DSH-Dashboard": {"name": "01-DSH-Dashboard", "has_code": True, "code_files": [],
+                                 "submodules": [submodule("FR-DSH-OV-001", True), submodule("FR-DSH-OV-002", False)]},
+            "02-CRM-Customer": {"name": "02-CRM-Customer", "has_code": False, "code_files": [],
+                                "submodules": [submodule("FR-CRM-CM-001", False)]}
+        },
+        "total_modules": 2,
+        "modules_with_code": 1,
+        "modules_without_code": 1
+    }
+
+
+class TestLoadCodeStatusFile:
+    """程式碼狀態檔讀取測試類"""
+
+    def test_json_and_stream_give_same_result(self, tmp_path):
+        """測試一般 JSON 與記錄串流讀取結果相同，且只保留 FR-ID 對應"""
+        data = make_code_status()
+        json_path = tmp_path / "code_status.json"
+        json_path.write_text(json.dumps(data), encoding="utf-8")
+        stream_path = tmp_path / "code_status.jsonl"
+        write_records(stream_path, "code_status", data)
+
+        updater = MPMUpdater(str(tmp_path))
+        loaded = updater.load_code_status_file(str(json_path))
+        assert loaded == updater.load_code_status_file(str(stream_path))
+        assert loaded["modules"]["01-DSH-Dashboard"] == {
+            "fr_has_code": {"FR-DSH-OV-001": True, "FR-DSH-OV-002": False}
+        }
+        assert "submodules" not in loaded["modules"]["02-CRM-Customer"]
+
+    def test_code_status_matches_full_data(self, tmp_path):
+        """測試讀取後的程式碼狀態欄與完整程式碼狀態相同"""
+        updater = MPMUpdater(str(tmp_path))
+        path = tmp_path / "code_status.jsonl"
+        write_records(path, "code_status", make_code_status())
+        loaded = updater.load_code_status_file(str(path))
+
+        for fr_id in ["FR-DSH-OV-001", "FR-DSH-OV-002", "FR-CRM-CM-001", "FR-OM-OL-001"]:
+            assert updater.get_code_status(fr_id, loaded) == updater.get_code_status(fr_id, make_code_status())
+        assert updater.get_code_status("FR-DSH-OV-001", loaded) == "✅ 完成"
+        assert updater.get_code_status("FR-OM-OL-001", loaded) == "❌ 未開始"
@@ -0,0 +1,43 @@
+"""
+PRD 狀態監看測試
+測試 .github/scripts/watch_prd_status.py 的增量更新
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 添加腳本目錄到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github" / "scripts"))
+
+from watch_prd_status import PRDWatcher
+
+
+def touch(path: Path, content: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestPRDWatcher:
+    """監看器測試類"""
+
+    def test_project_tests_dir_triggers_reindex(self, tmp_path):
+        """測試專案 tests/ 目錄的變更會重新索引 FR-ID 測試引用"""
+        touch(tmp_path / "PRD" / "01-DSH-Dashboard" / "01.1-DSH-OV-Overview" / "prd.md",
+              "# [DSH-OV] 總覽\n\n### FR-DSH-OV-001: 總覽\n**狀態**: 🟡 開發中\n")
+        (tmp_path / "tests").mkdir()
+        watcher = PRDWatcher(str(tmp_path / "PRD"), str(tmp_path / "temp"), str(tmp_path / "temp" / "report.md"))
+        watcher.initial_scan()
+        assert watcher.poll_once() == []
+
+        test_file = tmp_path / "tests" / "unit" / "test_overview.py"
+        touch(test_file, '"""FR-DSH-OV-001"""\n')
+        assert watcher.poll_once() == [test_file]
+        assert str(test_file) in watcher.validator.symbol_table.sources
+        assert len(watcher.parsed) == 1
+
+        test_file.unlink()
+        assert watcher.poll_once() == [test_file]
+        assert str(test_file) not in watcher.validator.symbol_table.sources